@@ -0,0 +1,249 @@
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "streamlit_app"))
+
+from app import assign_cell_tubes, create_plate_map_files, create_protocol, generate_combinations, generate_plate_maps
+from distribution import plan_part_distribution
+from simulator import simulate_protocol
+from synthetic import JOB_SIZES, REUSE_LEVELS, make_job
+
+# Benchmarks of the generation pipeline and of the generated protocols, compared against a stored baseline
+#
+#     python benchmarks/run_benchmarks.py             # compare with benchmarks/baseline.json
+#     python benchmarks/run_benchmarks.py --update    # record a new baseline
+
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+TEMPLATE_FILE = os.path.join(REPO_DIR, "template_files", "template_BsmbI_moclo_protocol_EP_tubes.py")
+
+# Stages timed for every job, in pipeline order; 'simulate_protocol' runs the protocol against the
+# stand-in of the protocol API, for jobs up to SIMULATION_MAX_COMBINATIONS
+STAGES = ["generate_plate_maps", "generate_combinations", "create_plate_map_files", "create_protocol",
+          "simulate_protocol"]
+SIMULATION_MAX_COMBINATIONS = 1000
+
+DEFAULT_REPEATS = 3
+# Jobs above this size are timed once, as their run times are stable and long
+REPEAT_MAX_COMBINATIONS = 10000
+
+# A stage regresses when it takes more memory than the baseline by more than this fraction, or when the
+# commands of its protocol change. Run times vary too much between machines and runs to fail on by default;
+# with a time tolerance, stages faster than the time floor are still too noisy to compare
+MEMORY_TOLERANCE = 0.2
+TIME_FLOOR_SECONDS = 0.05
+
+def run_stages(job, template_file):
+    """
+    Runs the generation pipeline on a job, one stage at a time.
+
+    Args:
+        job (dict): Job as returned by make_job.
+        template_file (BytesIO): Protocol template.
+
+    Returns:
+        tuple: (stage, callable) pairs, each stage reading the results of the previous ones, and the
+        dictionary the stages store their results in.
+    """
+    results = {}
+
+    def plate_maps():
+        results["dna_plate_map_dict"] = generate_plate_maps(job["fixed_map"], job["customised_map"])
+
+    def combinations():
+        results["combinations_to_make"] = generate_combinations(job["combinations"])
+
+    def plate_map_files():
+        create_plate_map_files(results["combinations_to_make"])
+
+    def protocol():
+        combinations_to_make = results["combinations_to_make"]
+        distribution_plan = plan_part_distribution(combinations_to_make)
+        protocol_settings = {
+            "part_volume": distribution_plan["part_volume"],
+            "tip_action": distribution_plan["tip_action"],
+            "cell_tubes": assign_cell_tubes(len(combinations_to_make)),
+        }
+        results["protocol"] = create_protocol(results["dna_plate_map_dict"], combinations_to_make, template_file,
+                                              protocol_settings, precompile_plan=True)
+
+    def simulation():
+        results["report"] = simulate_protocol(results["protocol"])
+
+    stages = [plate_maps, combinations, plate_map_files, protocol, simulation]
+    if len(job["combinations"]) > SIMULATION_MAX_COMBINATIONS:
+        stages = stages[:-1]
+    return list(zip(STAGES, stages)), results
+
+def benchmark_job(num_combinations, reuse, template_file, repeats=DEFAULT_REPEATS):
+    """
+    Times every stage of the pipeline on a synthetic job and measures its peak memory.
+
+    Each stage is timed on its own, best of the repeats; its peak memory is traced in a separate
+    run, as tracing slows it down. The command counts of the simulated protocol are deterministic,
+    so any change in them is a change in the generated protocol.
+
+    Args:
+        num_combinations (int): Number of combinations of the job.
+        reuse (str): Key of REUSE_LEVELS.
+        template_file (BytesIO): Protocol template.
+        repeats (int): Number of timed runs.
+
+    Returns:
+        dict: Seconds and peak KiB by stage and, for simulated jobs, the simulated run time and the
+        command counts per phase.
+    """
+    job = make_job(num_combinations, reuse)
+    seconds = {}
+    for _ in range(repeats if num_combinations <= REPEAT_MAX_COMBINATIONS else 1):
+        stages, results = run_stages(job, template_file)
+        for stage, run in stages:
+            start = time.perf_counter()
+            run()
+            seconds[stage] = min(seconds.get(stage, float("inf")), time.perf_counter() - start)
+
+    peak_kib = {}
+    stages, _ = run_stages(job, template_file)
+    for stage, run in stages:
+        tracemalloc.start()
+        try:
+            run()
+            peak_kib[stage] = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    result = {
+        "combinations": num_combinations,
+        "parts": REUSE_LEVELS[reuse],
+        "stages": {stage: {"seconds": round(seconds[stage], 4), "peak_kib": round(peak_kib[stage])}
+                   for stage in seconds},
+    }
+    if "report" in results:
+        result["simulated_seconds"] = round(results["report"]["total_seconds"])
+        result["commands"] = results["report"]["phase_commands"]
+    return result
+
+def run_benchmarks(sizes=None, repeats=DEFAULT_REPEATS, progress=None):
+    """
+    Benchmarks every job size at every reuse level.
+
+    Args:
+        sizes (list): Numbers of combinations, defaulting to JOB_SIZES.
+        repeats (int): Number of timed runs per job.
+        progress (callable): Called with the name of each case before it runs.
+
+    Returns:
+        dict: The environment and the results by case name.
+    """
+    with open(TEMPLATE_FILE, "rb") as template:
+        template_file = io.BytesIO(template.read())
+    cases = {}
+    for size in sizes or JOB_SIZES:
+        for reuse in REUSE_LEVELS:
+            case = f"{reuse}_reuse_{size}"
+            if progress:
+                progress(case)
+            cases[case] = benchmark_job(size, reuse, template_file, repeats)
+    return {"python": platform.python_version(), "machine": platform.machine(), "cases": cases}
+
+def compare_results(results, baseline, time_tolerance=None, memory_tolerance=MEMORY_TOLERANCE):
+    """
+    Lists the regressions of benchmark results against a baseline.
+
+    Cases and stages missing from either side are skipped, so a partial run can be compared.
+
+    Args:
+        results (dict): Results as returned by run_benchmarks.
+        baseline (dict): Earlier results.
+        time_tolerance (float): Fraction a stage may be slower than the baseline, or None to not
+            compare run times.
+        memory_tolerance (float): Fraction a stage may take more memory than the baseline.
+
+    Returns:
+        list: One message per regression.
+    """
+    regressions = []
+    for case, result in results["cases"].items():
+        if case not in baseline["cases"]:
+            continue
+        reference = baseline["cases"][case]
+        for stage, measures in result["stages"].items():
+            if stage not in reference["stages"]:
+                continue
+            seconds, reference_seconds = measures["seconds"], reference["stages"][stage]["seconds"]
+            if time_tolerance is not None and seconds > max(reference_seconds * (1 + time_tolerance),
+                                                            TIME_FLOOR_SECONDS):
+                regressions.append(f"{case} {stage}: {seconds:.3f} s, baseline {reference_seconds:.3f} s")
+            peak_kib, reference_kib = measures["peak_kib"], reference["stages"][stage]["peak_kib"]
+            if peak_kib > reference_kib * (1 + memory_tolerance):
+                regressions.append(f"{case} {stage}: peak {peak_kib} KiB, baseline {reference_kib} KiB")
+        if "commands" in result and "commands" in reference and result["commands"] != reference["commands"]:
+            for phase in sorted(set(result["commands"]) | set(reference["commands"])):
+                commands, reference_commands = result["commands"].get(phase, {}), reference["commands"].get(phase, {})
+                for command in sorted(set(commands) | set(reference_commands)):
+                    if commands.get(command, 0) != reference_commands.get(command, 0):
+                        regressions.append(f"{case} {phase}: {commands.get(command, 0)} {command} commands, "
+                                           f"baseline {reference_commands.get(command, 0)}")
+    return regressions
+
+def format_results(results):
+    """
+    Formats benchmark results as a table for the terminal.
+    """
+    lines = [f"{'case':<20}" + "".join(f"{stage:>24}" for stage in STAGES)]
+    for case, result in results["cases"].items():
+        cells = []
+        for stage in STAGES:
+            measures = result["stages"].get(stage)
+            cells.append(f"{measures['seconds']:>9.3f} s {measures['peak_kib']:>8} KiB" if measures else "-")
+        lines.append(f"{case:<20}" + "".join(f"{cell:>24}" for cell in cells))
+    return "\n".join(lines)
+
+def main():
+    """
+    Command line entry point for the benchmarks.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark protocol generation on synthetic jobs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None,
+                        help=f"Numbers of combinations to benchmark (default: {' '.join(map(str, JOB_SIZES))})")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS,
+                        help=f"Timed runs per job, best kept (default: {DEFAULT_REPEATS})")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON file (default: benchmarks/baseline.json)")
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--output", default=None, help="Also write the results to this JSON file")
+    parser.add_argument("--time-tolerance", type=float, default=None,
+                        help="Also fail when a stage is slower than the baseline by more than this fraction, "
+                             "e.g. 0.5 (default: run times are reported but not compared)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeats, progress=lambda case: print(f"Running {case}", file=sys.stderr))
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.update:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.isfile(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update to record one.", file=sys.stderr)
+        sys.exit(1)
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare_results(results, baseline, args.time_tolerance)
+    for regression in regressions:
+        print(f"  Regression: {regression}", file=sys.stderr)
+    print(f"{len(regressions)} regression(s) against {args.baseline}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
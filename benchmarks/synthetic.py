@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+# Synthetic jobs for the benchmarks: plate maps and assembly-info tables as read from the uploaded CSV files
+
+JOB_SIZES = [12, 96, 1000, 10000, 100000]
+
+# Parts available per reuse level: high reuse draws every combination from a few parts, low reuse from
+# as many as one rack of 10ul tips serves on a reaction plate
+REUSE_LEVELS = {"high": 16, "low": 90}
+PARTS_PER_COMBINATION = (3, 6)
+
+FIXED_MAP_SHAPE = (8, 12)
+CUSTOMISED_MAP_SHAPE = (4, 6)
+# The last quarter of the parts sits in the customised tube rack, the others on the fixed plate
+CUSTOMISED_PARTS_SHARE = 0.25
+
+def part_names(num_parts):
+    """
+    Returns the names of the parts of a synthetic job.
+    """
+    return [f"pSYN{i:03d}" for i in range(num_parts)]
+
+def plate_map_frame(parts, shape):
+    """
+    Lays parts out row by row on a plate map DataFrame, leaving the other wells empty.
+    """
+    cells = np.full(shape[0] * shape[1], np.nan, dtype=object)
+    cells[:len(parts)] = parts
+    return pd.DataFrame(cells.reshape(shape))
+
+def make_job(num_combinations, reuse="high", seed=0):
+    """
+    Builds a synthetic job.
+
+    Args:
+        num_combinations (int): Number of combinations to assemble.
+        reuse (str): Key of REUSE_LEVELS.
+        seed (int): Seed of the random part choices.
+
+    Returns:
+        dict: Fixed and customised plate maps and the assembly-info table, as DataFrames with
+        the columns read_plate_map_csv and read_combinations_csv produce.
+    """
+    parts = part_names(REUSE_LEVELS[reuse])
+    num_fixed_parts = len(parts) - int(len(parts) * CUSTOMISED_PARTS_SHARE)
+    rng = random.Random(seed)
+    rows = []
+    for i in range(num_combinations):
+        num_parts = rng.randint(*PARTS_PER_COMBINATION)
+        rows.append([f"asm{i:06d}"] + rng.sample(parts, num_parts) + [np.nan] * (PARTS_PER_COMBINATION[1] - num_parts))
+    return {
+        "fixed_map": plate_map_frame(parts[:num_fixed_parts], FIXED_MAP_SHAPE),
+        "customised_map": plate_map_frame(parts[num_fixed_parts:], CUSTOMISED_MAP_SHAPE),
+        "combinations": pd.DataFrame(rows, dtype=object),
+    }
@@ -1,24 +1,178 @@
 import streamlit as st
 import pandas as pd
-import json
 import csv
 import io
+import json
+import math
 import os
 import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from caching import LRUCache, file_digest
+from deck import PIPETTE_MIN_VOLUMES, labware_grid, well_capacity
+from distribution import DEFAULT_COST_MODEL, choose_tip_action, plan_part_distribution
+from layout import PLATE_ROWS, plan_reaction_layout, summarise_layout
+from library import count_designs, expand_library, export_assembly_info, parse_library_rows
+from master_mix import TUBE_DEAD_VOLUME, TUBE_MAX_VOLUME, export_loading_sheet, plan_master_mix
+from plate_maps import build_plate_maps, export_plate_maps_csv, export_plate_maps_json, export_plate_maps_long
+from plating import (DEFAULT_MULTICHANNEL_PLATING_CONFIGURATION, DEFAULT_PLATING_CONFIGURATION, available_agar_slots,
+                     plating_configurations, plating_settings, summarise_plating)
+from profiles import GG_PROGRAMS, plan_gg_programs, program_seconds
+from run_log import analyse_run_logs, export_summary_csv
+from scheduler import GG_HOLD_SECONDS, compare_schedules
+from sharding import PLATE_CAPACITY, shard_combinations, summarise_shards
+from simulator import SimulationError, format_duration, simulate_protocol
+from source_layout import (DNA_PLATE_NAME, DNA_TUBES_NAME, export_plate_map, export_source_loading_sheet,
+                           plan_source_layout)
+from transfer_plan import compile_transfer_plan, export_transfer_plan, index_dna_wells
+from templates import (DEFAULT_VOLUMES, dna_source_labware, get_compiled_template, labware_slots, reaction_volumes,
+                       read_template_parameters, resolve_pipettes)
+from travel import optimise_transfer_order, summarise_travel
 
 # Functions for processing data
 
+# Assembly-info files are read in chunks of this many rows, keeping memory bounded for large libraries
+COMBINATION_CHUNK_SIZE = 10000
+# Widest assembly-info row accepted: the combination name plus up to 31 parts
+MAX_ASSEMBLY_COLUMNS = 32
+# Widest combinatorial library row accepted: the position name plus up to 96 candidate parts
+MAX_LIBRARY_COLUMNS = 97
+# Parsed inputs and generated outputs kept in memory across reruns and sessions
+CACHE_MAX_ENTRIES = 64
+
+def clean_cells(df):
+    """
+    Strips byte order marks and whitespace from every cell of a DataFrame, column by column.
+    Blank cells become missing values.
+    """
+    cleaned = df.astype("string").apply(
+        lambda column: column.str.replace("\ufeff", "", regex=False).str.strip()
+    )
+    return cleaned.replace("", pd.NA)
+
+def read_plate_map_csv(plate_map_file):
+    """
+    Reads a plate map CSV into a DataFrame of strings.
+
+    Args:
+        plate_map_file (UploadedFile): Plate map CSV file.
+
+    Returns:
+        DataFrame: The plate map, one row per labware row.
+    """
+    return pd.read_csv(plate_map_file, header=None, dtype=str, encoding="utf-8-sig")
+
+def read_csv_chunks(csv_file, max_columns, chunksize):
+    """
+    Streams the rows of a headerless CSV file of varying width as DataFrames of strings.
+
+    Shorter rows are padded with missing values. Blank lines are skipped.
+
+    Args:
+        csv_file (UploadedFile or str): CSV file, or its path.
+        max_columns (int): Largest number of fields accepted in a row.
+        chunksize (int): Number of rows per DataFrame.
+
+    Yields:
+        DataFrame: The next rows, with columns numbered from 0.
+
+    Raises:
+        ValueError: If a row has more than max_columns fields.
+    """
+    is_path = isinstance(csv_file, (str, os.PathLike))
+    if is_path:
+        text_file = open(csv_file, newline="", encoding="utf-8-sig")
+    else:
+        text_file = io.TextIOWrapper(csv_file, newline="", encoding="utf-8-sig")
+    try:
+        reader = csv.reader(text_file)
+        rows = []
+        for row in reader:
+            if len(row) > max_columns:
+                raise ValueError(f"Row {reader.line_num} has {len(row)} fields, more than the {max_columns} "
+                                 f"accepted.")
+            if not row:
+                continue
+            rows.append(row)
+            if len(rows) == chunksize:
+                yield pd.DataFrame(rows)
+                rows = []
+        if rows:
+            yield pd.DataFrame(rows)
+    finally:
+        if is_path:
+            text_file.close()
+        else:
+            # Leave the uploaded file open for the caller
+            text_file.detach()
+
+def read_combinations_csv(combinations_file, chunksize=COMBINATION_CHUNK_SIZE):
+    """
+    Streams the combinations of an assembly-info CSV, parsing it in chunks.
+
+    Args:
+        combinations_file (UploadedFile or str): Assembly-info CSV file, or its path.
+        chunksize (int): Number of rows parsed at a time.
+
+    Yields:
+        dict: Combination names and parts, in file order.
+
+    Raises:
+        ValueError: If a row has more than MAX_ASSEMBLY_COLUMNS fields.
+    """
+    for chunk in read_csv_chunks(combinations_file, MAX_ASSEMBLY_COLUMNS, chunksize):
+        yield from generate_combinations(chunk)
+
+def read_library_csv(library_file):
+    """
+    Reads a combinatorial library: one row per MoClo position, the position name then its
+    candidate parts, and optional rows starting with "exclude" listing parts not to combine.
+
+    Args:
+        library_file (UploadedFile or str): Combinatorial library CSV file, or its path.
+
+    Returns:
+        dict: Library as returned by parse_library_rows.
+
+    Raises:
+        ValueError: If a row has more than MAX_LIBRARY_COLUMNS fields.
+    """
+    rows = []
+    for chunk in read_csv_chunks(library_file, MAX_LIBRARY_COLUMNS, COMBINATION_CHUNK_SIZE):
+        df = clean_cells(chunk)
+        df = df[df[0].notna()]
+        rows.extend([value for value in row if isinstance(value, str)] for row in df.to_numpy(dtype=object).tolist())
+    return parse_library_rows(rows)
+
+def read_program_assignments_csv(program_file):
+    """
+    Reads the GG program assigned to each combination.
+
+    Args:
+        program_file (UploadedFile): CSV with a combination name and a program name per row.
+
+    Returns:
+        dict: Program names by combination name.
+
+    Raises:
+        ValueError: If a row has more than two fields.
+    """
+    assignments = {}
+    for chunk in read_csv_chunks(program_file, 2, COMBINATION_CHUNK_SIZE):
+        df = clean_cells(chunk.reindex(columns=range(2)))
+        df = df[df[0].notna() & df[1].notna()]
+        assignments.update(zip(df[0], df[1]))
+    return assignments
+
 def process_plate_map_df(df):
     """
     Converts a DataFrame into a list of lists representing plate maps.
-    Ignores rows where the first column contains NaN values.
+    Ignores rows where the first column contains NaN values; other empty cells become empty strings.
     """
-    plate_map = []
-    for index, row in df.iterrows():
-        # Includes rows where the first column is not NaN
-        if pd.notna(row[0]):
-            plate_map.append(row.tolist())
-    return plate_map
+    cleaned = clean_cells(df)
+    return cleaned[cleaned[0].notna()].fillna("").to_numpy(dtype=object).tolist()
 
 def generate_plate_maps(df1, df2):
     """
@@ -55,15 +209,12 @@ def generate_combinations(df):
     Returns:
         list: A list of dictionaries with combination names and parts.
     """
-    combinations_to_make = []
-    for index, row in df.iterrows():
-        if pd.notna(row[0]):  # Include rows with valid 'name' entries
-            combination = {
-                "name": row[0],
-                "parts": [x for x in row[1:] if pd.notna(x)]  # Add non-NaN parts
-            }
-            combinations_to_make.append(combination)
-    return combinations_to_make
+    cleaned = clean_cells(df)
+    cleaned = cleaned[cleaned[0].notna()]  # Include rows with valid 'name' entries
+    names = cleaned[0].to_numpy(dtype=object)
+    parts = cleaned.iloc[:, 1:].to_numpy(dtype=object)
+    present = cleaned.iloc[:, 1:].notna().to_numpy()  # Add non-NaN parts
+    return [{"name": name, "parts": row[mask].tolist()} for name, row, mask in zip(names, parts, present)]
 
 def check_number_of_combinations(combinations_to_make):
     """
@@ -81,40 +232,209 @@ def check_number_of_combinations(combinations_to_make):
             f'Too many combinations ({number_of_combinations}) requested. Max for single combinations is 96.'
         )
 
-def generate_and_save_output_plate_maps(combinations_to_make):
+# Functions for the pre-flight checks, run before any protocol is generated
+
+DNA_DEAD_VOLUME = 5
+TIP_RACK_CAPACITY = 96
+# Aluminium block wells holding competent cells, the extra tubes taken from the end of the spare wells
+CELL_TUBES = ["D1", "D6", "C6", "B6", "A6"]
+CELL_RESERVOIR_CAPACITY = 15000  # Multichannel mode, first well of the 12-well reservoir
+CELL_RESERVOIR_DEAD_VOLUME = 1000
+
+LEDGER_COLUMNS = ["plate", "resource", "location", "needed", "capacity"]
+
+def assign_cell_tubes(num_reactions, plate_capacity=PLATE_CAPACITY, cell_volume=DEFAULT_VOLUMES["cells"],
+                      disposal_volume=0):
     """
-    Creates CSV output for plate maps based on combinations.
+    Chooses the tubes holding competent cells, so no tube has to serve more reactions than it holds.
 
     Args:
+        num_reactions (int): Number of reactions.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+        cell_volume (float): Volume of competent cells added to each reaction, in µL.
+        disposal_volume (float): Volume left in each tube for the disposal volume of batched additions, in µL.
+
+    Returns:
+        list: Aluminium block wells, passed to the templates as 'cell_tubes'.
+
+    Raises:
+        ValueError: If a reaction plate needs more cells than the cell tubes hold.
+    """
+    reactions_per_tube = (TUBE_MAX_VOLUME - TUBE_DEAD_VOLUME - disposal_volume) // cell_volume
+    num_tubes = max(math.ceil(min(num_reactions, plate_capacity) / reactions_per_tube), 1)
+    if num_tubes > len(CELL_TUBES):
+        raise ValueError(f"A reaction plate of {min(num_reactions, plate_capacity)} reactions needs more "
+                         f"competent cells than the {len(CELL_TUBES)} cell tubes hold.")
+    return CELL_TUBES[:num_tubes]
+
+def cell_batch_disposal_volume(protocol_settings):
+    """
+    Returns the extra competent cells aspirated with each batch of a batched cell addition, in µL: the
+    minimum volume of the p300 in use, blown back into the source. Cells added one by one need none.
+    """
+    if not protocol_settings.get("cell_batch_size"):
+        return 0
+    pipettes = resolve_pipettes(protocol_settings)
+    return PIPETTE_MIN_VOLUMES[pipettes["large_multi"] if protocol_settings.get("multichannel") else pipettes["large"]]
+
+def find_part_errors(dna_plate_map_dict, combinations_to_make):
+    """
+    Resolves every part of the combinations against both plate maps.
+
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary.
         combinations_to_make (list): List of combinations.
 
     Returns:
-        str: CSV content as a string.
+        list: Error messages for parts placed more than once and for unknown parts.
     """
-    output_plate_map_flipped = []
-    for i, combo in enumerate(combinations_to_make):
-        name = combo["name"]
-        if i % 2 == 0:
-            output_plate_map_flipped.append([name])
+    placed_parts = Counter(dna_name.strip() for plate_map in dna_plate_map_dict.values() for row in plate_map
+                           for dna_name in row if isinstance(dna_name, str) and dna_name.strip())
+    used_parts = {part for combination in combinations_to_make for part in combination["parts"]}
+
+    errors = []
+    duplicated_parts = sorted(part for part, count in placed_parts.items() if count > 1)
+    if duplicated_parts:
+        errors.append("DNA parts found more than once in the plate maps: " + ", ".join(duplicated_parts))
+    unknown_parts = used_parts - placed_parts.keys()
+    if unknown_parts:
+        first_users = {}
+        for combination in combinations_to_make:
+            for part in unknown_parts.intersection(combination["parts"]):
+                first_users.setdefault(part, combination["name"])
+        errors.append("DNA parts missing from the plate maps: " + ", ".join(
+            f'{part} (used by {first_users[part]})' for part in sorted(unknown_parts)))
+    return errors
+
+def build_resource_ledger(dna_plate_map_dict, combinations_to_make, protocol_settings, plate_capacity=PLATE_CAPACITY):
+    """
+    Computes what the run consumes against what the deck holds.
+
+    DNA is counted over the whole run, as the source plates stay on the deck; buffer, water,
+    competent cells and tips are counted per reaction plate, as the operator refills them at
+    every plate swap.
+
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary, with every part placed once.
+        combinations_to_make (list): List of combinations.
+        protocol_settings (dict): Settings passed to the templates.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        list: Ledger rows with the plate (None for the whole run), resource, location, needed
+        amount and capacity; agar plates have no capacity.
+    """
+    part_volume = protocol_settings["part_volume"]
+    multichannel = protocol_settings.get("multichannel", False)
+    volumes = reaction_volumes(protocol_settings)
+    slots = labware_slots(protocol_settings)
+    cell_disposal_volume = cell_batch_disposal_volume(protocol_settings)
+    ledger = []
+
+    dna_well_index = index_dna_wells(dna_plate_map_dict, protocol_settings)
+    source_labware = dict(zip(dna_plate_map_dict, dna_source_labware(protocol_settings)))
+    part_usage = Counter(part for combination in combinations_to_make for part in combination["parts"])
+    for part, count in sorted(part_usage.items(), key=lambda item: (-item[1], item[0])):
+        source_plate, source_well = dna_well_index[part]
+        num_rows = labware_grid(source_labware[source_plate])[0]
+        well_name = chr(ord("A") + source_well % num_rows) + str(source_well // num_rows + 1)
+        ledger.append({"plate": None, "resource": f"DNA {part} (µL)", "location": f"{source_plate} {well_name}",
+                       "needed": count * part_volume + DNA_DEAD_VOLUME,
+                       "capacity": well_capacity(source_labware[source_plate])})
+
+    transfer_plan = compile_transfer_plan(dna_plate_map_dict, combinations_to_make, protocol_settings, plate_capacity)
+    for plate_index, plate_plan in enumerate(transfer_plan):
+        plate = plate_index + 1
+        num_plate_rxns = len(plate_plan["water_volumes"])
+        if not protocol_settings.get("master_mix"):
+            ledger.append({"plate": plate, "resource": "Buffer (µL)", "location": "A1",
+                           "needed": num_plate_rxns * volumes["buffer"] + TUBE_DEAD_VOLUME,
+                           "capacity": TUBE_MAX_VOLUME})
+            ledger.append({"plate": plate, "resource": "Water (µL)", "location": "B1",
+                           "needed": sum(plate_plan["water_volumes"]) + TUBE_DEAD_VOLUME,
+                           "capacity": TUBE_MAX_VOLUME})
+
+        if multichannel:
+            num_plate_columns = math.ceil(num_plate_rxns / PLATE_ROWS)
+            ledger.append({"plate": plate, "resource": "Competent cells (µL)", "location": "reservoir well 1",
+                           "needed": (num_plate_columns * PLATE_ROWS * volumes["cells"] + CELL_RESERVOIR_DEAD_VOLUME
+                                      + cell_disposal_volume * PLATE_ROWS),
+                           "capacity": CELL_RESERVOIR_CAPACITY})
         else:
-            output_plate_map_flipped[-1].append(name)
+            cell_tubes = protocol_settings.get("cell_tubes", CELL_TUBES[:1])
+            # Same split as the templates: reaction i takes cells from tube i * tubes // reactions
+            reactions_per_tube = Counter(i * len(cell_tubes) // num_plate_rxns for i in range(num_plate_rxns))
+            for tube_index, tube in enumerate(cell_tubes):
+                ledger.append({"plate": plate, "resource": "Competent cells (µL)", "location": tube,
+                               "needed": (reactions_per_tube[tube_index] * volumes["cells"] + TUBE_DEAD_VOLUME
+                                          + cell_disposal_volume),
+                               "capacity": TUBE_MAX_VOLUME})
 
-    output_plate_map = []
-    for i, row in enumerate(output_plate_map_flipped):
-        for j, element in enumerate(row):
-            if j >= len(output_plate_map):
-                output_plate_map.append([element])
-            else:
-                output_plate_map[j].append(element)
+        # One 10ul tip for the buffer and water, plus one per part transfer that takes a new tip
+        ledger.append({"plate": plate, "resource": "10ul tips", "location": f"slot {slots['tips_small']}",
+                       "needed": 1 + sum(transfer[4] == "new_tip" for transfer in plate_plan["part_transfers"]),
+                       "capacity": TIP_RACK_CAPACITY})
+        # Each 300ul tip adds cells to one reaction (or column) and plates it
+        ledger.append({"plate": plate, "resource": "300ul tips", "location": f"slot {slots['tips_large']}",
+                       "needed": math.ceil(num_plate_rxns / PLATE_ROWS) * PLATE_ROWS if multichannel else num_plate_rxns,
+                       "capacity": TIP_RACK_CAPACITY})
 
-    csv_buffer = io.StringIO()
-    writer = csv.writer(csv_buffer)
-    for row in output_plate_map:
-        writer.writerow(row)
+        plating_summary = summarise_plating(num_plate_rxns, protocol_settings["plating"], multichannel, plate_capacity)
+        ledger.append({"plate": plate, "resource": "Agar plates",
+                       "location": "slot " + ", ".join(protocol_settings["plating"]["slots"]),
+                       "needed": plating_summary["agar_plates"], "capacity": None})
+    return ledger
 
-    return csv_buffer.getvalue()
+def run_preflight_checks(dna_plate_map_dict, combinations_to_make, protocol_settings, plate_capacity=PLATE_CAPACITY):
+    """
+    Validates a job before generation: parts, tube assignments and every consumable against its capacity.
 
-def create_protocol(dna_plate_map_dict, combinations_to_make, protocol_template_file):
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary.
+        combinations_to_make (list): List of combinations.
+        protocol_settings (dict): Settings passed to the templates.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        dict: Blocking errors, and the resource ledger as returned by build_resource_ledger
+        (empty if parts could not be resolved).
+    """
+    errors = find_part_errors(dna_plate_map_dict, combinations_to_make)
+    if errors:
+        return {"errors": errors, "ledger": []}
+
+    shared_tubes = set(protocol_settings.get("master_mix", {}).values()).intersection(protocol_settings.get("cell_tubes", []))
+    if shared_tubes:
+        errors.append(f"Aluminium block well(s) {', '.join(sorted(shared_tubes))} would hold both a master mix "
+                      f"and competent cells; use fewer part counts or split the job.")
+
+    ledger = build_resource_ledger(dna_plate_map_dict, combinations_to_make, protocol_settings, plate_capacity)
+    for row in ledger:
+        if row["capacity"] is not None and row["needed"] > row["capacity"]:
+            plate = f"Reaction plate {row['plate']}: " if row["plate"] else ""
+            errors.append(f"{plate}{row['resource']} in {row['location']} needs {row['needed']:g}, "
+                          f"more than the {row['capacity']:g} available.")
+    return {"errors": errors, "ledger": ledger}
+
+def create_plate_map_files(combinations_to_make):
+    """
+    Exports the reaction plate maps of a job in every format.
+
+    Args:
+        combinations_to_make (list): Combinations in reaction well order.
+
+    Returns:
+        dict: File contents by file name: the plate grids as CSV and JSON, and one row per well.
+    """
+    plate_maps = build_plate_maps(combinations_to_make)
+    return {
+        "plate_map.csv": export_plate_maps_csv(plate_maps),
+        "plate_map.json": export_plate_maps_json(plate_maps),
+        "plate_map_long.csv": export_plate_maps_long(combinations_to_make),
+    }
+
+def create_protocol(dna_plate_map_dict, combinations_to_make, protocol_template_file, protocol_settings=None,
+                    precompile_plan=False):
     """
     Generates a protocol file based on inputs and a template.
 
@@ -122,19 +442,407 @@ def create_protocol(dna_plate_map_dict, combinations_to_make, protocol_template_
         dna_plate_map_dict (dict): Plate map dictionary.
         combinations_to_make (list): List of combinations.
         protocol_template_file (UploadedFile): Template file uploaded by the user.
+        protocol_settings (dict): Settings planned by the generator and read by the template.
+        precompile_plan (bool): Compile the liquid-handling plan offline, ordered for short gantry travel,
+            so the robot only replays it.
 
     Returns:
         str: The complete protocol as a string.
+
+    Raises:
+        ValueError: If the template is invalid, or does not read or accept the settings.
     """
-    # Read the contents of the uploaded template file
-    template_string = protocol_template_file.getvalue().decode("utf-8")
+    # The template is checked and analysed once per distinct file, so each job only costs the substitution
+    compiled_template = get_compiled_template(protocol_template_file.getvalue())
 
-    # Append the plate map and combination data at the start of the protocol
-    protocol_string = 'dna_plate_map_dict = ' + json.dumps(dna_plate_map_dict) + '\n\n'
-    protocol_string += 'combinations_to_make = ' + json.dumps(combinations_to_make) + '\n\n'
-    protocol_string += template_string  # Append the existing template content
+    protocol_settings = dict(protocol_settings or {})
+    if precompile_plan:
+        transfer_plan = compile_transfer_plan(dna_plate_map_dict, combinations_to_make, protocol_settings)
+        protocol_settings["transfer_plan"] = optimise_transfer_order(transfer_plan, list(dna_plate_map_dict),
+                                                                     protocol_settings)
 
-    return protocol_string
+    # The plate map, combination data and settings are set before the template content
+    return compiled_template.render(dna_plate_map_dict, combinations_to_make, protocol_settings)
+
+def plate_protocol_settings(protocol_settings, plate_index):
+    """
+    Returns the settings of the protocol of a single reaction plate, keeping only its own GG program.
+    """
+    if not protocol_settings or "gg_programs" not in protocol_settings:
+        return protocol_settings
+    return dict(protocol_settings, gg_programs=[protocol_settings["gg_programs"][plate_index]])
+
+def create_shard_archive(dna_plate_map_dict, shards, protocol_template_file, protocol_settings=None,
+                         precompile_plan=False, progress_callback=None):
+    """
+    Creates a ZIP archive with one protocol and its plate map files per reaction plate.
+
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary.
+        shards (list): Combinations split per reaction plate.
+        protocol_template_file (UploadedFile): Template file uploaded by the user.
+        protocol_settings (dict): Settings planned by the generator and read by the template.
+        precompile_plan (bool): Compile the liquid-handling plan offline, so the robot only replays it.
+        progress_callback (callable): Called with the number of plates done and the total.
+
+    Returns:
+        bytes: The ZIP archive content.
+    """
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for plate_index, shard in enumerate(shards):
+            check_number_of_combinations(shard)
+            archive.writestr(f"plate_{plate_index + 1}/protocol.py",
+                             create_protocol(dna_plate_map_dict, shard, protocol_template_file,
+                                             plate_protocol_settings(protocol_settings, plate_index), precompile_plan))
+            for file_name, content in create_plate_map_files(shard).items():
+                archive.writestr(f"plate_{plate_index + 1}/{file_name}", content)
+            if progress_callback:
+                progress_callback(plate_index + 1, len(shards))
+    return zip_buffer.getvalue()
+
+def build_outputs(dna_plate_map_dict, combinations_to_make, template_parameters=None, part_volume=1, cost_model=None,
+                  multichannel=False, master_mix=False, pipelined=False, plating=None, adapt_programs=False,
+                  assigned_programs=None, instrument=False, cell_batch_size=None):
+    """
+    Plans the reaction plates, part transfers and settings of a job, and runs the pre-flight checks.
+
+    The protocols are then rendered from the returned shards and settings with create_protocol.
+
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary.
+        combinations_to_make (list): List of combinations.
+        template_parameters (dict): Labware, slots, pipettes, volumes and heat shock program replacing
+            the defaults of the template.
+        part_volume (float): Volume of each part added to a reaction, in µL.
+        cost_model (dict): Seconds charged per tip change, tip and wash, defaulting to DEFAULT_COST_MODEL.
+        multichannel (bool): Add competent cells and plate with an 8-channel p300, one column at a time.
+        master_mix (bool): Premix buffer and water per part count.
+        pipelined (bool): In a single multi-plate protocol, set up the next plate while the current one cycles.
+        plating (str): Key of PLATING_CONFIGURATIONS, defaulting to the configuration of the loaded p300.
+        adapt_programs (bool): Group simple assemblies on plates running a shorter GG program.
+        assigned_programs (dict): GG program name by combination name; implies adapt_programs.
+        instrument (bool): Add timestamped step markers to the protocol, for analysing its run logs.
+        cell_batch_size (int): Wells (or columns) multi-dispensed competent cells per tip, or None to add
+            them one by one.
+
+    Returns:
+        dict: The combinations in reaction well order, their shards per reaction plate, the GG program plan
+        (None if programs are not adapted), the part distribution and master mix plans (None without
+        master mix), the protocol settings and the pre-flight checks.
+    """
+    template_parameters = template_parameters or {}
+
+    # Split jobs larger than one reaction plate, keeping combinations that share parts together
+    shards = [combinations_to_make]
+    program_plan = None
+    if adapt_programs or assigned_programs:
+        # Group combinations by GG program, so plates of simple assemblies run a shorter program
+        program_plan = plan_gg_programs(combinations_to_make, assigned_programs)
+        shards = program_plan["shards"]
+    elif len(combinations_to_make) > PLATE_CAPACITY:
+        shards = shard_combinations(combinations_to_make)
+
+    # Lay out the reactions of each plate column-wise for the 8-channel pipette
+    if multichannel:
+        shards = [plan_reaction_layout(shard) for shard in shards]
+    combinations_to_make = [combination for shard in shards for combination in shard]
+
+    # Plan the part transfers with the small pipette of the template parameters
+    small_pipette = resolve_pipettes(template_parameters)["small"]
+    volumes = reaction_volumes(template_parameters)
+    distribution_plan = plan_part_distribution(combinations_to_make, pipette=small_pipette, part_volume=part_volume,
+                                               cost_model=cost_model, reaction_volume=volumes["reaction"],
+                                               buffer_volume=volumes["buffer"])
+    protocol_settings = {
+        "part_volume": distribution_plan["part_volume"],
+        "tip_action": distribution_plan["tip_action"],
+        "multichannel": multichannel,
+        "pipelined": pipelined and not multichannel,
+        "instrument": instrument,
+        "cell_batch_size": cell_batch_size,
+    }
+    protocol_settings.update(template_parameters)
+    if program_plan:
+        protocol_settings["gg_programs"] = [GG_PROGRAMS[program_name] for program_name in program_plan["programs"]]
+    if plating is None:
+        plating = DEFAULT_MULTICHANNEL_PLATING_CONFIGURATION if multichannel else DEFAULT_PLATING_CONFIGURATION
+    agar_slots = available_agar_slots(multichannel, protocol_settings["pipelined"],
+                                      labware_slots(protocol_settings).values())
+    protocol_settings["plating"] = plating_settings(plating, agar_slots, multichannel)
+    master_mix_plan = None
+    if master_mix:
+        master_mix_plan = plan_master_mix(combinations_to_make, part_volume=distribution_plan["part_volume"],
+                                          pipette=small_pipette, reaction_volume=volumes["reaction"],
+                                          buffer_volume=volumes["buffer"])
+        protocol_settings["master_mix"] = master_mix_plan["tubes"]
+    if not multichannel:
+        protocol_settings["cell_tubes"] = assign_cell_tubes(
+            max(len(shard) for shard in shards), cell_volume=volumes["cells"],
+            disposal_volume=cell_batch_disposal_volume(protocol_settings))
+
+    return {
+        "combinations": combinations_to_make,
+        "shards": shards,
+        "program_plan": program_plan,
+        "distribution_plan": distribution_plan,
+        "master_mix_plan": master_mix_plan,
+        "protocol_settings": protocol_settings,
+        "preflight": run_preflight_checks(dna_plate_map_dict, combinations_to_make, protocol_settings),
+    }
+
+def display_distribution_plan(distribution_plan):
+    """
+    Displays the planned tips, washes and aspirate cycles of the part transfers.
+
+    Args:
+        distribution_plan (dict): Plan as returned by plan_part_distribution.
+    """
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Tips used (p10)", distribution_plan["tips"])
+    col2.metric("Tip washes", distribution_plan["washes"])
+    col3.metric("Aspirate cycles", distribution_plan["aspirate_cycles"])
+    st.caption(
+        f"Up to {distribution_plan['wells_per_aspirate']} wells per aspiration of {distribution_plan['part_volume']} µL; "
+        f"tips are {'washed' if distribution_plan['tip_action'] == 'wash' else 'swapped'} between aspirations of a part."
+    )
+
+def display_master_mix_plan(master_mix_plan):
+    """
+    Displays the premixed buffer and water tubes the operator loads before each plate.
+
+    Args:
+        master_mix_plan (dict): Plan as returned by plan_master_mix.
+    """
+    st.subheader("Master mix loading sheet")
+    st.dataframe(pd.DataFrame(master_mix_plan["loading_sheet"]))
+    st.download_button("Download Master Mix Loading Sheet", data=export_loading_sheet(master_mix_plan),
+                       file_name="master_mix.csv", mime="text/csv")
+
+def display_source_layout(source_layout):
+    """
+    Displays the automatic placement of the customised parts, with its plate maps and loading sheet.
+
+    Args:
+        source_layout (dict): Layout as returned by plan_source_layout.
+    """
+    st.subheader("Customised parts layout")
+    if source_layout["spilled"]:
+        st.warning("The tube rack is full; some parts go into empty wells of the Moclo plate. "
+                   "Use the updated Moclo map below.")
+    st.table(pd.DataFrame(source_layout["placements"]))
+    col1, col2, col3 = st.columns(3)
+    col1.download_button("Download Customised Parts Map", data=export_plate_map(source_layout["customised_map"]),
+                         file_name="customised_input_dna_map.csv", mime="text/csv")
+    col2.download_button("Download Loading Sheet", data=export_source_loading_sheet(source_layout),
+                         file_name="source_loading.csv", mime="text/csv")
+    if source_layout["spilled"]:
+        col3.download_button("Download Updated Moclo Map", data=export_plate_map(source_layout["fixed_map"]),
+                             file_name="fixed_input_dna_map.csv", mime="text/csv")
+
+def display_preflight(preflight):
+    """
+    Displays the resource ledger of a job and any errors blocking its generation.
+
+    Args:
+        preflight (dict): Report as returned by run_preflight_checks.
+    """
+    for error in preflight["errors"]:
+        st.error(error)
+    if preflight["ledger"]:
+        with st.expander("Resource ledger"):
+            st.dataframe(pd.DataFrame(preflight["ledger"], columns=LEDGER_COLUMNS))
+
+def estimate_run(protocol_string):
+    """
+    Simulates the generated protocol offline.
+
+    Args:
+        protocol_string (str): The complete protocol.
+
+    Returns:
+        dict: The simulation report, or a dict with an 'error' message if the protocol would fail.
+    """
+    try:
+        return simulate_protocol(protocol_string)
+    except SimulationError as e:
+        return {"error": str(e)}
+
+def compare_plating_configurations(dna_plate_map_dict, combinations_to_make, protocol_template_file, protocol_settings,
+                                   multichannel=False):
+    """
+    Simulates the protocol of one reaction plate with every usable plating configuration.
+
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary.
+        combinations_to_make (list): Combinations of one reaction plate.
+        protocol_template_file (UploadedFile): Template file uploaded by the user.
+        protocol_settings (dict): Settings planned by the generator, including the plating slots.
+        multichannel (bool): Whether the 8-channel pipette plates whole columns.
+
+    Returns:
+        list: One row per configuration with the agar plates, pauses and simulated plating time.
+    """
+    rows = []
+    for configuration_name in plating_configurations(multichannel):
+        settings = plating_settings(configuration_name, protocol_settings["plating"]["slots"], multichannel)
+        report = estimate_run(create_protocol(dna_plate_map_dict, combinations_to_make, protocol_template_file,
+                                              dict(protocol_settings, plating=settings)))
+        summary = summarise_plating(len(combinations_to_make), settings, multichannel)
+        rows.append({
+            "Configuration": configuration_name,
+            "Agar plates": summary["agar_plates"],
+            "Agar plate changes": summary["plate_change_pauses"],
+            "Plating time": (format_duration(report["phase_seconds"].get("plating", 0.0))
+                             if "error" not in report else "fails: " + report["error"]),
+            "Total pauses": len(report["pauses"]) if "error" not in report else None,
+        })
+    return rows
+
+def display_run_estimate(report):
+    """
+    Displays the predicted run time of the generated protocol.
+
+    Args:
+        report (dict): Report as returned by estimate_run.
+    """
+    if "error" in report:
+        st.warning(f"The protocol would fail on the robot: {report['error']}")
+        return
+
+    st.subheader(f"Estimated run time: {format_duration(report['total_seconds'])}")
+    st.table(pd.DataFrame(
+        [(phase, format_duration(seconds)) for phase, seconds in report["phase_seconds"].items()],
+        columns=["Phase", "Estimated time"]
+    ))
+    st.caption(
+        f"Gantry travel {report['travel_mm'] / 1000:.1f} m, {report['tips']} tips, "
+        f"{len(report['pauses'])} operator pauses."
+    )
+    if report["cell_addition_spans"]:
+        st.caption(f"Competent cells reach the last well of a plate at most "
+                   f"{max(report['cell_addition_spans']):.0f} s after the first.")
+
+def display_schedule(comparison):
+    """
+    Displays the makespan of pipelined reaction plates against running them back to back.
+
+    Args:
+        comparison (dict): Comparison as returned by compare_schedules.
+    """
+    st.subheader("Plate schedule")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Back to back", format_duration(comparison["back_to_back_seconds"]))
+    col2.metric("Pipelined", format_duration(comparison["pipelined_seconds"]))
+    col3.metric("Saved", format_duration(comparison["saved_seconds"]))
+    st.table(pd.DataFrame(
+        [(entry["plate"], entry["phase"], format_duration(entry["start_seconds"]), format_duration(entry["end_seconds"]))
+         for entry in comparison["timeline"] if entry["end_seconds"] > entry["start_seconds"]],
+        columns=["Plate", "Phase", "Start", "End"]
+    ))
+
+def display_run_log_analysis():
+    """
+    Compares the run logs of an instrumented protocol with its simulated step durations.
+    """
+    st.header("Run log analysis")
+    with st.expander("Compare robot run logs with the estimate"):
+        protocol_file = st.file_uploader("Upload instrumented protocol", type=["py"], key="instrumented_protocol")
+        log_files = st.file_uploader("Upload run logs", type=["json", "txt", "log"], accept_multiple_files=True)
+        by_step = st.checkbox("Report every step instead of each kind of step", value=False)
+        if not (protocol_file and log_files):
+            return
+        try:
+            rows = analyse_run_logs(protocol_file.getvalue().decode("utf-8"),
+                                    [log_file.getvalue().decode("utf-8") for log_file in log_files],
+                                    by_kind=not by_step)
+        except (SimulationError, ValueError) as e:
+            st.warning(f"The run logs cannot be analysed: {e}")
+            return
+        st.caption("Steps running longest over their estimate come first.")
+        st.table(pd.DataFrame(rows))
+        st.download_button("Download Step Timings", data=export_summary_csv(rows), file_name="step_timings.csv")
+
+@st.cache_resource
+def get_generation_cache():
+    """
+    Returns the cache of parsed inputs and generated outputs shared by all sessions.
+    """
+    return LRUCache(CACHE_MAX_ENTRIES)
+
+def run_in_background(label, task):
+    """
+    Runs a generation task in a worker thread while showing a spinner.
+
+    A progress bar is added once the task reports progress, so tasks without intermediate
+    steps never show a bar that stands still.
+
+    Args:
+        label (str): Text shown next to the spinner and progress bar.
+        task (callable): Called with a progress callback taking the work done and the total.
+
+    Returns:
+        The result of the task.
+    """
+    progress = {"done": 0, "total": None}
+
+    def report_progress(done, total):
+        progress.update(done=done, total=total)
+
+    progress_bar = None
+    with st.spinner(label), ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(task, report_progress)
+        while not future.done():
+            if progress["total"]:
+                fraction = min(progress["done"] / progress["total"], 1.0)
+                text = f"{label}: {progress['done']} of {progress['total']}"
+                if progress_bar is None:
+                    progress_bar = st.progress(fraction, text=text)
+                else:
+                    progress_bar.progress(fraction, text=text)
+            time.sleep(0.05)
+    if progress_bar is not None:
+        progress_bar.empty()
+    return future.result()
+
+def display_transfer_plan(cache, protocol_key, dna_plate_map_dict, combinations_to_make, protocol_settings):
+    """
+    Displays the gantry travel saved by the precompiled transfer plan, and a download button
+    for the plan as diffable JSON.
+
+    Args:
+        cache (LRUCache): Cache of generated outputs.
+        protocol_key (tuple): Cache key of the protocol the plan belongs to.
+        dna_plate_map_dict (dict): Plate map dictionary.
+        combinations_to_make (list): List of combinations.
+        protocol_settings (dict): Settings planned by the generator.
+    """
+    def compile_plan():
+        transfer_plan = compile_transfer_plan(dna_plate_map_dict, combinations_to_make, protocol_settings)
+        optimised_plan = optimise_transfer_order(transfer_plan, list(dna_plate_map_dict), protocol_settings)
+        return (export_transfer_plan(optimised_plan),
+                summarise_travel(transfer_plan, optimised_plan, list(dna_plate_map_dict), protocol_settings))
+
+    transfer_plan_json, travel_summary = cache.get_or_compute(("transfer_plan",) + protocol_key, compile_plan)
+    st.caption(
+        f"Part transfers reordered for gantry travel: {travel_summary['optimised_mm'] / 1000:.1f} m instead of "
+        f"{travel_summary['naive_mm'] / 1000:.1f} m ({travel_summary['saved_mm'] / 1000:.1f} m saved)."
+    )
+    st.download_button("Download Transfer Plan", data=transfer_plan_json, file_name="transfer_plan.json",
+                       mime="application/json")
+
+def display_plate_map_downloads(plate_map_files):
+    """
+    Displays a download button for every plate map file.
+
+    Args:
+        plate_map_files (dict): File contents by file name, as returned by create_plate_map_files.
+    """
+    labels = {"plate_map.csv": "Download Plate Map CSV", "plate_map.json": "Download Plate Map JSON",
+              "plate_map_long.csv": "Download Plate Map (one row per well)"}
+    for file_name, content in plate_map_files.items():
+        mime = "application/json" if file_name.endswith(".json") else "text/csv"
+        st.download_button(labels[file_name], data=content, file_name=file_name, mime=mime)
 
 def create_download_button(file_path, label, file_name):
     """
@@ -181,6 +889,8 @@ def main():
              "customised_input_dna_map_template.csv"),
             ('template_files/combination-to-make.csv', "combinations_template",
              "combination-to-make.csv"),
+            ('template_files/combinatorial_library.csv', "combinatorial_library_template",
+             "combinatorial_library.csv"),
             ('template_files/template_BsmbI_moclo_protocol_EP_tubes.py', "opentrons_protocol_template",
              "template_BsmbI_moclo_protocol_EP_tubes.py"),
         ]
@@ -191,42 +901,293 @@ def main():
     st.header("Input Files")
     col1, col2 = st.columns(2)
     moclo_plate_map_file = col1.file_uploader("Upload Moclo parts map", type=["csv"])
-    customised_plate_map_file = col2.file_uploader("Upload customised parts map", type=["csv"])
+    auto_layout = col2.checkbox("Lay out customised parts automatically", value=False,
+                                help="Parts missing from the Moclo map are placed on the tube rack where their "
+                                     "transfers travel least, instead of uploading a customised parts map.")
+    customised_plate_map_file = None if auto_layout else col2.file_uploader("Upload customised parts map",
+                                                                            type=["csv"])
 
     col3, col4 = st.columns(2)
-    combinations_file = col3.file_uploader("Upload assembly-info file", type=["csv"])
+    library_mode = col3.radio("Assembly input", ["Assembly-info file", "Combinatorial library"],
+                              help="A combinatorial library lists the candidate parts of each MoClo position, "
+                                   "one row per position; every combination of them is assembled.")
+    if library_mode == "Combinatorial library":
+        combinations_file = col3.file_uploader("Upload combinatorial library file", type=["csv"])
+        library_sample_size = col3.number_input("Designs to sample (0 for all)", min_value=0, value=0, step=1)
+        library_seed = col3.number_input("Sampling seed", min_value=0, value=0, step=1)
+    else:
+        combinations_file = col3.file_uploader("Upload assembly-info file", type=["csv"])
     protocol_template_file = col4.file_uploader("Upload protocol template file", type=["py"])
+    program_file = st.file_uploader("Upload GG program per combination (optional)", type=["csv"],
+                                    help=f"One row per combination: name, then one of {', '.join(GG_PROGRAMS)}.")
+    parameters_file = st.file_uploader("Upload template parameters (optional)", type=["json"],
+                                       help="Labware, slots, pipettes, volumes and heat shock program replacing "
+                                            "the defaults of the template.")
 
     # Protocol generation section
     st.header("Protocol generation")
+    with st.expander("Part transfer settings"):
+        part_volume = st.number_input("Volume per part (µL)", min_value=0.5, max_value=8.0, value=1.0, step=0.5)
+        col5, col6, col7 = st.columns(3)
+        cost_model = {
+            "tip_change_seconds": col5.number_input(
+                "Tip change time (s)", min_value=0.0, value=DEFAULT_COST_MODEL["tip_change_seconds"]),
+            "tip_price_seconds": col6.number_input(
+                "Tip price (s of run time)", min_value=0.0, value=DEFAULT_COST_MODEL["tip_price_seconds"]),
+            "wash_seconds": col7.number_input(
+                "Tip wash time (s)", min_value=0.0, value=DEFAULT_COST_MODEL["wash_seconds"]),
+        }
+        precompile_plan = st.checkbox("Precompile the liquid-handling plan", value=True,
+                                      help="The robot replays the plan instead of computing it at run time.")
+        multichannel = st.checkbox("Use an 8-channel p300 for competent cells and plating", value=False,
+                                   help="Replaces the p300 single with a p300 multi on the left mount, takes the cells "
+                                        "from a reservoir in slot 9 and spots onto a 96 well agar plate.")
+        use_master_mix = st.checkbox("Premix buffer and water per part count", value=False,
+                                     help="Reactions with the same number of parts are served from one premixed "
+                                          "tube by multi-dispensing, instead of buffer and water separately.")
+        pipelined = st.checkbox("Set up the next reaction plate during GG cycling", value=False,
+                                help="For single protocols over several plates: the next plate is set up in slot 9 "
+                                     "while the current one cycles. Not available with the 8-channel p300.")
+        adapt_programs = st.checkbox("Adapt the GG program to assembly complexity", value=False,
+                                     help="Simple assemblies are grouped on their own plates with a shorter program. "
+                                          "Always on when GG programs are uploaded.")
+        plating_configuration = st.selectbox(
+            "Agar plates", plating_configurations(multichannel),
+            help="Agar plates are loaded on every free deck slot, so fewer plate changes are needed.")
+        instrument = st.checkbox("Instrument the protocol with step timing markers", value=False,
+                                 help="Adds timestamped comments around each step, so the run logs can be "
+                                      "compared with the estimate under Run log analysis.")
+        batch_cells = st.checkbox("Batch the competent cell addition", value=False,
+                                  help="Cells are multi-dispensed from a chilled tube to several wells (or columns) "
+                                       "per tip, so every well of a plate receives them within a short span. "
+                                       "They are mixed into the reactions at plating.")
+        cell_batch_size = (st.number_input("Wells (or columns) per tip", min_value=1, max_value=96, value=5)
+                           if batch_cells else None)
     if st.button("Process Data"):
         st.session_state.process_data = all([
-            moclo_plate_map_file, customised_plate_map_file, combinations_file, protocol_template_file
+            moclo_plate_map_file, customised_plate_map_file or auto_layout, combinations_file, protocol_template_file
         ])
 
     if st.session_state.process_data:
         try:
-            # Read uploaded files into DataFrames
-            fixed_plate_map_df = pd.read_csv(moclo_plate_map_file, header=None)
-            customised_plate_map_df = pd.read_csv(customised_plate_map_file, header=None)
-            combinations_df = pd.read_csv(combinations_file, header=None)
+            # Unchanged uploads are looked up by the hash of their content instead of being parsed again
+            cache = get_generation_cache()
+            fixed_digest = file_digest(moclo_plate_map_file.getvalue())
+            combinations_digest = file_digest(combinations_file.getvalue())
+            template_digest = file_digest(protocol_template_file.getvalue())
 
             # Process input data
-            dna_plate_map_dict = generate_plate_maps(fixed_plate_map_df, customised_plate_map_df)
-            combinations_to_make = generate_combinations(combinations_df)
-            check_number_of_combinations(combinations_to_make)
+            if not auto_layout:
+                customised_digest = file_digest(customised_plate_map_file.getvalue())
+                dna_plate_map_dict = cache.get_or_compute(
+                    ("plate_maps", fixed_digest, customised_digest),
+                    lambda: generate_plate_maps(
+                        read_plate_map_csv(io.BytesIO(moclo_plate_map_file.getvalue())),
+                        read_plate_map_csv(io.BytesIO(customised_plate_map_file.getvalue())))
+                )
+            if library_mode == "Combinatorial library":
+                # Designs are streamed from the library straight into a list of combinations
+                library = cache.get_or_compute(("library", combinations_digest),
+                                               lambda: read_library_csv(io.BytesIO(combinations_file.getvalue())))
+                num_designs = cache.get_or_compute(("library_designs", combinations_digest),
+                                                   lambda: count_designs(library))
+                combinations_digest = (combinations_digest, library_sample_size, library_seed)
+                combinations_to_make = cache.get_or_compute(
+                    ("combinations", combinations_digest),
+                    lambda: run_in_background(
+                        "Expanding the library",
+                        lambda progress: list(expand_library(library, library_sample_size or None, library_seed)))
+                )
+                st.info(f"{len(combinations_to_make)} designs kept out of {num_designs} in the library.")
+                st.download_button("Download Assembly Info CSV", data=export_assembly_info(combinations_to_make),
+                                   file_name="combination-to-make.csv", mime="text/csv")
+            else:
+                combinations_to_make = cache.get_or_compute(
+                    ("combinations", combinations_digest),
+                    lambda: run_in_background(
+                        "Reading assembly info",
+                        lambda progress: list(read_combinations_csv(io.BytesIO(combinations_file.getvalue()))))
+                )
+
+            parameters_digest = file_digest(parameters_file.getvalue()) if parameters_file else None
+            template_parameters = cache.get_or_compute(
+                ("template_parameters", parameters_digest),
+                lambda: read_template_parameters(io.BytesIO(parameters_file.getvalue())) if parameters_file else {}
+            )
+
+            # Place the parts missing from the Moclo map, now that their use is known
+            if auto_layout:
+                # Laid out for the tip action the part transfers will use under the chosen cost model
+                tip_action = choose_tip_action(cost_model)
+                # The layout is determined by its inputs, so their digests identify it in the output keys
+                customised_digest = (combinations_digest, parameters_digest, tip_action, part_volume)
+                source_layout = cache.get_or_compute(
+                    ("source_layout", fixed_digest) + customised_digest,
+                    lambda: plan_source_layout(
+                        process_plate_map_df(read_plate_map_csv(io.BytesIO(moclo_plate_map_file.getvalue()))),
+                        combinations_to_make, dict(template_parameters, tip_action=tip_action), part_volume,
+                        DNA_DEAD_VOLUME)
+                )
+                dna_plate_map_dict = {DNA_PLATE_NAME: source_layout["fixed_map"],
+                                      DNA_TUBES_NAME: source_layout["customised_map"]}
+                display_source_layout(source_layout)
+
+            # Plan the reaction plates, part transfers and settings, and check parts and consumables
+            programs_digest = file_digest(program_file.getvalue()) if program_file else None
+            inputs_key = (fixed_digest, customised_digest, combinations_digest, multichannel, adapt_programs,
+                          programs_digest)
+            outputs = cache.get_or_compute(
+                ("outputs",) + inputs_key + (parameters_digest, part_volume, tuple(sorted(cost_model.items())),
+                                             use_master_mix, pipelined, plating_configuration, instrument,
+                                             cell_batch_size),
+                lambda: run_in_background("Planning reaction plates", lambda progress: build_outputs(
+                    dna_plate_map_dict, combinations_to_make, template_parameters, part_volume, cost_model,
+                    multichannel, use_master_mix, pipelined, plating_configuration, adapt_programs,
+                    read_program_assignments_csv(io.BytesIO(program_file.getvalue())) if program_file else None,
+                    instrument, cell_batch_size)))
+            combinations_to_make = outputs["combinations"]
+            shards = outputs["shards"]
+            program_plan = outputs["program_plan"]
+            protocol_settings = outputs["protocol_settings"]
+
+            if program_plan:
+                program_summary = (f"GG programs per reaction plate: {', '.join(program_plan['programs'])}; "
+                                   f"{format_duration(program_plan['saved_seconds'])} of thermocycler time saved "
+                                   f"by grouping combinations by program.")
+                if program_plan["added_seconds"]:
+                    program_summary += (f" The assigned programs run {format_duration(program_plan['added_seconds'])} "
+                                        f"longer than the standard program on every plate.")
+                st.info(program_summary)
+            elif len(shards) > 1:
+                shard_summary = summarise_shards(shards)
+                st.info(
+                    f"{len(combinations_to_make)} combinations split over {shard_summary['shards']} reaction plates; "
+                    f"part tubes are visited {shard_summary['part_visits']} times "
+                    f"(at least {shard_summary['min_part_visits']} needed)."
+                )
+            if multichannel:
+                layout_summary = summarise_layout(combinations_to_make)
+                st.info(
+                    f"{layout_summary['columns']} reaction plate columns, {layout_summary['full_columns']} of them full; "
+                    f"{layout_summary['uniform_columns']} full columns hold reactions with the same number of parts."
+                )
+            display_distribution_plan(outputs["distribution_plan"])
+            if outputs["master_mix_plan"]:
+                display_master_mix_plan(outputs["master_mix_plan"])
+            display_preflight(outputs["preflight"])
+            if outputs["preflight"]["errors"]:
+                return
 
-            # Generate outputs
-            output_plate_maps = generate_and_save_output_plate_maps(combinations_to_make)
-            protocol_string = create_protocol(dna_plate_map_dict, combinations_to_make, protocol_template_file)
+            # Outputs depending on the template are keyed on it, so a new template only regenerates the protocol
+            protocol_key = inputs_key + (template_digest,
+                                         file_digest(json.dumps(protocol_settings, sort_keys=True).encode()),
+                                         precompile_plan)
 
-            # Display success message and download buttons
-            st.success("Data processed successfully!")
-            st.download_button("Download Plate Map CSV", data=output_plate_maps, file_name="plate_map.csv", mime="text/csv")
-            st.download_button("Download Protocol", data=protocol_string, file_name="protocol.py")
+            with st.expander("Compare plating configurations"):
+                plating_rows = cache.get_or_compute(
+                    ("plating_comparison",) + protocol_key,
+                    lambda: run_in_background("Comparing plating configurations", lambda progress: (
+                        compare_plating_configurations(dna_plate_map_dict, shards[0], protocol_template_file,
+                                                       protocol_settings, multichannel)))
+                )
+                st.caption(f"Simulated for reaction plate 1, with agar plates in slot(s) "
+                           f"{', '.join(protocol_settings['plating']['slots'])}.")
+                st.table(pd.DataFrame(plating_rows))
+
+            if len(shards) == 1:
+                # Generate outputs
+                plate_map_files = cache.get_or_compute(
+                    ("plate_map_files",) + inputs_key,
+                    lambda: create_plate_map_files(combinations_to_make)
+                )
+                protocol_string = cache.get_or_compute(
+                    ("protocol",) + protocol_key,
+                    lambda: run_in_background(
+                        "Generating protocol",
+                        lambda progress: create_protocol(dna_plate_map_dict, combinations_to_make,
+                                                         protocol_template_file, protocol_settings, precompile_plan))
+                )
+                run_estimate = cache.get_or_compute(
+                    ("run_estimate",) + protocol_key,
+                    lambda: run_in_background("Estimating run time", lambda progress: estimate_run(protocol_string))
+                )
+
+                # Display success message and download buttons
+                st.success("Data processed successfully!")
+                display_run_estimate(run_estimate)
+                display_plate_map_downloads(plate_map_files)
+                st.download_button("Download Protocol", data=protocol_string, file_name="protocol.py")
+                if precompile_plan:
+                    display_transfer_plan(cache, protocol_key, dna_plate_map_dict, combinations_to_make,
+                                          protocol_settings)
+            else:
+                shard_mode = st.radio(
+                    "Output for multiple reaction plates",
+                    ["One protocol per reaction plate", "Single protocol with plate swap pauses"]
+                )
+
+                if shard_mode == "One protocol per reaction plate":
+                    shard_archive = cache.get_or_compute(
+                        ("shard_archive",) + protocol_key,
+                        lambda: run_in_background(
+                            "Generating protocols",
+                            lambda progress: create_shard_archive(dna_plate_map_dict, shards, protocol_template_file,
+                                                                  protocol_settings, precompile_plan, progress))
+                    )
+                    st.success("Data processed successfully!")
+                    st.download_button("Download Protocols and Plate Maps", data=shard_archive,
+                                       file_name="protocols.zip", mime="application/zip")
+                else:
+                    plate_map_files = cache.get_or_compute(
+                        ("plate_map_files",) + inputs_key,
+                        lambda: create_plate_map_files(combinations_to_make)
+                    )
+                    protocol_string = cache.get_or_compute(
+                        ("protocol",) + protocol_key,
+                        lambda: run_in_background(
+                            "Generating protocol",
+                            lambda progress: create_protocol(dna_plate_map_dict, combinations_to_make,
+                                                             protocol_template_file, protocol_settings,
+                                                             precompile_plan))
+                    )
+                    run_estimate = cache.get_or_compute(
+                        ("run_estimate",) + protocol_key,
+                        lambda: run_in_background("Estimating run time",
+                                                  lambda progress: estimate_run(protocol_string))
+                    )
+                    st.success("Data processed successfully!")
+                    display_run_estimate(run_estimate)
+                    if protocol_settings["pipelined"]:
+                        # Each plate is simulated on its own to compare the pipelined run with running them back to back
+                        def estimate_plates(progress):
+                            plate_estimates = []
+                            for plate_index, shard in enumerate(shards):
+                                plate_estimates.append(estimate_run(create_protocol(
+                                    dna_plate_map_dict, shard, protocol_template_file,
+                                    dict(plate_protocol_settings(protocol_settings, plate_index), pipelined=False),
+                                    precompile_plan)))
+                                progress(plate_index + 1, len(shards))
+                            return plate_estimates
+
+                        plate_estimates = cache.get_or_compute(
+                            ("plate_run_estimates",) + protocol_key,
+                            lambda: run_in_background("Scheduling reaction plates", estimate_plates)
+                        )
+                        if not any("error" in estimate for estimate in plate_estimates):
+                            hold_seconds = ([program_seconds(program_name) for program_name in program_plan["programs"]]
+                                            if program_plan else GG_HOLD_SECONDS)
+                            display_schedule(compare_schedules([estimate["phase_seconds"] for estimate in plate_estimates],
+                                                               hold_seconds))
+                    display_plate_map_downloads(plate_map_files)
+                    st.download_button("Download Protocol", data=protocol_string, file_name="protocol.py")
+                    if precompile_plan:
+                        display_transfer_plan(cache, protocol_key, dna_plate_map_dict, combinations_to_make,
+                                              protocol_settings)
 
         except Exception as e:
             st.error(f"An error occurred: {e}")
 
+    display_run_log_analysis()
+
 if __name__ == "__main__":
     main()
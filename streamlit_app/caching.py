@@ -0,0 +1,62 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Bounded in-memory cache for parsed inputs and generated outputs, keyed on file content hashes
+
+def file_digest(file_bytes):
+    """
+    Hashes the content of an uploaded file.
+
+    Args:
+        file_bytes (bytes): File content.
+
+    Returns:
+        str: SHA-256 hex digest of the content.
+    """
+    return hashlib.sha256(file_bytes).hexdigest()
+
+class LRUCache:
+    """
+    A thread-safe cache holding at most max_entries values, evicting the least recently used first.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for a key, computing and storing it on a miss.
+
+        Args:
+            key (tuple): Hashable cache key, typically built from file digests.
+            compute (callable): Called without arguments to produce the value on a miss.
+
+        Returns:
+            The cached or newly computed value. Callers must not modify it.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        # Computed outside the lock, so a slow job does not block other sessions
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
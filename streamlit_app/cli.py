@@ -0,0 +1,425 @@
+import argparse
+import csv
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app import (DNA_DEAD_VOLUME, build_outputs, create_plate_map_files, create_protocol, estimate_run,
+                 generate_plate_maps, plate_protocol_settings, process_plate_map_df, read_combinations_csv,
+                 read_library_csv, read_plate_map_csv)
+from distribution import choose_tip_action
+from fleet import default_fleet, export_fleet_summary, export_part_loading_sheet, plan_fleet, read_fleet_file
+from library import expand_library, export_assembly_info
+from master_mix import export_loading_sheet
+from plating import PLATING_CONFIGURATIONS
+from source_layout import (DNA_PLATE_NAME, DNA_TUBES_NAME, export_plate_map, export_source_loading_sheet,
+                           plan_source_layout)
+from templates import read_template_parameters
+
+# Headless batch generation of protocols for many jobs, e.g. the submissions queued at a core facility
+
+# File names looked up in each job directory
+JOB_FILE_NAMES = {
+    "fixed_map": "fixed_input_dna_map.csv",
+    "customised_map": "customised_input_dna_map.csv",
+    "combinations": "combination-to-make.csv",
+}
+
+# Optional files of a job directory: a library used instead of the assembly-info file, and template parameters
+LIBRARY_FILE_NAME = "combinatorial_library.csv"
+TEMPLATE_PARAMETERS_FILE_NAME = "template_parameters.json"
+
+MANIFEST_COLUMNS = ["job", "fixed_map", "customised_map", "combinations", "template"]
+
+SUMMARY_COLUMNS = ["job", "status", "combinations", "plates", "p10_tips", "estimated_minutes", "cell_span_seconds",
+                   "output", "error"]
+
+def find_jobs_in_directory(jobs_dir):
+    """
+    Lists the jobs of a directory with one subdirectory per job.
+
+    Each job directory holds the two plate maps and the assembly-info file under the
+    names of JOB_FILE_NAMES, and a single protocol template (.py file). A combinatorial
+    library named LIBRARY_FILE_NAME replaces the assembly-info file, and a file named
+    TEMPLATE_PARAMETERS_FILE_NAME sets the labware, slots, pipettes, volumes and heat shock program.
+    Without a customised parts map, the customised parts are laid out automatically.
+
+    Args:
+        jobs_dir (str): Directory containing one subdirectory per job.
+
+    Returns:
+        list: Jobs as dictionaries with the keys of MANIFEST_COLUMNS.
+
+    Raises:
+        ValueError: If a job directory does not hold exactly one template.
+    """
+    jobs = []
+    for job_name in sorted(os.listdir(jobs_dir)):
+        job_dir = os.path.join(jobs_dir, job_name)
+        if not os.path.isdir(job_dir):
+            continue
+        templates = sorted(name for name in os.listdir(job_dir) if name.endswith(".py"))
+        if len(templates) != 1:
+            raise ValueError(f'Job "{job_name}" must contain exactly one protocol template, found {len(templates)}.')
+        job = {"job": job_name, "template": os.path.join(job_dir, templates[0])}
+        job.update({key: os.path.join(job_dir, file_name) for key, file_name in JOB_FILE_NAMES.items()})
+        if not os.path.isfile(job["customised_map"]):
+            del job["customised_map"]
+        for key, file_name in [("library", LIBRARY_FILE_NAME), ("template_parameters", TEMPLATE_PARAMETERS_FILE_NAME)]:
+            if os.path.isfile(os.path.join(job_dir, file_name)):
+                job[key] = os.path.join(job_dir, file_name)
+        jobs.append(job)
+    return jobs
+
+def read_manifest(manifest_path):
+    """
+    Reads a CSV manifest listing one job per row.
+
+    Paths in the manifest are relative to the manifest's directory. Optional 'library' and
+    'template_parameters' columns give a combinatorial library used instead of the assembly-info
+    file, and a template parameters file. A blank customised map lays the customised parts out
+    automatically.
+
+    Args:
+        manifest_path (str): Manifest CSV with the columns of MANIFEST_COLUMNS.
+
+    Returns:
+        list: Jobs as dictionaries with the keys of MANIFEST_COLUMNS.
+
+    Raises:
+        ValueError: If the manifest lacks one of the columns.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, newline="", encoding="utf-8-sig") as manifest_file:
+        reader = csv.DictReader(manifest_file)
+        missing_columns = [column for column in MANIFEST_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing_columns:
+            raise ValueError(f'Manifest is missing the columns: {", ".join(missing_columns)}.')
+        jobs = []
+        for row in reader:
+            if not row["job"].strip():
+                continue
+            job = {column: row[column].strip() if column == "job" else os.path.join(base_dir, row[column].strip())
+                   for column in MANIFEST_COLUMNS}
+            for column in ["library", "template_parameters"]:
+                if (row.get(column) or "").strip():
+                    job[column] = os.path.join(base_dir, row[column].strip())
+            if not row["customised_map"].strip():
+                del job["customised_map"]
+            jobs.append(job)
+        return jobs
+
+def write_text(path, content):
+    """
+    Writes text to a file, creating its directory.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as output_file:
+        output_file.write(content)
+
+def generate_outputs(dna_plate_map_dict, combinations_to_make, protocol_template_file, template_parameters, output_dir,
+                     part_volume=1, split_plates=False, precompile_plan=True, multichannel=False, master_mix=False,
+                     pipelined=False, plating=None, adapt_programs=False, instrument=False, cell_batch_size=None):
+    """
+    Plans, checks and writes the protocol and plate maps of one robot.
+
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary.
+        combinations_to_make (list): Combinations run on the robot.
+        protocol_template_file (BytesIO): Protocol template.
+        template_parameters (dict): Labware, slots, pipettes, volumes and heat shock program of the robot.
+        output_dir (str): Directory receiving the protocol, plate maps and loading sheets.
+        part_volume (float): Volume of each part added to a reaction, in µL.
+        split_plates (bool): Write one protocol per reaction plate instead of a single multi-plate protocol.
+        precompile_plan (bool): Compile the liquid-handling plan offline, so the robot only replays it.
+        multichannel (bool): Add competent cells and plate with an 8-channel p300, one column at a time.
+        master_mix (bool): Premix buffer and water per part count, and write the loading sheet.
+        pipelined (bool): In a single multi-plate protocol, set up the next plate while the current one cycles.
+        plating (str): Key of PLATING_CONFIGURATIONS, defaulting to the configuration of the loaded p300.
+        adapt_programs (bool): Group simple assemblies on plates running a shorter GG program.
+        instrument (bool): Add timestamped step markers to the protocol, for analysing its run logs.
+        cell_batch_size (int): Wells (or columns) multi-dispensed competent cells per tip, or None to add
+            them one by one.
+
+    Returns:
+        dict: Number of combinations and plates, 10ul tips, estimated run time in seconds and the longest
+        span from the first to the last well receiving competent cells on a plate.
+
+    Raises:
+        ValueError: If the pre-flight checks fail or the protocol would fail on the robot.
+    """
+    outputs = build_outputs(dna_plate_map_dict, combinations_to_make, template_parameters, part_volume,
+                            multichannel=multichannel, master_mix=master_mix, pipelined=pipelined, plating=plating,
+                            adapt_programs=adapt_programs, instrument=instrument, cell_batch_size=cell_batch_size)
+    if outputs["preflight"]["errors"]:
+        raise ValueError("; ".join(outputs["preflight"]["errors"]))
+    combinations_to_make = outputs["combinations"]
+    shards = outputs["shards"]
+    protocol_settings = outputs["protocol_settings"]
+    if outputs["master_mix_plan"]:
+        write_text(os.path.join(output_dir, "master_mix.csv"), export_loading_sheet(outputs["master_mix_plan"]))
+
+    if split_plates and len(shards) > 1:
+        estimated_seconds = 0.0
+        cell_span_seconds = 0.0
+        for plate_index, shard in enumerate(shards):
+            plate_dir = os.path.join(output_dir, f"plate_{plate_index + 1}")
+            protocol_string = create_protocol(dna_plate_map_dict, shard, protocol_template_file,
+                                              plate_protocol_settings(protocol_settings, plate_index),
+                                              precompile_plan)
+            write_text(os.path.join(plate_dir, "protocol.py"), protocol_string)
+            for file_name, content in create_plate_map_files(shard).items():
+                write_text(os.path.join(plate_dir, file_name), content)
+            run_estimate = estimate_run(protocol_string)
+            if "error" in run_estimate:
+                raise ValueError(f"Plate {plate_index + 1}: {run_estimate['error']}")
+            estimated_seconds += run_estimate["total_seconds"]
+            cell_span_seconds = max([cell_span_seconds] + run_estimate["cell_addition_spans"])
+    else:
+        protocol_string = create_protocol(dna_plate_map_dict, combinations_to_make, protocol_template_file,
+                                          protocol_settings, precompile_plan)
+        write_text(os.path.join(output_dir, "protocol.py"), protocol_string)
+        for file_name, content in create_plate_map_files(combinations_to_make).items():
+            write_text(os.path.join(output_dir, file_name), content)
+        run_estimate = estimate_run(protocol_string)
+        if "error" in run_estimate:
+            raise ValueError(run_estimate["error"])
+        estimated_seconds = run_estimate["total_seconds"]
+        cell_span_seconds = max(run_estimate["cell_addition_spans"], default=0.0)
+
+    return {
+        "combinations": len(combinations_to_make),
+        "plates": len(shards),
+        "p10_tips": outputs["distribution_plan"]["tips"],
+        "estimated_seconds": estimated_seconds,
+        "cell_span_seconds": cell_span_seconds,
+    }
+
+def merge_template_parameters(job_parameters, robot_parameters):
+    """
+    Applies the deck configuration of a robot over the template parameters of a job.
+
+    Dictionaries such as the slots are merged key by key, so a robot only lists what differs.
+    """
+    merged = dict(job_parameters)
+    for name, value in robot_parameters.items():
+        merged[name] = dict(merged.get(name, {}), **value) if isinstance(value, dict) else value
+    return merged
+
+def generate_job(job, output_dir, part_volume=1, split_plates=False, precompile_plan=True, multichannel=False,
+                 master_mix=False, pipelined=False, plating=None, adapt_programs=False, library_sample_size=None,
+                 library_seed=0, instrument=False, cell_batch_size=None, robots=None):
+    """
+    Generates the protocol and plate map of one job, or of each robot of a fleet sharing the job.
+
+    Args:
+        job (dict): Job as returned by find_jobs_in_directory or read_manifest.
+        output_dir (str): Directory receiving one subdirectory per job.
+        part_volume (float): Volume of each part added to a reaction, in µL.
+        split_plates (bool): Write one protocol per reaction plate instead of a single multi-plate protocol.
+        precompile_plan (bool): Compile the liquid-handling plan offline, so the robot only replays it.
+        multichannel (bool): Add competent cells and plate with an 8-channel p300, one column at a time.
+        master_mix (bool): Premix buffer and water per part count, and write the loading sheet.
+        pipelined (bool): In a single multi-plate protocol, set up the next plate while the current one cycles.
+        plating (str): Key of PLATING_CONFIGURATIONS, defaulting to the configuration of the loaded p300.
+        adapt_programs (bool): Group simple assemblies on plates running a shorter GG program.
+        library_sample_size (int): Designs drawn at random from a combinatorial library, or None for all.
+        library_seed (int): Seed of the library sample.
+        instrument (bool): Add timestamped step markers to the protocol, for analysing its run logs.
+        cell_batch_size (int): Wells (or columns) multi-dispensed competent cells per tip, or None to add
+            them one by one.
+        robots (list): Robots of a fleet, as returned by read_fleet_file or default_fleet; the job is
+            split over them, with one subdirectory and part loading sheet per robot.
+
+    Returns:
+        dict: Summary row with the keys of SUMMARY_COLUMNS; with a fleet, the estimated time is
+        that of the robot finishing last.
+    """
+    job_output_dir = os.path.join(output_dir, job["job"])
+    summary = {"job": job["job"], "status": "failed", "output": job_output_dir}
+    try:
+        if job.get("library"):
+            library = read_library_csv(job["library"])
+            combinations_to_make = list(expand_library(library, library_sample_size, library_seed))
+            write_text(os.path.join(job_output_dir, "combination-to-make.csv"), export_assembly_info(combinations_to_make))
+        else:
+            combinations_to_make = list(read_combinations_csv(job["combinations"]))
+        with open(job["template"], "rb") as template_file:
+            protocol_template_file = io.BytesIO(template_file.read())
+        template_parameters = {}
+        if job.get("template_parameters"):
+            with open(job["template_parameters"], "rb") as parameters_file:
+                template_parameters = read_template_parameters(parameters_file)
+        if job.get("customised_map"):
+            dna_plate_map_dict = generate_plate_maps(read_plate_map_csv(job["fixed_map"]),
+                                                     read_plate_map_csv(job["customised_map"]))
+        else:
+            source_layout = plan_source_layout(process_plate_map_df(read_plate_map_csv(job["fixed_map"])),
+                                               combinations_to_make,
+                                               dict(template_parameters, tip_action=choose_tip_action()),
+                                               part_volume, DNA_DEAD_VOLUME)
+            dna_plate_map_dict = {DNA_PLATE_NAME: source_layout["fixed_map"],
+                                  DNA_TUBES_NAME: source_layout["customised_map"]}
+            write_text(os.path.join(job_output_dir, JOB_FILE_NAMES["customised_map"]),
+                       export_plate_map(source_layout["customised_map"]))
+            write_text(os.path.join(job_output_dir, "source_loading.csv"), export_source_loading_sheet(source_layout))
+            if source_layout["spilled"]:
+                write_text(os.path.join(job_output_dir, JOB_FILE_NAMES["fixed_map"]),
+                           export_plate_map(source_layout["fixed_map"]))
+        options = (part_volume, split_plates, precompile_plan, multichannel, master_mix, pipelined, plating,
+                   adapt_programs, instrument, cell_batch_size)
+
+        if robots:
+            robots = [dict(robot, template_parameters=merge_template_parameters(template_parameters,
+                                                                                robot["template_parameters"]))
+                      for robot in robots]
+            fleet_plan = plan_fleet(combinations_to_make, robots, adapt_programs=adapt_programs)
+            robot_outputs = []
+            for robot in fleet_plan["robots"]:
+                if not robot["combinations"]:
+                    continue
+                robot_dir = os.path.join(job_output_dir, robot["name"])
+                try:
+                    outputs = generate_outputs(dna_plate_map_dict, robot["combinations"], protocol_template_file,
+                                               robot["template_parameters"], robot_dir, *options)
+                except ValueError as e:
+                    raise ValueError(f'Robot "{robot["name"]}": {e}')
+                robot["estimated_seconds"] = outputs["estimated_seconds"]
+                write_text(os.path.join(robot_dir, "part_loading.csv"), export_part_loading_sheet(
+                    dna_plate_map_dict, robot, fleet_plan["part_robots"], part_volume, DNA_DEAD_VOLUME))
+                robot_outputs.append(outputs)
+            write_text(os.path.join(job_output_dir, "fleet.csv"), export_fleet_summary(fleet_plan))
+            outputs = {
+                "combinations": sum(robot_output["combinations"] for robot_output in robot_outputs),
+                "plates": sum(robot_output["plates"] for robot_output in robot_outputs),
+                "p10_tips": sum(robot_output["p10_tips"] for robot_output in robot_outputs),
+                "estimated_seconds": max(robot_output["estimated_seconds"] for robot_output in robot_outputs),
+                "cell_span_seconds": max(robot_output["cell_span_seconds"] for robot_output in robot_outputs),
+            }
+        else:
+            outputs = generate_outputs(dna_plate_map_dict, combinations_to_make, protocol_template_file,
+                                       template_parameters, job_output_dir, *options)
+
+        summary.update({
+            "status": "ok",
+            "combinations": outputs["combinations"],
+            "plates": outputs["plates"],
+            "p10_tips": outputs["p10_tips"],
+            "estimated_minutes": round(outputs["estimated_seconds"] / 60),
+            "cell_span_seconds": round(outputs["cell_span_seconds"]),
+        })
+    except Exception as e:
+        summary["error"] = str(e)
+    return summary
+
+def generate_jobs(jobs, output_dir, workers=None, part_volume=1, split_plates=False, precompile_plan=True,
+                  multichannel=False, master_mix=False, pipelined=False, plating=None, adapt_programs=False,
+                  library_sample_size=None, library_seed=0, instrument=False, cell_batch_size=None, robots=None):
+    """
+    Generates all jobs over a process pool and writes a summary CSV.
+
+    Args:
+        jobs (list): Jobs as returned by find_jobs_in_directory or read_manifest.
+        output_dir (str): Directory receiving one subdirectory per job and summary.csv.
+        workers (int): Number of worker processes, defaulting to the number of CPUs.
+        part_volume (float): Volume of each part added to a reaction, in µL.
+        split_plates (bool): Write one protocol per reaction plate instead of a single multi-plate protocol.
+        precompile_plan (bool): Compile the liquid-handling plan offline, so the robot only replays it.
+        multichannel (bool): Add competent cells and plate with an 8-channel p300, one column at a time.
+        master_mix (bool): Premix buffer and water per part count, and write the loading sheets.
+        pipelined (bool): In single multi-plate protocols, set up the next plate while the current one cycles.
+        plating (str): Key of PLATING_CONFIGURATIONS, defaulting to the configuration of the loaded p300.
+        adapt_programs (bool): Group simple assemblies on plates running a shorter GG program.
+        library_sample_size (int): Designs drawn at random from each combinatorial library, or None for all.
+        library_seed (int): Seed of the library samples.
+        instrument (bool): Add timestamped step markers to the protocols, for analysing their run logs.
+        cell_batch_size (int): Wells (or columns) multi-dispensed competent cells per tip, or None to add
+            them one by one.
+        robots (list): Robots of a fleet sharing each job, or None to run each job on one robot.
+
+    Returns:
+        list: Summary rows in job order.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(generate_job, job, output_dir, part_volume, split_plates, precompile_plan,
+                                   multichannel, master_mix, pipelined, plating, adapt_programs,
+                                   library_sample_size, library_seed, instrument, cell_batch_size, robots): i
+                   for i, job in enumerate(jobs)}
+        summaries = [None] * len(jobs)
+        for future in as_completed(futures):
+            summaries[futures[future]] = future.result()
+
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "summary.csv"), "w", newline="", encoding="utf-8") as summary_file:
+        writer = csv.DictWriter(summary_file, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(summaries)
+    return summaries
+
+def main():
+    """
+    Command line entry point for batch protocol generation.
+    """
+    parser = argparse.ArgumentParser(description="Generate Auto-GG protocols for many jobs in parallel.")
+    parser.add_argument("jobs", help="Directory with one subdirectory per job, or a CSV manifest of jobs")
+    parser.add_argument("-o", "--output", default="output", help="Output directory (default: output)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--part-volume", type=float, default=1, help="Volume per part in µL (default: 1)")
+    parser.add_argument("--split-plates", action="store_true",
+                        help="Write one protocol per reaction plate for jobs above 96 combinations")
+    parser.add_argument("--runtime-plan", action="store_true",
+                        help="Let the robot compute the liquid-handling plan instead of precompiling it")
+    parser.add_argument("--multichannel", action="store_true",
+                        help="Add competent cells and plate with an 8-channel p300, one reaction column at a time")
+    parser.add_argument("--master-mix", action="store_true",
+                        help="Premix buffer and water per part count and write a master_mix.csv loading sheet")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Set up the next reaction plate in slot 9 while the current one cycles "
+                             "(single multi-plate protocols, not with --multichannel)")
+    parser.add_argument("--plating", choices=list(PLATING_CONFIGURATIONS), default=None,
+                        help="Agar plates and spot pattern; agar plates are loaded on every free deck slot")
+    parser.add_argument("--adapt-programs", action="store_true",
+                        help="Group simple assemblies on reaction plates running a shorter GG program")
+    parser.add_argument("--library-sample", type=int, default=None,
+                        help=f"Draw this many designs at random from jobs with a {LIBRARY_FILE_NAME}")
+    parser.add_argument("--library-seed", type=int, default=0, help="Seed of the library samples (default: 0)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Add timestamped step markers to the protocols, for streamlit_app/run_log.py")
+    parser.add_argument("--cell-batch", type=int, default=None,
+                        help="Multi-dispense competent cells to this many wells (or columns) per tip, so the wells "
+                             "of a plate receive them within a short span")
+    fleet_group = parser.add_mutually_exclusive_group()
+    fleet_group.add_argument("--robots", type=int, default=None,
+                             help="Split each job over this many identical robots, balancing their run times")
+    fleet_group.add_argument("--fleet", default=None,
+                             help="JSON list of robots, each with a name and the template parameters of its deck, "
+                                  "to split each job over")
+    args = parser.parse_args()
+
+    robots = None
+    try:
+        if args.fleet:
+            with open(args.fleet, "rb") as fleet_file:
+                robots = read_fleet_file(fleet_file)
+        elif args.robots:
+            robots = default_fleet(args.robots)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.cell_batch is not None and args.cell_batch < 1:
+        parser.error(f"--cell-batch must be at least 1, got {args.cell_batch}.")
+
+    jobs = find_jobs_in_directory(args.jobs) if os.path.isdir(args.jobs) else read_manifest(args.jobs)
+    summaries = generate_jobs(jobs, args.output, args.workers, args.part_volume, args.split_plates,
+                              not args.runtime_plan, args.multichannel, args.master_mix, args.pipelined,
+                              args.plating, args.adapt_programs, args.library_sample, args.library_seed,
+                              args.instrument, args.cell_batch, robots)
+
+    failed = [summary for summary in summaries if summary["status"] != "ok"]
+    print(f"Generated {len(summaries) - len(failed)} of {len(summaries)} jobs into {args.output}")
+    for summary in failed:
+        print(f"  {summary['job']}: {summary['error']}", file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
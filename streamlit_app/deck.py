@@ -0,0 +1,167 @@
+import re
+import string
+
+# OT-2 deck geometry, used to place wells when estimating and optimising pipette travel
+
+# Front-left corner of each deck slot, in mm
+SLOT_ORIGINS = {
+    "1": (0.0, 0.0), "2": (132.5, 0.0), "3": (265.0, 0.0),
+    "4": (0.0, 90.5), "5": (132.5, 90.5), "6": (265.0, 90.5),
+    "7": (0.0, 181.0), "8": (132.5, 181.0), "9": (265.0, 181.0),
+    "10": (0.0, 271.5), "11": (132.5, 271.5), "12": (265.0, 271.5),
+}
+
+# Offset of labware loaded on a module from the front-left corner of its slot
+MODULE_LABWARE_OFFSETS = {
+    "thermocycler": (0.0, 68.06),
+    "temperature": (-1.45, -0.15),
+}
+
+# The thermocycler always occupies slots 7, 8, 10 and 11
+THERMOCYCLER_SLOT = "7"
+
+TRASH_POSITION = (330.0, 350.0)
+
+LABWARE_FOOTPRINT = (127.76, 85.48)
+
+# Largest and smallest volume, in µL, each pipette model aspirates
+PIPETTE_MAX_VOLUMES = {
+    "p10_single": 10, "p10_multi": 10, "p20_single_gen2": 20, "p20_multi_gen2": 20,
+    "p300_single": 300, "p300_multi": 300, "p300_single_gen2": 300, "p300_multi_gen2": 300,
+}
+
+PIPETTE_MIN_VOLUMES = {
+    "p10_single": 1, "p10_multi": 1, "p20_single_gen2": 1, "p20_multi_gen2": 1,
+    "p300_single": 30, "p300_multi": 30, "p300_single_gen2": 20, "p300_multi_gen2": 20,
+}
+
+# Rows, columns, A1 position and well spacing (all in mm) of the labware used by the templates
+LABWARE_GRIDS = {
+    "opentrons_96_tiprack_20ul": (8, 12, 14.38, 74.24, 9.0, 9.0),
+    "opentrons_96_tiprack_300ul": (8, 12, 14.38, 74.24, 9.0, 9.0),
+    "biorad_96_wellplate_200ul_pcr": (8, 12, 14.38, 74.24, 9.0, 9.0),
+    "opentrons_24_tuberack_eppendorf_1.5ml_safelock_snapcap": (4, 6, 18.21, 75.43, 19.89, 19.28),
+    "opentrons_24_aluminumblock_nest_1.5ml_snapcap": (4, 6, 20.75, 68.63, 17.25, 17.25),
+    "corning_12_wellplate_6.9ml_flat": (3, 4, 24.94, 59.63, 26.01, 26.01),
+    "corning_24_wellplate_3.4ml_flat": (4, 6, 17.05, 68.83, 19.3, 19.3),
+    "corning_48_wellplate_1.6ml_flat": (6, 8, 18.16, 74.09, 13.08, 13.08),
+    "corning_96_wellplate_360ul_flat": (8, 12, 14.38, 74.24, 9.0, 9.0),
+    "nest_12_reservoir_15ml": (1, 12, 14.38, 42.78, 9.0, 0.0),
+}
+
+# Grid layout of standard labware, by number of wells
+GRID_SHAPES = {1: (1, 1), 6: (2, 3), 8: (1, 8), 12: (3, 4), 24: (4, 6), 48: (6, 8), 96: (8, 12), 384: (16, 24)}
+
+def labware_grid(load_name):
+    """
+    Returns the well grid of a labware.
+
+    Labware not listed in LABWARE_GRIDS get an evenly spaced grid, with the
+    number of wells taken from the load name (e.g. 'nest_12_reservoir_15ml').
+
+    Args:
+        load_name (str): Opentrons load name of the labware.
+
+    Returns:
+        tuple: Rows, columns, A1 x and y position, x and y spacing.
+
+    Raises:
+        ValueError: If the number of wells cannot be derived from the load name.
+    """
+    if load_name in LABWARE_GRIDS:
+        return LABWARE_GRIDS[load_name]
+    well_counts = [int(count) for count in re.findall(r"_(\d+)_", f"_{load_name}_") if int(count) in GRID_SHAPES]
+    if not well_counts:
+        raise ValueError(f'Unknown labware "{load_name}".')
+    rows, columns = GRID_SHAPES[well_counts[0]]
+    if "reservoir" in load_name and well_counts[0] == 12:
+        rows, columns = 1, 12
+    x_spacing = 108.0 / columns
+    y_spacing = 72.0 / rows
+    a1_x = (LABWARE_FOOTPRINT[0] - (columns - 1) * x_spacing) / 2
+    a1_y = LABWARE_FOOTPRINT[1] - (LABWARE_FOOTPRINT[1] - (rows - 1) * y_spacing) / 2
+    return rows, columns, a1_x, a1_y, x_spacing, y_spacing
+
+def well_names(load_name):
+    """
+    Returns the well names of a labware in Opentrons order (A1, B1, ..., A2, ...).
+
+    Args:
+        load_name (str): Opentrons load name of the labware.
+
+    Returns:
+        list: Well names, column by column.
+    """
+    rows, columns = labware_grid(load_name)[:2]
+    return [f"{string.ascii_uppercase[row]}{column + 1}" for column in range(columns) for row in range(rows)]
+
+def well_capacity(load_name):
+    """
+    Returns the volume a well of a labware holds, taken from its load name (e.g. '1.5ml' or '200ul').
+
+    Args:
+        load_name (str): Opentrons load name of the labware.
+
+    Returns:
+        float: Well volume in µL.
+
+    Raises:
+        ValueError: If the load name gives no well volume.
+    """
+    volumes = re.findall(r"_(\d+(?:\.\d+)?)(ul|ml)(?=_|$)", load_name)
+    if not volumes:
+        raise ValueError(f'The well volume of labware "{load_name}" is unknown.')
+    volume, unit = volumes[0]
+    return float(volume) * (1000 if unit == "ml" else 1)
+
+def well_coordinates(load_name, origin):
+    """
+    Returns the deck coordinates of every well of a labware in Opentrons order.
+
+    Args:
+        load_name (str): Opentrons load name of the labware.
+        origin (tuple): Deck position of the front-left corner of the labware.
+
+    Returns:
+        list: (x, y) tuples, column by column.
+    """
+    rows, columns, a1_x, a1_y, x_spacing, y_spacing = labware_grid(load_name)
+    return [(origin[0] + a1_x + column * x_spacing, origin[1] + a1_y - row * y_spacing)
+            for column in range(columns) for row in range(rows)]
+
+def module_type(module_name):
+    """
+    Returns the type of a module from any of the names Opentrons accepts for it.
+
+    Args:
+        module_name (str): Module name, e.g. 'Thermocycler Module' or 'temperature module gen2'.
+
+    Returns:
+        str: 'thermocycler' or 'temperature'.
+
+    Raises:
+        ValueError: If the module is not a thermocycler or temperature module.
+    """
+    name = module_name.lower()
+    if "thermocycler" in name:
+        return "thermocycler"
+    if "temperature" in name or "tempdeck" in name:
+        return "temperature"
+    raise ValueError(f'Unknown module "{module_name}".')
+
+def labware_origin(slot, module=None):
+    """
+    Returns the deck position of the front-left corner of a labware.
+
+    Args:
+        slot (str): Deck slot of the labware or of its module.
+        module (str): Type of the module the labware sits on, as returned by module_type.
+
+    Returns:
+        tuple: (x, y) position in mm.
+    """
+    if module == "thermocycler":
+        slot = THERMOCYCLER_SLOT
+    x, y = SLOT_ORIGINS[str(slot)]
+    offset_x, offset_y = MODULE_LABWARE_OFFSETS.get(module, (0.0, 0.0))
+    return x + offset_x, y + offset_y
@@ -0,0 +1,96 @@
+import math
+
+from deck import PIPETTE_MAX_VOLUMES
+from sharding import PLATE_CAPACITY
+
+# Functions for planning the transfer of DNA parts into the reaction wells
+
+# Costs in seconds of run time; the price of a tip is expressed as the run time it is worth
+DEFAULT_COST_MODEL = {
+    "tip_change_seconds": 14.0,
+    "tip_price_seconds": 10.0,
+    "wash_seconds": 12.0,
+}
+
+REACTION_BUFFER_VOLUME = 2
+REACTION_VOLUME = 10
+
+def choose_tip_action(cost_model=None):
+    """
+    Chooses between washing the tip and swapping it between aspirations of the same part.
+
+    Args:
+        cost_model (dict): Costs overriding DEFAULT_COST_MODEL.
+
+    Returns:
+        str: 'wash' if washing is cheaper than a fresh tip, otherwise 'new_tip'.
+    """
+    costs = dict(DEFAULT_COST_MODEL, **(cost_model or {}))
+    new_tip_cost = costs["tip_change_seconds"] + costs["tip_price_seconds"]
+    return "wash" if costs["wash_seconds"] < new_tip_cost else "new_tip"
+
+def plan_part_distribution(combinations_to_make, pipette="p10_single", part_volume=1, cost_model=None,
+                           plate_capacity=PLATE_CAPACITY, reaction_volume=REACTION_VOLUME,
+                           buffer_volume=REACTION_BUFFER_VOLUME):
+    """
+    Plans the aspiration chunks, washes and tips of the part transfer step.
+
+    Mirrors the part transfer loop of the protocol template: every part gets one tip per
+    reaction plate, and is aspirated in chunks of as many wells as the pipette can hold.
+
+    Args:
+        combinations_to_make (list): List of combinations.
+        pipette (str): Name of the pipette doing the part transfers.
+        part_volume (float): Volume of each part added to a reaction, in µL.
+        cost_model (dict): Costs overriding DEFAULT_COST_MODEL.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+        reaction_volume (float): Volume of each reaction, in µL.
+        buffer_volume (float): Volume of buffer in each reaction, in µL.
+
+    Returns:
+        dict: The chunking and tip action, and the tips, washes and aspirate cycles needed.
+
+    Raises:
+        ValueError: If the pipette is unknown, the part volume is not positive or above the
+            pipette's maximum, or the parts do not fit in a reaction.
+    """
+    if pipette not in PIPETTE_MAX_VOLUMES:
+        raise ValueError(f'Unknown pipette "{pipette}".')
+    max_volume = PIPETTE_MAX_VOLUMES[pipette]
+    if part_volume <= 0:
+        raise ValueError(f"Part volume must be positive, got {part_volume} µL.")
+    if part_volume > max_volume:
+        raise ValueError(f'Part volume must be at most {max_volume} µL with a {pipette}, got {part_volume} µL.')
+
+    for combination in combinations_to_make:
+        water_volume = reaction_volume - buffer_volume - len(combination["parts"]) * part_volume
+        if water_volume < 0:
+            raise ValueError(
+                f'Combination "{combination["name"]}" needs {len(combination["parts"]) * part_volume} µL of parts, '
+                f'more than the {reaction_volume - buffer_volume} µL available in a reaction.'
+            )
+
+    wells_per_aspirate = int(max_volume // part_volume)
+    tip_action = choose_tip_action(cost_model)
+
+    aspirate_cycles = 0
+    part_loads = 0  # One per part and reaction plate
+    for i in range(0, len(combinations_to_make), plate_capacity):
+        wells_by_part = {}
+        for combination in combinations_to_make[i:i + plate_capacity]:
+            for part in combination["parts"]:
+                wells_by_part[part] = wells_by_part.get(part, 0) + 1
+        aspirate_cycles += sum(math.ceil(count / wells_per_aspirate) for count in wells_by_part.values())
+        part_loads += len(wells_by_part)
+
+    num_plates = math.ceil(len(combinations_to_make) / plate_capacity)
+    part_tips = part_loads if tip_action == "wash" else aspirate_cycles
+    return {
+        "pipette": pipette,
+        "part_volume": part_volume,
+        "wells_per_aspirate": wells_per_aspirate,
+        "tip_action": tip_action,
+        "aspirate_cycles": aspirate_cycles,
+        "washes": aspirate_cycles - part_loads if tip_action == "wash" else 0,
+        "tips": part_tips + num_plates,  # One extra tip per plate for buffer and water
+    }
@@ -0,0 +1,239 @@
+import csv
+import io
+import json
+import math
+from collections import Counter
+
+from deck import labware_grid
+from profiles import DEFAULT_GG_PROGRAM, GG_PROGRAMS, choose_program, plate_programs, program_hold_seconds
+from sharding import PLATE_CAPACITY, count_part_usage, shard_combinations
+from templates import DEFAULT_HEAT_SHOCK_PROGRAM, USER_PARAMETERS, dna_source_labware, validate_parameter_values
+from transfer_plan import index_dna_wells
+
+# Splitting of a job over a fleet of robots, balancing their run times and sharing as few DNA parts as possible
+
+# Run time model of a reaction plate, fitted on simulated runs of the default template; the price of copying
+# a part to one more robot is expressed as the run time it is worth
+FLEET_COST_MODEL = {
+    "plate_overhead_seconds": 860.0,  # Temperature ramps and setup, besides the GG and heat shock holds
+    "reaction_seconds": 49.0,  # Buffer, water, cells and plating of one reaction
+    "part_seconds": 8.0,  # Visiting the tube of one part on a plate
+    "part_copy_seconds": 300.0,  # Preparing a copy of a part tube for one more robot
+}
+
+ROBOT_NAME_KEY = "name"
+PART_LOADING_COLUMNS = ["part", "location", "reactions", "volume_ul", "robots"]
+FLEET_SUMMARY_COLUMNS = ["robot", "combinations", "plates", "parts", "estimated_minutes"]
+
+def default_fleet(num_robots):
+    """
+    Returns a fleet of identical robots with the deck configuration of the job.
+    """
+    if num_robots < 1:
+        raise ValueError(f"A fleet needs at least one robot, got {num_robots}.")
+    return [{"name": f"robot_{i + 1}", "template_parameters": {}} for i in range(num_robots)]
+
+def read_fleet_file(fleet_file):
+    """
+    Reads the robots of a fleet and their deck configurations.
+
+    The file is a JSON list with one object per robot: its name, and any template parameters
+    in which its deck differs from the job, e.g. other slots or pipettes.
+
+    Args:
+        fleet_file (file): JSON file listing the robots.
+
+    Returns:
+        list: Robots as dictionaries with their name and template parameters.
+
+    Raises:
+        ValueError: If the file is not a list of uniquely named robots with valid template parameters.
+    """
+    try:
+        entries = json.load(fleet_file)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"The fleet file is not valid JSON: {e}")
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("The fleet file must be a JSON list with one object per robot.")
+    robots = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not str(entry.get(ROBOT_NAME_KEY, "")).strip():
+            raise ValueError(f'Every robot of the fleet must be a JSON object with a "{ROBOT_NAME_KEY}".')
+        name = str(entry[ROBOT_NAME_KEY]).strip()
+        if any(robot["name"] == name for robot in robots):
+            raise ValueError(f'Robot "{name}" is listed more than once in the fleet file.')
+        parameters = {key: value for key, value in entry.items() if key != ROBOT_NAME_KEY}
+        unknown = sorted(set(parameters) - set(USER_PARAMETERS))
+        if unknown:
+            raise ValueError(f'Unknown template parameters for robot "{name}": {", ".join(unknown)}.')
+        try:
+            validate_parameter_values(parameters)
+        except ValueError as e:
+            raise ValueError(f'Robot "{name}": {e}')
+        robots.append({"name": name, "template_parameters": parameters})
+    return robots
+
+def estimate_robot_seconds(num_reactions, num_parts, heat_shock_program=DEFAULT_HEAT_SHOCK_PROGRAM,
+                           plate_capacity=PLATE_CAPACITY, cost_model=None, gg_programs=None):
+    """
+    Estimates the run time of a robot's share of a job without simulating it.
+
+    Args:
+        num_reactions (int): Reactions run on the robot.
+        num_parts (int): Distinct parts used on the robot.
+        heat_shock_program (list): Heat shock steps of the robot.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+        cost_model (dict): Costs overriding FLEET_COST_MODEL.
+        gg_programs (list): GG program of each plate, as in the template parameters; plates beyond
+            the list run the standard program.
+
+    Returns:
+        float: Estimated run time in seconds.
+    """
+    costs = dict(FLEET_COST_MODEL, **(cost_model or {}))
+    num_plates = math.ceil(num_reactions / plate_capacity)
+    gg_programs = list(gg_programs or [])[:num_plates]
+    gg_programs += [GG_PROGRAMS[DEFAULT_GG_PROGRAM]] * (num_plates - len(gg_programs))
+    plate_seconds = costs["plate_overhead_seconds"] + sum(step["hold_time_seconds"] for step in heat_shock_program)
+    return (num_plates * plate_seconds + sum(program_hold_seconds(program) for program in gg_programs)
+            + num_reactions * costs["reaction_seconds"] + num_parts * costs["part_seconds"])
+
+def plan_fleet(combinations_to_make, robots, plate_capacity=PLATE_CAPACITY, cost_model=None, adapt_programs=False):
+    """
+    Splits a job over several robots.
+
+    The combinations are first cut into plate-sized shards sharing parts, as for a single robot;
+    jobs of fewer plates than robots are cut into one shard per robot instead. Shards are then
+    handed out largest first, each to the robot that would finish it earliest, counting the
+    price of copying the parts the robot does not hold yet. Run time is therefore balanced,
+    and between robots finishing at about the same time the one already holding the parts
+    wins, so few parts need a copy on several robots. Each plate is costed with the GG program it
+    will run: the one of the robot's template parameters, or with adaptive programs the one
+    plan_gg_programs will choose from the robot's assemblies.
+
+    Args:
+        combinations_to_make (list): List of combinations.
+        robots (list): Robots as returned by read_fleet_file or default_fleet.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+        cost_model (dict): Costs overriding FLEET_COST_MODEL.
+        adapt_programs (bool): Group simple assemblies on plates running a shorter GG program.
+
+    Returns:
+        dict: The robots with their combinations, plates, parts and estimated run time, the
+        makespan, and the part copies against the minimum of one per part.
+
+    Raises:
+        ValueError: If the fleet has no robot.
+    """
+    if not robots:
+        raise ValueError("A fleet needs at least one robot.")
+    costs = dict(FLEET_COST_MODEL, **(cost_model or {}))
+    shard_capacity = min(plate_capacity, max(math.ceil(len(combinations_to_make) / len(robots)), 1))
+    shards = shard_combinations(combinations_to_make, shard_capacity) if combinations_to_make else []
+    shard_parts = [set(count_part_usage(shard)) for shard in shards]
+    shard_programs = [Counter(choose_program(combination) for combination in shard) if adapt_programs else Counter()
+                      for shard in shards]
+
+    heat_shock_programs = [robot["template_parameters"].get("heat_shock_program", DEFAULT_HEAT_SHOCK_PROGRAM)
+                           for robot in robots]
+    robot_shards = [[] for _ in robots]
+    robot_reactions = [0] * len(robots)
+    robot_parts = [set() for _ in robots]
+    robot_programs = [Counter() for _ in robots]
+
+    def finish_seconds(r, shard_index=None):
+        num_reactions, parts, programs = robot_reactions[r], robot_parts[r], robot_programs[r]
+        if shard_index is not None:
+            num_reactions, parts = num_reactions + len(shards[shard_index]), parts | shard_parts[shard_index]
+            programs = programs + shard_programs[shard_index]
+        if adapt_programs:
+            gg_programs = [GG_PROGRAMS[program_name] for program_name in plate_programs(programs, plate_capacity)]
+        else:
+            gg_programs = robots[r]["template_parameters"].get("gg_programs")
+        return estimate_robot_seconds(num_reactions, len(parts), heat_shock_programs[r], plate_capacity, costs,
+                                      gg_programs)
+
+    for i in sorted(range(len(shards)), key=lambda i: (-len(shards[i]), -len(shard_parts[i]))):
+        r = min(range(len(robots)), key=lambda r: (
+            finish_seconds(r, i) + len(shard_parts[i] - robot_parts[r]) * costs["part_copy_seconds"], r))
+        robot_shards[r].append(i)
+        robot_reactions[r] += len(shards[i])
+        robot_parts[r] |= shard_parts[i]
+        robot_programs[r] += shard_programs[i]
+
+    fleet = []
+    for r, robot in enumerate(robots):
+        fleet.append({
+            "name": robot["name"],
+            "template_parameters": robot["template_parameters"],
+            "combinations": [combination for i in sorted(robot_shards[r]) for combination in shards[i]],
+            "plates": math.ceil(robot_reactions[r] / plate_capacity),
+            "parts": sorted(robot_parts[r]),
+            "estimated_seconds": finish_seconds(r) if robot_reactions[r] else 0.0,
+        })
+    part_robots = count_part_usage([{"parts": robot["parts"]} for robot in fleet])
+    return {
+        "robots": fleet,
+        "makespan_seconds": max(robot["estimated_seconds"] for robot in fleet),
+        "part_copies": sum(part_robots.values()),
+        "min_part_copies": len(part_robots),
+        "part_robots": part_robots,
+    }
+
+def summarise_fleet(fleet_plan):
+    """
+    Returns one row per robot with the keys of FLEET_SUMMARY_COLUMNS.
+    """
+    return [{
+        "robot": robot["name"],
+        "combinations": len(robot["combinations"]),
+        "plates": robot["plates"],
+        "parts": len(robot["parts"]),
+        "estimated_minutes": round(robot["estimated_seconds"] / 60),
+    } for robot in fleet_plan["robots"]]
+
+def export_fleet_summary(fleet_plan):
+    """
+    Writes the robots of a fleet plan as CSV.
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=FLEET_SUMMARY_COLUMNS)
+    writer.writeheader()
+    writer.writerows(summarise_fleet(fleet_plan))
+    return output.getvalue()
+
+def export_part_loading_sheet(dna_plate_map_dict, robot, part_robots, part_volume=1, dead_volume=0):
+    """
+    Writes the DNA parts a robot needs as CSV: where each goes, and how much to load.
+
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary.
+        robot (dict): Robot of a fleet plan, with its combinations and the template parameters its
+            DNA labware is resolved from.
+        part_robots (Counter): Number of robots needing each part, as in the fleet plan.
+        part_volume (float): Volume of each part added to a reaction, in µL.
+        dead_volume (float): Volume left in each DNA well, in µL.
+
+    Returns:
+        str: CSV content with the columns of PART_LOADING_COLUMNS, in plate and well order.
+    """
+    dna_well_index = index_dna_wells(dna_plate_map_dict, robot["template_parameters"])
+    source_rows = {plate_name: labware_grid(load_name)[0] for plate_name, load_name
+                   in zip(dna_plate_map_dict, dna_source_labware(robot["template_parameters"]))}
+    reactions = Counter(part for combination in robot["combinations"] for part in combination["parts"])
+
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=PART_LOADING_COLUMNS)
+    writer.writeheader()
+    for part in sorted(reactions, key=lambda part: dna_well_index[part]):
+        source_plate, source_well = dna_well_index[part]
+        num_rows = source_rows[source_plate]
+        well_name = chr(ord("A") + source_well % num_rows) + str(source_well // num_rows + 1)
+        writer.writerow({
+            "part": part,
+            "location": f"{source_plate} {well_name}",
+            "reactions": reactions[part],
+            "volume_ul": reactions[part] * part_volume + dead_volume,
+            "robots": part_robots[part],
+        })
+    return output.getvalue()
@@ -0,0 +1,57 @@
+from sharding import PLATE_CAPACITY, count_part_usage
+
+# Assignment of combinations to reaction wells, so column-wise operations can use an 8-channel pipette
+
+PLATE_ROWS = 8
+
+def plan_reaction_layout(combinations_to_make, plate_capacity=PLATE_CAPACITY):
+    """
+    Orders the combinations of each reaction plate so every column holds similar reactions.
+
+    Reaction wells are filled column-wise (A1, B1, ..., H1, A2, ...). Within each plate,
+    combinations are sorted by part count, then by the parts they use, most widely shared
+    first, so columns share the same buffer and water volumes and as many parts as possible.
+
+    Args:
+        combinations_to_make (list): List of combinations, already split into plate-sized runs.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        list: The combinations in reaction well order.
+    """
+    part_usage = count_part_usage(combinations_to_make)
+    part_rank = {part: rank for rank, (part, _) in
+                 enumerate(sorted(part_usage.items(), key=lambda item: (-item[1], item[0])))}
+
+    def layout_key(combination):
+        return len(combination["parts"]), sorted(part_rank[part] for part in set(combination["parts"]))
+
+    laid_out = []
+    for i in range(0, len(combinations_to_make), plate_capacity):
+        laid_out.extend(sorted(combinations_to_make[i:i + plate_capacity], key=layout_key))
+    return laid_out
+
+def summarise_layout(combinations_to_make, plate_capacity=PLATE_CAPACITY, rows=PLATE_ROWS):
+    """
+    Reports how many reaction plate columns can be handled with an 8-channel pipette.
+
+    Args:
+        combinations_to_make (list): Combinations in reaction well order.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+        rows (int): Number of rows of the reaction plate, i.e. channels of the pipette.
+
+    Returns:
+        dict: Number of columns, of full columns, and of full columns whose reactions have the
+        same part count (and therefore the same buffer and water volumes).
+    """
+    columns = full_columns = uniform_columns = 0
+    for i in range(0, len(combinations_to_make), plate_capacity):
+        plate_combinations = combinations_to_make[i:i + plate_capacity]
+        for j in range(0, len(plate_combinations), rows):
+            column = plate_combinations[j:j + rows]
+            columns += 1
+            if len(column) == rows:
+                full_columns += 1
+                if len({len(combination["parts"]) for combination in column}) == 1:
+                    uniform_columns += 1
+    return {"columns": columns, "full_columns": full_columns, "uniform_columns": uniform_columns}
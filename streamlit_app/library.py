@@ -0,0 +1,162 @@
+import csv
+import io
+import itertools
+import math
+import random
+
+# Combinatorial libraries: designs expanded lazily from the candidate parts of each MoClo position
+
+# First cell of the library rows listing parts that must not be assembled together
+EXCLUSION_KEYWORD = "exclude"
+# Largest library expanded in full; larger libraries must be sampled
+MAX_LIBRARY_DESIGNS = 100000
+DESIGN_NAME_PREFIX = "design_"
+# Rounds of the Feistel network shuffling the design indices of a sampled library
+SHUFFLE_ROUNDS = 4
+
+def parse_library_rows(rows):
+    """
+    Builds a library from its rows: a position name then its candidate parts, or the
+    exclusion keyword then parts that must not be assembled together.
+
+    Positions keep their row order, which is the part order of every design. Repeated
+    candidates of a position are dropped.
+
+    Args:
+        rows (iterable): Lists of cleaned cell values, without empty cells.
+
+    Returns:
+        dict: 'positions' as (name, candidate parts) pairs, and 'exclusions' as sets of parts.
+
+    Raises:
+        ValueError: If a position has no candidate, is listed twice, or the library has no position.
+    """
+    positions = []
+    exclusions = []
+    for row in rows:
+        if not row:
+            continue
+        name, parts = row[0], row[1:]
+        if name.lower() == EXCLUSION_KEYWORD:
+            if parts:
+                exclusions.append(frozenset(parts))
+            continue
+        if not parts:
+            raise ValueError(f'Library position "{name}" has no candidate parts.')
+        if any(name == position_name for position_name, _ in positions):
+            raise ValueError(f'Library position "{name}" is listed more than once.')
+        positions.append((name, list(dict.fromkeys(parts))))
+    if not positions:
+        raise ValueError("The library lists no position.")
+    return {"positions": positions, "exclusions": exclusions}
+
+def count_designs(library):
+    """
+    Returns the size of the full cartesian product of a library, before exclusions.
+    """
+    return math.prod(len(candidates) for _, candidates in library["positions"])
+
+def decode_design(positions, index):
+    """
+    Returns the parts of the design at an index of the cartesian product, in itertools.product order.
+    """
+    parts = []
+    for _, candidates in reversed(positions):
+        index, candidate_index = divmod(index, len(candidates))
+        parts.append(candidates[candidate_index])
+    return parts[::-1]
+
+def sample_design_indices(num_designs, seed=0):
+    """
+    Yields every index of the cartesian product once, in random order, in constant memory.
+
+    Indices are shuffled by a Feistel network keyed from the seed, which permutes the smallest
+    power of four covering the product. An index mapped outside the product is mapped again
+    until it falls inside, so the product itself is permuted.
+    """
+    rng = random.Random(seed)
+    half_bits = max(((num_designs - 1).bit_length() + 1) // 2, 1)
+    mask = (1 << half_bits) - 1
+    # Each round xors one half with a multiply-xorshift hash of the other
+    round_keys = [(rng.getrandbits(half_bits), rng.getrandbits(half_bits) | 1) for _ in range(SHUFFLE_ROUNDS)]
+
+    def shuffle(value):
+        left, right = value >> half_bits, value & mask
+        for key, multiplier in round_keys:
+            mixed = (right ^ key) * multiplier
+            left, right = right, left ^ ((mixed ^ (mixed >> half_bits)) & mask)
+        return (left << half_bits) | right
+
+    for position in range(num_designs):
+        index = shuffle(position)
+        while index >= num_designs:
+            index = shuffle(index)
+        yield index
+
+def expand_library(library, sample_size=None, seed=0):
+    """
+    Streams the designs of a combinatorial library as combinations.
+
+    The cartesian product is walked lazily, so only designs that are kept are built.
+    Designs containing all parts of an exclusion, or the same part twice, are skipped.
+    When a part is a candidate of several positions, designs with the same parts are
+    only kept once. Names are numbered by position in the full product, so a design keeps
+    its name whether or not the library is sampled.
+
+    Args:
+        library (dict): Library as returned by parse_library_rows.
+        sample_size (int): Number of designs drawn at random, or None for all of them.
+        seed (int): Seed of the random sample, so a sample can be regenerated.
+
+    Yields:
+        dict: Combination names and parts.
+
+    Raises:
+        ValueError: If the full library exceeds MAX_LIBRARY_DESIGNS and is not sampled.
+    """
+    positions = library["positions"]
+    exclusions = library["exclusions"]
+    num_designs = count_designs(library)
+    sampled = sample_size is not None and sample_size < num_designs
+    if not sampled and num_designs > MAX_LIBRARY_DESIGNS:
+        raise ValueError(f"The library holds {num_designs} designs, more than the {MAX_LIBRARY_DESIGNS} "
+                         f"that can be expanded; sample it instead.")
+
+    if sampled:
+        designs = ((index, decode_design(positions, index)) for index in sample_design_indices(num_designs, seed))
+    else:
+        designs = enumerate(itertools.product(*(candidates for _, candidates in positions)))
+    candidate_positions = [part for _, candidates in positions for part in candidates]
+    shared_candidates = len(candidate_positions) > len(set(candidate_positions))
+    name_width = len(str(num_designs))
+
+    seen_designs = set()
+    num_kept = 0
+    for index, parts in designs:
+        part_set = frozenset(parts)
+        if len(part_set) < len(parts) or any(exclusion <= part_set for exclusion in exclusions):
+            continue
+        if shared_candidates:
+            if part_set in seen_designs:
+                continue
+            seen_designs.add(part_set)
+        yield {"name": f"{DESIGN_NAME_PREFIX}{index + 1:0{name_width}d}", "parts": list(parts)}
+        num_kept += 1
+        if sampled and num_kept >= sample_size:
+            return
+
+def export_assembly_info(combinations_to_make):
+    """
+    Writes combinations as an assembly-info CSV, one row per combination.
+
+    Args:
+        combinations_to_make (iterable): Combinations, e.g. as streamed by expand_library.
+
+    Returns:
+        str: The assembly-info file.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for combination in combinations_to_make:
+        writer.writerow([combination["name"]] + combination["parts"])
+    return output.getvalue()
@@ -0,0 +1,105 @@
+import csv
+import io
+
+from deck import PIPETTE_MAX_VOLUMES, PIPETTE_MIN_VOLUMES
+from distribution import REACTION_BUFFER_VOLUME, REACTION_VOLUME
+from sharding import PLATE_CAPACITY
+
+# Functions for premixing buffer and water per part count, so each reaction needs a single dispense
+
+# Free wells of the aluminium block on the temperature module in the templates, after buffer (A1),
+# water (B1), dilution water (C1), competent cells (D1) and liquid waste (A2)
+MASTER_MIX_TUBES = ["B2", "C2", "D2", "A3", "B3", "C3", "D3", "A4", "B4", "C4", "D4",
+                    "A5", "B5", "C5", "D5", "A6", "B6", "C6", "D6"]
+
+TUBE_MAX_VOLUME = 1500
+TUBE_DEAD_VOLUME = 20
+
+LOADING_SHEET_COLUMNS = ["plate", "tube", "parts_per_reaction", "reactions", "mix_per_reaction_ul",
+                         "wells_per_aspiration", "buffer_ul", "water_ul", "total_ul"]
+
+def plan_master_mix(combinations_to_make, part_volume=1, pipette="p10_single", plate_capacity=PLATE_CAPACITY,
+                    reaction_volume=REACTION_VOLUME, buffer_volume=REACTION_BUFFER_VOLUME):
+    """
+    Plans one premixed buffer and water tube per part count, and the volumes to load for every plate.
+
+    Reactions with the same number of parts need the same buffer and water volumes, so each
+    group is served from one tube with a single aspiration per reaction, instead of one for the
+    buffer and one for the water. When the pipette holds at least two mixes on top of its
+    minimum volume, the mix is multi-dispensed; every aspiration then carries the minimum
+    volume as disposal volume, which is blown back into the tube.
+
+    Args:
+        combinations_to_make (list): List of combinations.
+        part_volume (float): Volume of each part added to a reaction, in µL.
+        pipette (str): Name of the pipette dispensing the mix.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+        reaction_volume (float): Volume of each reaction before the cells are added, in µL.
+        buffer_volume (float): Volume of buffer in each reaction, in µL.
+
+    Returns:
+        dict: The tube of every water volume per reaction, as passed to the templates, and one
+        loading sheet row per plate and tube.
+
+    Raises:
+        ValueError: If the pipette is unknown, the part volume is not positive, there are more
+            part counts than spare tubes, or a tube would overflow.
+    """
+    if pipette not in PIPETTE_MIN_VOLUMES:
+        raise ValueError(f'Unknown pipette "{pipette}".')
+    if part_volume <= 0:
+        raise ValueError(f"Part volume must be positive, got {part_volume} µL.")
+    max_volume, min_volume = PIPETTE_MAX_VOLUMES[pipette], PIPETTE_MIN_VOLUMES[pipette]
+    water_per_reaction = reaction_volume - buffer_volume
+
+    water_volumes = sorted({water_per_reaction - len(combination["parts"]) * part_volume
+                            for combination in combinations_to_make}, reverse=True)
+    if len(water_volumes) > len(MASTER_MIX_TUBES):
+        raise ValueError(f"{len(water_volumes)} different part counts need more than the "
+                         f"{len(MASTER_MIX_TUBES)} spare tubes for master mixes.")
+    tubes = dict(zip(water_volumes, MASTER_MIX_TUBES))
+
+    loading_sheet = []
+    for plate_index, i in enumerate(range(0, len(combinations_to_make), plate_capacity)):
+        reactions_by_water_volume = {}
+        for combination in combinations_to_make[i:i + plate_capacity]:
+            water_volume = water_per_reaction - len(combination["parts"]) * part_volume
+            reactions_by_water_volume[water_volume] = reactions_by_water_volume.get(water_volume, 0) + 1
+
+        for water_volume, reactions in sorted(reactions_by_water_volume.items(), reverse=True):
+            mix_volume = buffer_volume + water_volume
+            # Same rule as the templates: multi-dispense only when a tip holds two mixes or more
+            wells_per_aspiration = max(int((max_volume - min_volume) // mix_volume), 1)
+            disposal_volume = min_volume if wells_per_aspiration > 1 else 0
+            total_volume = reactions * mix_volume + disposal_volume + TUBE_DEAD_VOLUME
+            if total_volume > TUBE_MAX_VOLUME:
+                raise ValueError(f"Master mix tube {tubes[water_volume]} of plate {plate_index + 1} needs "
+                                 f"{total_volume:g} µL, more than the {TUBE_MAX_VOLUME} µL a tube holds.")
+            loading_sheet.append({
+                "plate": plate_index + 1,
+                "tube": tubes[water_volume],
+                "parts_per_reaction": round((water_per_reaction - water_volume) / part_volume),
+                "reactions": reactions,
+                "mix_per_reaction_ul": mix_volume,
+                "wells_per_aspiration": wells_per_aspiration,
+                "buffer_ul": round(total_volume * buffer_volume / mix_volume, 1),
+                "water_ul": round(total_volume * water_volume / mix_volume, 1),
+                "total_ul": round(total_volume, 1),
+            })
+    return {"tubes": tubes, "loading_sheet": loading_sheet}
+
+def export_loading_sheet(master_mix_plan):
+    """
+    Writes the master mix volumes the operator loads before each plate as CSV.
+
+    Args:
+        master_mix_plan (dict): Plan as returned by plan_master_mix.
+
+    Returns:
+        str: The loading sheet as CSV.
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=LOADING_SHEET_COLUMNS)
+    writer.writeheader()
+    writer.writerows(master_mix_plan["loading_sheet"])
+    return output.getvalue()
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+
+import numpy as np
+
+from layout import PLATE_ROWS
+from sharding import PLATE_CAPACITY
+
+# Reaction plate maps in the order the templates fill reaction_plate.wells(): A1, B1, ..., H1, A2, ..., H12
+
+PLATE_COLUMNS = PLATE_CAPACITY // PLATE_ROWS
+ROW_NAMES = [chr(ord("A") + row) for row in range(PLATE_ROWS)]
+COLUMN_NAMES = [str(column + 1) for column in range(PLATE_COLUMNS)]
+
+LONG_FORMAT_COLUMNS = ["plate", "well", "row", "column", "combination", "parts"]
+# Separator of the parts of a combination in the long format
+PART_SEPARATOR = ";"
+
+def build_plate_maps(combinations_to_make, plate_capacity=PLATE_CAPACITY):
+    """
+    Lays the combination names out on their reaction plates.
+
+    Combinations fill each plate column-wise, as reaction_plate.wells()[i] on the robot.
+    All names go into one padded array, which is reshaped per plate and column and then
+    transposed, so no well is placed one at a time.
+
+    Args:
+        combinations_to_make (list): Combinations in reaction well order.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        ndarray: Names of shape (plates, PLATE_ROWS, PLATE_COLUMNS); empty wells hold "".
+
+    Raises:
+        ValueError: If the plate capacity is not a whole number of columns of the 96 well plate.
+    """
+    if plate_capacity < 1 or plate_capacity > PLATE_CAPACITY or plate_capacity % PLATE_ROWS:
+        raise ValueError(f"Plate capacity must be a whole number of columns of {PLATE_ROWS} wells, "
+                         f"up to {PLATE_CAPACITY}, got {plate_capacity}.")
+    num_plates = max(-(-len(combinations_to_make) // plate_capacity), 1)
+    wells = np.full((num_plates, PLATE_CAPACITY), "", dtype=object)
+    names = np.array([combination["name"] for combination in combinations_to_make], dtype=object)
+    # Each plate takes plate_capacity reactions, in its first wells
+    wells[:, :plate_capacity].flat[:len(names)] = names
+    return wells.reshape(num_plates, PLATE_COLUMNS, PLATE_ROWS).transpose(0, 2, 1)
+
+def export_plate_maps_csv(plate_maps):
+    """
+    Writes plate maps as CSV: one grid per plate with row letters and column numbers, and a
+    title row per plate when there are several.
+
+    Args:
+        plate_maps (ndarray): Plate maps as returned by build_plate_maps.
+
+    Returns:
+        str: CSV content as a string.
+    """
+    csv_buffer = io.StringIO()
+    writer = csv.writer(csv_buffer)
+    for plate_index, plate_map in enumerate(plate_maps):
+        if len(plate_maps) > 1:
+            if plate_index > 0:
+                writer.writerow([])
+            writer.writerow([f"Reaction plate {plate_index + 1}"])
+        writer.writerow([""] + COLUMN_NAMES)
+        writer.writerows(np.column_stack([ROW_NAMES, plate_map]).tolist())
+    return csv_buffer.getvalue()
+
+def export_plate_maps_json(plate_maps):
+    """
+    Writes plate maps as JSON: a list of plates, each with its rows of names.
+
+    Args:
+        plate_maps (ndarray): Plate maps as returned by build_plate_maps.
+
+    Returns:
+        str: JSON content as a string.
+    """
+    return json.dumps([
+        {"plate": plate_index + 1, "rows": ROW_NAMES, "columns": COLUMN_NAMES, "layout": plate_map.tolist()}
+        for plate_index, plate_map in enumerate(plate_maps)
+    ], indent=2)
+
+def export_plate_maps_long(combinations_to_make, plate_capacity=PLATE_CAPACITY):
+    """
+    Writes one row per filled reaction well, for import into a LIMS.
+
+    Args:
+        combinations_to_make (list): Combinations in reaction well order.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        str: CSV content with the columns of LONG_FORMAT_COLUMNS.
+    """
+    reaction_indices = np.arange(len(combinations_to_make))
+    plates, wells = np.divmod(reaction_indices, plate_capacity)
+    columns, rows = np.divmod(wells, PLATE_ROWS)
+    row_names = np.array(ROW_NAMES)[rows]
+    column_names = (columns + 1).astype(str)
+    well_names = np.char.add(row_names, column_names)
+
+    csv_buffer = io.StringIO()
+    writer = csv.writer(csv_buffer)
+    writer.writerow(LONG_FORMAT_COLUMNS)
+    writer.writerows(zip(
+        (plates + 1).tolist(), well_names.tolist(), row_names.tolist(), (columns + 1).tolist(),
+        (combination["name"] for combination in combinations_to_make),
+        (PART_SEPARATOR.join(combination["parts"]) for combination in combinations_to_make),
+    ))
+    return csv_buffer.getvalue()
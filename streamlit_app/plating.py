@@ -0,0 +1,117 @@
+import math
+
+from deck import labware_grid
+from sharding import PLATE_CAPACITY
+
+# Plating configurations read by the protocol templates: agar labware, deck slots and spot pattern
+
+# Deck slots left free by the templates, and what else may occupy them
+AGAR_SLOTS = ["5", "9"]
+CELL_RESERVOIR_SLOT = "9"  # Multichannel mode
+SETUP_PLATE_SLOT = "9"  # Pipelined mode
+
+# Spot offsets from the well centre in mm, spot volume and disposal volume in µL, and dispensing height in mm
+PLATING_CONFIGURATIONS = {
+    "12-well plates, 13 spots": {
+        "labware": "corning_12_wellplate_6.9ml_flat",
+        "spots": [[0, 0], [0, 4], [4, 0], [0, -4], [-4, 0], [0, 8], [5.5, 5.5], [8, 0],
+                  [5.5, -5.5], [0, -8], [-5.5, -5.5], [-8, 0], [-5.5, 5.5]],
+        "spot_volume": 4.5, "disposal_volume": 1.5, "height": 6,
+    },
+    "24-well plates, 5 spots": {
+        "labware": "corning_24_wellplate_3.4ml_flat",
+        "spots": [[0, 0], [0, 4], [4, 0], [0, -4], [-4, 0]],
+        "spot_volume": 4.5, "disposal_volume": 1.5, "height": 6,
+    },
+    "48-well plates, 3 spots": {
+        "labware": "corning_48_wellplate_1.6ml_flat",
+        "spots": [[0, 0], [-3, 0], [3, 0]],
+        "spot_volume": 4.5, "disposal_volume": 1.5, "height": 4,
+    },
+    "96-well drop plating": {
+        "labware": "corning_96_wellplate_360ul_flat",
+        "spots": [[0, 0]],
+        "spot_volume": 5, "disposal_volume": 1.5, "height": 2,
+    },
+}
+
+DEFAULT_PLATING_CONFIGURATION = "12-well plates, 13 spots"
+DEFAULT_MULTICHANNEL_PLATING_CONFIGURATION = "96-well drop plating"
+
+def available_agar_slots(multichannel=False, pipelined=False, occupied_slots=()):
+    """
+    Returns the deck slots agar plates can be loaded on.
+
+    Args:
+        multichannel (bool): Whether the competent cell reservoir of multichannel mode is loaded.
+        pipelined (bool): Whether the plate of the next pipelined reaction plate is loaded.
+        occupied_slots (iterable): Slots given to other labware by the template parameters.
+
+    Returns:
+        list: Free deck slots.
+    """
+    used_slots = set(occupied_slots)
+    if multichannel:
+        used_slots.add(CELL_RESERVOIR_SLOT)
+    if pipelined:
+        used_slots.add(SETUP_PLATE_SLOT)
+    return [slot for slot in AGAR_SLOTS if slot not in used_slots]
+
+def plating_configurations(multichannel=False):
+    """
+    Returns the names of the plating configurations usable with the loaded p300.
+
+    The 8-channel pipette spots a whole reaction column at once, so it needs agar labware with 8 rows.
+    """
+    return [name for name, configuration in PLATING_CONFIGURATIONS.items()
+            if not multichannel or labware_grid(configuration["labware"])[0] == 8]
+
+def plating_settings(configuration_name, slots, multichannel=False):
+    """
+    Builds the plating settings passed to the templates.
+
+    Args:
+        configuration_name (str): Key of PLATING_CONFIGURATIONS.
+        slots (list): Deck slots to load agar plates on.
+        multichannel (bool): Whether the 8-channel pipette plates whole columns.
+
+    Returns:
+        dict: The configuration with its slots.
+
+    Raises:
+        ValueError: If the configuration does not suit the pipette, or no slot is given.
+    """
+    if configuration_name not in plating_configurations(multichannel):
+        raise ValueError(f'Plating configuration "{configuration_name}" cannot be used with the '
+                         f'{"8-channel" if multichannel else "single-channel"} p300.')
+    if not slots:
+        raise ValueError("Plating needs at least one free deck slot for an agar plate.")
+    return dict(PLATING_CONFIGURATIONS[configuration_name], slots=list(slots))
+
+def summarise_plating(num_reactions, settings, multichannel=False, plate_capacity=PLATE_CAPACITY):
+    """
+    Counts the agar plates and the operator pauses to replace them.
+
+    Follows the template: reactions, or reaction columns with the 8-channel pipette, go to
+    successive agar wells over all loaded plates, and the operator replaces the plates once
+    every well is used.
+
+    Args:
+        num_reactions (int): Number of reactions.
+        settings (dict): Plating settings as returned by plating_settings.
+        multichannel (bool): Whether the 8-channel pipette plates whole columns.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        dict: Agar plates used, pauses to replace agar plates, and spots dispensed.
+    """
+    rows, columns = labware_grid(settings["labware"])[:2]
+    positions_per_plate = columns if multichannel else rows * columns
+    agar_plates = pauses = 0
+    for i in range(0, num_reactions, plate_capacity):
+        plate_reactions = min(plate_capacity, num_reactions - i)
+        plated = math.ceil(plate_reactions / 8) if multichannel else plate_reactions
+        agar_plates += math.ceil(plated / positions_per_plate)
+        pauses += math.ceil(plated / (positions_per_plate * len(settings["slots"]))) - 1
+    return {"agar_plates": agar_plates, "plate_change_pauses": pauses,
+            "spots": num_reactions * len(settings["spots"])}
@@ -0,0 +1,148 @@
+import math
+
+from sharding import PLATE_CAPACITY, shard_combinations
+
+# Golden Gate thermocycler programs, chosen per reaction plate from the complexity of its assemblies
+
+# Cycles of digestion and ligation, then the final digestion and inactivation steps
+GG_PROGRAMS = {
+    "short": {
+        "cycles": 10,
+        "steps": [{"temperature": 37, "hold_time_seconds": 300}, {"temperature": 16, "hold_time_seconds": 120}],
+        "final_steps": [{"temperature": 60, "hold_time_seconds": 300}],
+    },
+    "standard": {
+        "cycles": 25,
+        "steps": [{"temperature": 37, "hold_time_seconds": 300}, {"temperature": 16, "hold_time_seconds": 120}],
+        "final_steps": [{"temperature": 60, "hold_time_seconds": 300}],
+    },
+    "long": {
+        "cycles": 30,
+        "steps": [{"temperature": 37, "hold_time_seconds": 300}, {"temperature": 16, "hold_time_seconds": 120}],
+        "final_steps": [{"temperature": 60, "hold_time_seconds": 300}],
+    },
+}
+
+DEFAULT_GG_PROGRAM = "standard"
+
+# Assemblies of up to this many parts, plasmid backbone included, get the short program
+SHORT_PROGRAM_MAX_PARTS = 3
+
+def program_hold_seconds(program):
+    """
+    Returns the time the thermocycler holds its temperatures during a GG program given by its steps.
+    """
+    return (program["cycles"] * sum(step["hold_time_seconds"] for step in program["steps"])
+            + sum(step["hold_time_seconds"] for step in program["final_steps"]))
+
+def program_seconds(program_name):
+    """
+    Returns the time the thermocycler holds its temperatures during a GG program.
+    """
+    return program_hold_seconds(GG_PROGRAMS[program_name])
+
+def choose_program(combination, assigned_programs=None):
+    """
+    Chooses the GG program of a combination.
+
+    Args:
+        combination (dict): Combination with its name and parts.
+        assigned_programs (dict): Program names by combination name, e.g. from a user-supplied
+            profile column; other combinations are assigned by part count.
+
+    Returns:
+        str: Key of GG_PROGRAMS.
+
+    Raises:
+        ValueError: If an assigned program is unknown.
+    """
+    if assigned_programs and combination["name"] in assigned_programs:
+        program_name = assigned_programs[combination["name"]]
+        if program_name not in GG_PROGRAMS:
+            raise ValueError(f'Unknown GG program "{program_name}" for combination "{combination["name"]}"; '
+                             f'expected one of {", ".join(GG_PROGRAMS)}.')
+        return program_name
+    return "short" if len(combination["parts"]) <= SHORT_PROGRAM_MAX_PARTS else DEFAULT_GG_PROGRAM
+
+def plate_programs(program_reactions, plate_capacity=PLATE_CAPACITY):
+    """
+    Returns the program each reaction plate runs when reactions are grouped as by plan_gg_programs.
+
+    Args:
+        program_reactions (Counter): Number of reactions per key of GG_PROGRAMS.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        list: Key of GG_PROGRAMS of each plate.
+    """
+    ordered = sorted((program_name for program_name, count in program_reactions.items() if count > 0),
+                     key=program_seconds, reverse=True)
+    programs = []
+    filled = 0
+    for program_name in ordered:
+        end = filled + program_reactions[program_name]
+        # A plate runs the program of its first, longest-running reaction
+        programs.extend([program_name] * (math.ceil(end / plate_capacity) - math.ceil(filled / plate_capacity)))
+        filled = end
+    return programs
+
+def plan_gg_programs(combinations_to_make, assigned_programs=None, plate_capacity=PLATE_CAPACITY):
+    """
+    Groups combinations by GG program over reaction plates, and chooses the program of each plate.
+
+    Every plate runs the longest program any of its reactions needs. Combinations are
+    therefore ordered by program, longest first, before being split over plates, so the
+    number of plates does not grow while as many plates as possible run a shorter program.
+    Within a program, combinations sharing parts are kept together as in shard_combinations.
+    If grouping would not shorten the thermocycler hold time, the plates are split as in
+    shard_combinations instead, keeping their parts shared.
+
+    Args:
+        combinations_to_make (list): List of combinations.
+        assigned_programs (dict): Program names by combination name, overriding the part count.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        dict: Combinations split per reaction plate, the program of each plate, whether they
+        were grouped by program, the thermocycler hold time saved by grouping, and the hold time
+        added by programs longer than the standard one, against running it on every plate.
+    """
+    program_names = [choose_program(combination, assigned_programs) for combination in combinations_to_make]
+    groups = {}
+    for combination, program_name in zip(combinations_to_make, program_names):
+        groups.setdefault(program_name, []).append(combination)
+
+    ordered = []
+    for program_name in sorted(groups, key=program_seconds, reverse=True):
+        group = groups[program_name]
+        shards = shard_combinations(group, plate_capacity) if len(group) > plate_capacity else [group]
+        ordered.extend((combination, program_name) for shard in shards for combination in shard)
+
+    shards = []
+    programs = []
+    for i in range(0, len(ordered), plate_capacity):
+        plate = ordered[i:i + plate_capacity]
+        shards.append([combination for combination, _ in plate])
+        programs.append(max((program_name for _, program_name in plate), key=program_seconds))
+
+    # Plates split without regard to programs, as when programs are not adapted
+    program_by_combination = {id(combination): program_name
+                              for combination, program_name in zip(combinations_to_make, program_names)}
+    ungrouped_shards = (shard_combinations(combinations_to_make, plate_capacity)
+                        if len(combinations_to_make) > plate_capacity else [combinations_to_make])
+    ungrouped_programs = [max((program_by_combination[id(combination)] for combination in shard), key=program_seconds)
+                          for shard in ungrouped_shards if shard]
+
+    hold_seconds = sum(program_seconds(program_name) for program_name in programs)
+    ungrouped_hold_seconds = sum(program_seconds(program_name) for program_name in ungrouped_programs)
+    grouped = hold_seconds < ungrouped_hold_seconds and len(shards) <= len(ungrouped_programs)
+    if not grouped:
+        shards = [shard for shard in ungrouped_shards if shard]
+        programs, hold_seconds = ungrouped_programs, ungrouped_hold_seconds
+    return {
+        "shards": shards,
+        "programs": programs,
+        "grouped": grouped,
+        "saved_seconds": ungrouped_hold_seconds - hold_seconds,
+        "added_seconds": max(hold_seconds - len(programs) * program_seconds(DEFAULT_GG_PROGRAM), 0),
+    }
@@ -0,0 +1,196 @@
+import argparse
+import csv
+import io
+import json
+import re
+import sys
+
+from simulator import (STEP_END_MARKER, STEP_START_MARKER, STEP_TIMESTAMP_SEPARATOR, SimulationError, format_duration,
+                       simulate_protocol)
+
+# Analysis of the run logs of instrumented protocols: measured step durations against the simulated ones
+#
+#     python streamlit_app/run_log.py protocol.py run1.json run2.json
+
+# Step markers anywhere in a log, whether exported as text or as JSON commands
+STEP_MARKER_PATTERN = re.compile(
+    "(" + re.escape(STEP_START_MARKER) + "|" + re.escape(STEP_END_MARKER) + r")(.+?)"
+    + re.escape(STEP_TIMESTAMP_SEPARATOR) + r"(\d+(?:\.\d+)?)"
+)
+# Step names without their plate number, part name or well, e.g. 'plate 2 part pYTK001' -> 'part transfers'
+STEP_KINDS = [
+    (re.compile(r"^plate \d+ part "), "part transfers"),
+    (re.compile(r"^plate \d+ plating "), "plating"),
+    (re.compile(r"^plate \d+ "), ""),
+]
+SUMMARY_COLUMNS = ["step", "runs", "median_seconds", "p90_seconds", "max_seconds", "predicted_seconds",
+                   "excess_seconds"]
+
+def parse_run_log(log_text):
+    """
+    Measures every step of a run from the timestamped markers of an instrumented protocol.
+
+    Steps repeated in a run, e.g. the transfers of a part needing several aspirations, are
+    added up. Steps started but not ended, as in an aborted run, are left out.
+
+    Args:
+        log_text (str): Exported run log, as text or JSON.
+
+    Returns:
+        dict: Duration in seconds by step name.
+    """
+    starts = {}
+    step_seconds = {}
+    for marker, step, timestamp in STEP_MARKER_PATTERN.findall(log_text):
+        if marker == STEP_START_MARKER:
+            starts[step] = float(timestamp)
+        elif step in starts:
+            step_seconds[step] = step_seconds.get(step, 0.0) + float(timestamp) - starts.pop(step)
+    return step_seconds
+
+def step_kind(step):
+    """
+    Returns the kind of a step, so steps of all plates, parts and wells can be compared together.
+    """
+    for pattern, kind in STEP_KINDS:
+        if pattern.match(step):
+            return kind or pattern.sub("", step)
+    return step
+
+def group_steps_by_kind(step_seconds):
+    """
+    Adds up the durations of the steps of each kind.
+    """
+    kind_seconds = {}
+    for step, seconds in step_seconds.items():
+        kind = step_kind(step)
+        kind_seconds[kind] = kind_seconds.get(kind, 0.0) + seconds
+    return kind_seconds
+
+def percentile(values, fraction):
+    """
+    Returns a percentile of a list of numbers, interpolating between the closest ranks.
+    """
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarise_runs(runs, predicted=None):
+    """
+    Compares the measured duration of every step over several runs with its prediction.
+
+    Args:
+        runs (list): Durations by step, one dictionary per run, as returned by parse_run_log.
+        predicted (dict): Simulated durations by step, as the 'step_seconds' of a simulation report.
+
+    Returns:
+        list: One row per step with the keys of SUMMARY_COLUMNS, largest excess over the
+        prediction first, so the hot spots come on top.
+    """
+    predicted = predicted or {}
+    durations = {}
+    for step_seconds in runs:
+        for step, seconds in step_seconds.items():
+            durations.setdefault(step, []).append(seconds)
+
+    rows = []
+    for step, values in durations.items():
+        median = percentile(values, 0.5)
+        rows.append({
+            "step": step,
+            "runs": len(values),
+            "median_seconds": round(median, 1),
+            "p90_seconds": round(percentile(values, 0.9), 1),
+            "max_seconds": round(max(values), 1),
+            "predicted_seconds": round(predicted[step], 1) if step in predicted else None,
+            "excess_seconds": round(median - predicted[step], 1) if step in predicted else None,
+        })
+    rows.sort(key=lambda row: (row["excess_seconds"] is None, -(row["excess_seconds"] or 0), -row["median_seconds"]))
+    return rows
+
+def analyse_run_logs(protocol_string, log_texts, by_kind=True):
+    """
+    Measures the steps of several runs of an instrumented protocol against its simulation.
+
+    Args:
+        protocol_string (str): The instrumented protocol, as generated.
+        log_texts (list): Exported run logs of the protocol.
+        by_kind (bool): Add up the steps of each kind, e.g. all part transfers, instead of
+            reporting every step on its own.
+
+    Returns:
+        list: Summary rows as returned by summarise_runs.
+
+    Raises:
+        SimulationError: If the protocol does something the robot would refuse to do.
+        ValueError: If the protocol is not instrumented, or no log holds a complete step.
+    """
+    predicted = simulate_protocol(protocol_string)["step_seconds"]
+    if not predicted:
+        raise ValueError("The protocol has no step markers; generate it with instrumentation.")
+    runs = [parse_run_log(log_text) for log_text in log_texts]
+    runs = [step_seconds for step_seconds in runs if step_seconds]
+    if not runs:
+        raise ValueError("No step markers found in the run logs.")
+    if by_kind:
+        predicted = group_steps_by_kind(predicted)
+        runs = [group_steps_by_kind(step_seconds) for step_seconds in runs]
+    return summarise_runs(runs, predicted)
+
+def export_summary_csv(rows):
+    """
+    Writes summary rows as CSV.
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=SUMMARY_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+def format_summary(rows):
+    """
+    Formats summary rows for the terminal.
+    """
+    lines = []
+    for row in rows:
+        line = f"{row['step']}: median {format_duration(row['median_seconds'])}, p90 {format_duration(row['p90_seconds'])}"
+        if row["predicted_seconds"] is not None:
+            line += f", predicted {format_duration(row['predicted_seconds'])} ({row['excess_seconds']:+.0f} s)"
+        lines.append(f"{line} over {row['runs']} run(s)")
+    return "\n".join(lines)
+
+def main():
+    """
+    Command line entry point for the run log analysis.
+    """
+    parser = argparse.ArgumentParser(description="Compare the run logs of an instrumented protocol with its simulation.")
+    parser.add_argument("protocol", help="Instrumented protocol, as generated")
+    parser.add_argument("logs", nargs="+", help="Run logs exported from the robot, as text or JSON")
+    parser.add_argument("--by-step", action="store_true",
+                        help="Report every step, e.g. each part and plating well, instead of each kind of step")
+    parser.add_argument("--csv", action="store_true", help="Print CSV instead of text")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    args = parser.parse_args()
+
+    with open(args.protocol, encoding="utf-8") as protocol_file:
+        protocol_string = protocol_file.read()
+    log_texts = []
+    for log_path in args.logs:
+        with open(log_path, encoding="utf-8") as log_file:
+            log_texts.append(log_file.read())
+    try:
+        rows = analyse_run_logs(protocol_string, log_texts, by_kind=not args.by_step)
+    except (SimulationError, ValueError) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    elif args.csv:
+        print(export_summary_csv(rows), end="")
+    else:
+        print(format_summary(rows))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from profiles import DEFAULT_GG_PROGRAM, program_seconds
+
+# Scheduling of several reaction plates in one run, setting up the next plate while the current one cycles
+
+# Time the thermocycler holds its temperatures during the default GG program of the templates
+GG_HOLD_SECONDS = program_seconds(DEFAULT_GG_PROGRAM)
+
+# The templates only start a setup step during a hold if at least this much of the hold is left
+SETUP_STEP_MARGIN_SECONDS = 30
+
+# Phases of the templates, in run order
+PHASES = ["assembly", "GG cycling", "heat shock", "plating"]
+
+def schedule_batches(batch_phase_seconds, pipelined=True, hold_seconds=GG_HOLD_SECONDS):
+    """
+    Lays out the phases of successive reaction plates on one robot.
+
+    Back to back, each plate runs assembly, GG cycling, heat shock and plating before the next
+    plate starts. Pipelined, the assembly of the next plate runs during the GG holds of the
+    current one, into a plate in slot 9; only assembly that does not fit in the holds adds time.
+
+    Args:
+        batch_phase_seconds (list): Phase durations of each plate run on its own, as the
+            'phase_seconds' of its simulation report.
+        pipelined (bool): Set up the next plate while the current one cycles.
+        hold_seconds (float or list): Time the thermocycler holds its temperatures during GG
+            cycling, for all plates or per plate.
+
+    Returns:
+        dict: The makespan and the timeline as a list of phases with their plate, start and end.
+    """
+    if not isinstance(hold_seconds, list):
+        hold_seconds = [hold_seconds] * len(batch_phase_seconds)
+    timeline = []
+    clock = 0.0
+    for plate_index, phase_seconds in enumerate(batch_phase_seconds):
+        for phase in PHASES:
+            seconds = phase_seconds.get(phase, 0.0)
+            if pipelined and phase == "assembly" and plate_index > 0:
+                # Set up during the previous plate's GG cycling; only the overrun is left
+                seconds = max(seconds - max(hold_seconds[plate_index - 1] - SETUP_STEP_MARGIN_SECONDS, 0), 0.0)
+            if phase == "assembly" and plate_index == 0:
+                seconds += phase_seconds.get("setup", 0.0)
+            timeline.append({"plate": plate_index + 1, "phase": phase, "start_seconds": clock,
+                             "end_seconds": clock + seconds})
+            clock += seconds
+    return {"makespan_seconds": clock, "timeline": timeline}
+
+def compare_schedules(batch_phase_seconds, hold_seconds=GG_HOLD_SECONDS):
+    """
+    Reports the makespan of pipelined plates against running them back to back.
+
+    Args:
+        batch_phase_seconds (list): Phase durations of each plate run on its own.
+        hold_seconds (float or list): Time the thermocycler holds its temperatures during GG
+            cycling, for all plates or per plate.
+
+    Returns:
+        dict: Back-to-back and pipelined makespans, the time saved, and the pipelined timeline.
+    """
+    back_to_back = schedule_batches(batch_phase_seconds, pipelined=False, hold_seconds=hold_seconds)
+    pipelined = schedule_batches(batch_phase_seconds, pipelined=True, hold_seconds=hold_seconds)
+    return {
+        "back_to_back_seconds": back_to_back["makespan_seconds"],
+        "pipelined_seconds": pipelined["makespan_seconds"],
+        "saved_seconds": back_to_back["makespan_seconds"] - pipelined["makespan_seconds"],
+        "timeline": pipelined["timeline"],
+    }
@@ -0,0 +1,120 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+
+# Functions for splitting large assembly jobs over several reaction plates
+
+PLATE_CAPACITY = 96
+SHARDING_WINDOW_PLATES = 8
+
+def count_part_usage(combinations_to_make):
+    """
+    Counts in how many combinations each DNA part is used.
+
+    Args:
+        combinations_to_make (list): List of combinations.
+
+    Returns:
+        Counter: Number of combinations using each part.
+    """
+    return Counter(part for combination in combinations_to_make for part in set(combination["parts"]))
+
+def fill_shards(combinations_to_make, plate_capacity=PLATE_CAPACITY):
+    """
+    Greedily fills plate-sized shards with combinations adding the fewest new parts.
+
+    Each shard is grown one combination at a time, always taking the combination
+    with the fewest parts not already on the plate.
+
+    Args:
+        combinations_to_make (list): List of combinations.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        list: A list of shards, each a list of combinations.
+    """
+    parts_by_combination = [set(combination["parts"]) for combination in combinations_to_make]
+    combinations_by_part = defaultdict(list)
+    for i, parts in enumerate(parts_by_combination):
+        for part in parts:
+            combinations_by_part[part].append(i)
+
+    remaining = set(range(len(combinations_to_make)))
+    shards = []
+    while remaining:
+        missing_parts = {i: len(parts_by_combination[i]) for i in remaining}
+        candidates = [(count, i) for i, count in missing_parts.items()]
+        heapq.heapify(candidates)
+        shard, shard_parts = [], set()
+        while candidates and len(shard) < plate_capacity:
+            count, i = heapq.heappop(candidates)
+            if i not in remaining or missing_parts[i] != count:
+                continue  # Stale entry, the combination was taken or gained parts since
+            remaining.discard(i)
+            shard.append(combinations_to_make[i])
+            for part in parts_by_combination[i] - shard_parts:
+                shard_parts.add(part)
+                for j in combinations_by_part[part]:
+                    if j in remaining:
+                        missing_parts[j] -= 1
+                        heapq.heappush(candidates, (missing_parts[j], j))
+        shards.append(shard)
+    return shards
+
+def shard_combinations(combinations_to_make, plate_capacity=PLATE_CAPACITY, window_plates=SHARDING_WINDOW_PLATES):
+    """
+    Splits the combinations into shards that each fit on one reaction plate.
+
+    Combinations are first ordered by the parts they use, most widely shared parts
+    first, so combinations sharing parts end up next to each other. The ordered list
+    is then cut into windows of a few plates, and each window is filled greedily with
+    fill_shards. Each part tube is therefore visited in as few shards as possible,
+    while the cost stays linear in the number of combinations.
+
+    Args:
+        combinations_to_make (list): List of combinations.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+        window_plates (int): Number of plates considered together by the greedy fill.
+
+    Returns:
+        list: A list of shards, each a list of combinations.
+
+    Raises:
+        ValueError: If the plate capacity is not a positive number.
+    """
+    if plate_capacity < 1:
+        raise ValueError(f'Plate capacity must be at least 1, got {plate_capacity}.')
+
+    part_usage = count_part_usage(combinations_to_make)
+    part_rank = {part: rank for rank, (part, _) in
+                 enumerate(sorted(part_usage.items(), key=lambda item: (-item[1], item[0])))}
+
+    ordered_combinations = sorted(
+        combinations_to_make,
+        key=lambda combination: sorted(part_rank[part] for part in set(combination["parts"]))
+    )
+    window_size = plate_capacity * max(window_plates, 1)
+    shards = []
+    for i in range(0, len(ordered_combinations), window_size):
+        shards.extend(fill_shards(ordered_combinations[i:i + window_size], plate_capacity))
+    return shards
+
+def summarise_shards(shards, plate_capacity=PLATE_CAPACITY):
+    """
+    Reports how often the part tubes have to be visited across the shards.
+
+    Args:
+        shards (list): Shards as returned by shard_combinations.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        dict: Number of shards, reactions per shard, part visits and the lower bound on part visits.
+    """
+    part_visits = sum(len(count_part_usage(shard)) for shard in shards)
+    part_usage = count_part_usage([combination for shard in shards for combination in shard])
+    return {
+        "shards": len(shards),
+        "reactions_per_shard": [len(shard) for shard in shards],
+        "part_visits": part_visits,
+        "min_part_visits": sum(math.ceil(count / plate_capacity) for count in part_usage.values()),
+    }
@@ -0,0 +1,659 @@
+import argparse
+import contextlib
+import json
+import math
+import sys
+import types
+from collections import Counter, namedtuple
+
+from deck import (PIPETTE_MAX_VOLUMES, PIPETTE_MIN_VOLUMES, THERMOCYCLER_SLOT, TRASH_POSITION, labware_origin,
+                  module_type, well_coordinates, well_names)
+
+# Offline stand-in for the parts of the Opentrons protocol API used by the templates.
+# Running a generated protocol against it gives a run time estimate per phase, the gantry
+# travel, tip counts and pause points, without a robot or the opentrons package.
+
+DEFAULT_TIMINGS = {
+    "gantry_speed": 400.0,  # mm/s
+    "move_overhead_seconds": 0.6,  # Lifting to a safe height and lowering again
+    "pick_up_tip_seconds": 3.5,
+    "drop_tip_seconds": 2.5,
+    "blow_out_seconds": 0.8,
+    "lid_seconds": 20.0,  # Opening or closing the thermocycler lid
+    "block_heating_rate": 4.0,  # °C/s
+    "block_cooling_rate": 2.0,  # °C/s
+    "lid_heating_rate": 0.3,  # °C/s
+    "temperature_module_rate": 0.1,  # °C/s
+}
+
+# Default aspirate and dispense flow rates in µL/s
+FLOW_RATES = {
+    "p10_single": (5.0, 10.0),
+    "p10_multi": (5.0, 10.0),
+    "p20_single_gen2": (3.78, 3.78),
+    "p20_multi_gen2": (7.6, 7.6),
+    "p300_single": (150.0, 300.0),
+    "p300_multi": (150.0, 300.0),
+    "p300_single_gen2": (92.86, 92.86),
+    "p300_multi_gen2": (94.0, 94.0),
+}
+
+ROOM_TEMPERATURE = 23.0
+
+PHASE_MARKER = "Phase: "
+# Phase in which the competent cells are added to the reaction plate, before its heat shock
+CELL_ADDITION_PHASE = "heat shock"
+# Markers of instrumented protocols: "Step start: <step> @ <timestamp>", then "Step end: ..." for the same step
+STEP_START_MARKER = "Step start: "
+STEP_END_MARKER = "Step end: "
+STEP_TIMESTAMP_SEPARATOR = " @ "
+
+class SimulationError(Exception):
+    """Raised when a protocol does something the robot would refuse to do."""
+
+class OutOfTipsError(SimulationError):
+    """Raised when a pipette runs out of tips."""
+
+class Point(namedtuple("Point", ["x", "y", "z"])):
+    """A position or offset on the deck, in mm."""
+
+    def __new__(cls, x=0.0, y=0.0, z=0.0):
+        return super().__new__(cls, x, y, z)
+
+    def __add__(self, other):
+        return Point(self.x + other.x, self.y + other.y, self.z + other.z)
+
+class Location:
+    """A point on the deck, optionally tied to the labware or well it belongs to."""
+
+    def __init__(self, point, labware=None):
+        self.point = point
+        self.labware = labware
+
+    def move(self, point):
+        return Location(self.point + point, self.labware)
+
+class Well:
+    """A single well of a labware."""
+
+    def __init__(self, parent, name, index, x, y):
+        self.parent = parent
+        self.well_name = name
+        self.index = index
+        self._point = Point(x, y, 0.0)
+
+    def top(self, z=0.0):
+        return Location(self._point + Point(0, 0, z), self)
+
+    def bottom(self, z=0.0):
+        return Location(self._point + Point(0, 0, z), self)
+
+    def center(self):
+        return Location(self._point, self)
+
+    @property
+    def display_name(self):
+        return f"{self.well_name} of {self.parent.name}"
+
+class Labware:
+    """A labware placed on a deck slot or a module."""
+
+    def __init__(self, load_name, slot, label=None, module=None):
+        self.load_name = load_name
+        self.name = label or load_name
+        self.slot = str(slot)
+        origin = labware_origin(slot, module)
+        names = well_names(load_name)
+        self._wells = [Well(self, name, i, x, y) for i, (name, (x, y))
+                       in enumerate(zip(names, well_coordinates(load_name, origin)))]
+        self._wells_by_name = {well.well_name: well for well in self._wells}
+
+    def wells(self, *names):
+        if names:
+            return [self._wells_by_name[name] for name in names]
+        return list(self._wells)
+
+    def wells_by_name(self):
+        return dict(self._wells_by_name)
+
+    def __getitem__(self, name):
+        return self._wells_by_name[name]
+
+    def columns(self):
+        columns = {}
+        for well in self._wells:
+            columns.setdefault(well.well_name[1:], []).append(well)
+        return list(columns.values())
+
+    def rows(self):
+        rows = {}
+        for well in self._wells:
+            rows.setdefault(well.well_name[0], []).append(well)
+        return list(rows.values())
+
+class ThermocyclerContext:
+    """The thermocycler module."""
+
+    def __init__(self, protocol):
+        self._protocol = protocol
+        self.labware = None
+        self.block_temperature = ROOM_TEMPERATURE
+        self.lid_temperature = ROOM_TEMPERATURE
+        self.lid_position = "open"
+
+    def load_labware(self, load_name, label=None):
+        self.labware = Labware(load_name, "7", label, module="thermocycler")
+        return self.labware
+
+    def open_lid(self):
+        self._protocol._record("open_lid", self._protocol.timings["lid_seconds"])
+        self.lid_position = "open"
+
+    def close_lid(self):
+        self._protocol._record("close_lid", self._protocol.timings["lid_seconds"])
+        self.lid_position = "closed"
+
+    def _ramp_seconds(self, temperature):
+        timings = self._protocol.timings
+        change = temperature - self.block_temperature
+        rate = timings["block_heating_rate"] if change > 0 else timings["block_cooling_rate"]
+        self.block_temperature = temperature
+        return abs(change) / rate
+
+    def set_block_temperature(self, temperature, hold_time_seconds=None, hold_time_minutes=None,
+                              ramp_rate=None, block_max_volume=None):
+        hold_seconds = (hold_time_seconds or 0) + 60 * (hold_time_minutes or 0)
+        self._protocol._record("set_block_temperature", self._ramp_seconds(temperature) + hold_seconds)
+
+    def set_lid_temperature(self, temperature):
+        seconds = max(temperature - self.lid_temperature, 0) / self._protocol.timings["lid_heating_rate"]
+        self.lid_temperature = temperature
+        self._protocol._record("set_lid_temperature", seconds)
+
+    def execute_profile(self, steps, repetitions, block_max_volume=None):
+        seconds = 0.0
+        for _ in range(repetitions):
+            for step in steps:
+                seconds += self._ramp_seconds(step["temperature"])
+                seconds += step.get("hold_time_seconds", 0) + 60 * step.get("hold_time_minutes", 0)
+        self._protocol._record("execute_profile", seconds)
+
+    def deactivate_lid(self):
+        self.lid_temperature = ROOM_TEMPERATURE
+        self._protocol._record("deactivate_lid", 0.0)
+
+    def deactivate_block(self):
+        self.block_temperature = ROOM_TEMPERATURE
+        self._protocol._record("deactivate_block", 0.0)
+
+    def deactivate(self):
+        self.lid_temperature = self.block_temperature = ROOM_TEMPERATURE
+        self._protocol._record("deactivate", 0.0)
+
+class TemperatureModuleContext:
+    """The temperature module."""
+
+    def __init__(self, protocol, slot):
+        self._protocol = protocol
+        self.slot = str(slot)
+        self.labware = None
+        self.temperature = ROOM_TEMPERATURE
+
+    def load_labware(self, load_name, label=None):
+        self.labware = Labware(load_name, self.slot, label, module="temperature")
+        return self.labware
+
+    def set_temperature(self, celsius):
+        seconds = abs(celsius - self.temperature) / self._protocol.timings["temperature_module_rate"]
+        self.temperature = celsius
+        self._protocol._record("set_temperature", seconds)
+
+    def deactivate(self):
+        self.temperature = ROOM_TEMPERATURE
+        self._protocol._record("deactivate", 0.0)
+
+class FlowRates:
+    """Aspirate, dispense and blow out flow rates of a pipette, in µL/s."""
+
+    def __init__(self, aspirate, dispense):
+        self.aspirate = aspirate
+        self.dispense = dispense
+        self.blow_out = dispense
+
+class InstrumentContext:
+    """A pipette mounted on the gantry."""
+
+    def __init__(self, protocol, instrument_name, mount, tip_racks):
+        if instrument_name not in PIPETTE_MAX_VOLUMES:
+            raise SimulationError(f'Unknown pipette "{instrument_name}".')
+        self._protocol = protocol
+        self.name = instrument_name
+        self.mount = mount
+        self.tip_racks = list(tip_racks or [])
+        self.channels = 8 if "multi" in instrument_name else 1
+        self.max_volume = PIPETTE_MAX_VOLUMES[instrument_name]
+        self.min_volume = PIPETTE_MIN_VOLUMES[instrument_name]
+        self.flow_rate = FlowRates(*FLOW_RATES[instrument_name])
+        self.current_volume = 0.0
+        self.has_tip = False
+        self.tips_used = 0
+        self._next_tip = 0
+        self._tip_location = None
+        self._returned_tips = set()
+
+    # Tip handling
+
+    def _tip_wells(self):
+        if self.channels == 1:
+            return [well for rack in self.tip_racks for well in rack.wells()]
+        return [column[0] for rack in self.tip_racks for column in rack.columns()]
+
+    def pick_up_tip(self, location=None):
+        if self.has_tip:
+            raise SimulationError(f"{self.name} already has a tip attached.")
+        if location is None:
+            tip_wells = self._tip_wells()
+            if self._next_tip >= len(tip_wells):
+                raise OutOfTipsError(f"{self.name} has run out of tips after {self.tips_used} pick-ups.")
+            location = tip_wells[self._next_tip]
+            self._next_tip += 1
+        self._protocol._move_to(location)
+        # A tip put back with return_tip is picked up again without using a new one
+        reused = id(location) in self._returned_tips
+        self._returned_tips.discard(id(location))
+        self._protocol._record("pick_up_tip", self._protocol.timings["pick_up_tip_seconds"],
+                               tips=0 if reused else self.channels)
+        if not reused:
+            self.tips_used += self.channels
+        self._tip_location = location
+        self.has_tip = True
+        return self
+
+    def drop_tip(self, location=None):
+        self._require_tip("drop a tip")
+        self._protocol._move_to(location or Location(Point(*TRASH_POSITION)))
+        self._protocol._record("drop_tip", self._protocol.timings["drop_tip_seconds"])
+        self.has_tip = False
+        self.current_volume = 0.0
+        return self
+
+    def return_tip(self):
+        self.drop_tip(self._tip_location)
+        self._returned_tips.add(id(self._tip_location))
+        return self
+
+    def reset_tipracks(self):
+        self._next_tip = 0
+        self._returned_tips.clear()
+
+    # Liquid handling
+
+    def _require_tip(self, action):
+        if not self.has_tip:
+            raise SimulationError(f"{self.name} cannot {action} without a tip.")
+
+    def move_to(self, location):
+        self._protocol._move_to(location)
+        return self
+
+    def aspirate(self, volume=None, location=None, rate=1.0):
+        self._require_tip("aspirate")
+        volume = self.max_volume - self.current_volume if volume is None else volume
+        if self.current_volume + volume > self.max_volume + 1e-6:
+            raise SimulationError(
+                f"{self.name} cannot aspirate {volume} µL on top of {self.current_volume} µL "
+                f"(max {self.max_volume} µL).")
+        if location is not None:
+            self._protocol._move_to(location)
+        self._protocol._record("aspirate", volume / (self.flow_rate.aspirate * rate))
+        self.current_volume += volume
+        return self
+
+    def dispense(self, volume=None, location=None, rate=1.0):
+        self._require_tip("dispense")
+        volume = self.current_volume if volume is None else volume
+        if volume > self.current_volume + 1e-6:
+            raise SimulationError(f"{self.name} cannot dispense {volume} µL, it holds {self.current_volume} µL.")
+        if location is not None:
+            self._protocol._move_to(location)
+        self._protocol._record("dispense", volume / (self.flow_rate.dispense * rate))
+        self.current_volume -= volume
+        if location is not None:
+            self._protocol._record_cell_dispense(location)
+        return self
+
+    def mix(self, repetitions=1, volume=None, location=None, rate=1.0):
+        self._require_tip("mix")
+        volume = self.max_volume if volume is None else volume
+        if location is not None:
+            self._protocol._move_to(location)
+        seconds = repetitions * (volume / (self.flow_rate.aspirate * rate) + volume / (self.flow_rate.dispense * rate))
+        self._protocol._record("mix", seconds)
+        return self
+
+    def blow_out(self, location=None):
+        if location is not None:
+            self._protocol._move_to(location)
+        self._protocol._record("blow_out", self._protocol.timings["blow_out_seconds"])
+        self.current_volume = 0.0
+        return self
+
+    def touch_tip(self, location=None, radius=1.0, v_offset=-1.0, speed=60.0):
+        self._protocol._record("touch_tip", 1.5)
+        return self
+
+    def air_gap(self, volume=None, height=None):
+        volume = self.min_volume if volume is None else volume
+        self._protocol._record("air_gap", volume / self.flow_rate.aspirate)
+        self.current_volume += volume
+        return self
+
+    # Complex liquid handling
+
+    def _start_tip(self, new_tip):
+        if new_tip != "never" and not self.has_tip:
+            self.pick_up_tip()
+        self._require_tip("transfer liquid")
+
+    def _end_tip(self, new_tip):
+        if new_tip != "never":
+            self.drop_tip()
+
+    def transfer(self, volume, source, dest, new_tip="once", mix_before=None, mix_after=None, **kwargs):
+        sources = source if isinstance(source, list) else [source]
+        dests = dest if isinstance(dest, list) else [dest]
+        pairs = max(len(sources), len(dests))
+        volumes = volume if isinstance(volume, list) else [volume] * pairs
+        if len(sources) == 1:
+            sources = sources * pairs
+        if len(dests) == 1:
+            dests = dests * pairs
+        for i, (pair_volume, pair_source, pair_dest) in enumerate(zip(volumes, sources, dests)):
+            if new_tip == "always" or i == 0:
+                self._start_tip(new_tip)
+            chunks = max(math.ceil(pair_volume / self.max_volume), 1)
+            for _ in range(chunks):
+                if mix_before:
+                    self.mix(mix_before[0], mix_before[1], pair_source)
+                self.aspirate(pair_volume / chunks, pair_source)
+                self.dispense(pair_volume / chunks, pair_dest)
+                if mix_after:
+                    self.mix(mix_after[0], mix_after[1], pair_dest)
+            if new_tip == "always":
+                self._end_tip(new_tip)
+        if new_tip == "once":
+            self._end_tip(new_tip)
+        return self
+
+    def distribute(self, volume, source, dest, disposal_volume=None, new_tip="once", blowout_location="trash",
+                   **kwargs):
+        dests = dest if isinstance(dest, list) else [dest]
+        volumes = volume if isinstance(volume, list) else [volume] * len(dests)
+        disposal_volume = self.min_volume if disposal_volume is None else disposal_volume
+        self._start_tip(new_tip)
+        i = 0
+        while i < len(dests):
+            batch_volume = disposal_volume
+            batch = []
+            while i < len(dests) and batch_volume + volumes[i] <= self.max_volume + 1e-6:
+                batch_volume += volumes[i]
+                batch.append((volumes[i], dests[i]))
+                i += 1
+            if not batch:
+                raise SimulationError(f"{volumes[i]} µL plus {disposal_volume} µL disposal does not fit in {self.name}.")
+            self.aspirate(batch_volume, source)
+            for dispense_volume, dispense_dest in batch:
+                self.dispense(dispense_volume, dispense_dest)
+            if disposal_volume:
+                self.blow_out(source if blowout_location == "source well" else Location(Point(*TRASH_POSITION)))
+        self._end_tip(new_tip)
+        return self
+
+    def consolidate(self, volume, source, dest, new_tip="once", **kwargs):
+        sources = source if isinstance(source, list) else [source]
+        volumes = volume if isinstance(volume, list) else [volume] * len(sources)
+        self._start_tip(new_tip)
+        held = 0.0
+        for source_volume, source_well in zip(volumes, sources):
+            if held + source_volume > self.max_volume + 1e-6:
+                self.dispense(held, dest)
+                held = 0.0
+            self.aspirate(source_volume, source_well)
+            held += source_volume
+        if held:
+            self.dispense(held, dest)
+        self._end_tip(new_tip)
+        return self
+
+class ProtocolContext:
+    """The protocol context a template's run function is called with."""
+
+    def __init__(self, timings=None):
+        self.timings = dict(DEFAULT_TIMINGS, **(timings or {}))
+        self.deck = {}
+        self.instruments = {}
+        self.elapsed_seconds = 0.0
+        self.phase = "setup"
+        self.phase_seconds = {}
+        self.travel_mm = 0.0
+        self.tips = 0
+        self.pauses = []
+        self.comments = []
+        self.step_seconds = {}
+        self._step_starts = {}
+        self.commands = Counter()
+        self.phase_commands = {}
+        self._cell_dispense_times = []  # Times cells reach the reaction plate, one list per plate
+        self._position = Point(*TRASH_POSITION)
+
+    def _count(self, command):
+        self.commands[command] += 1
+        self.phase_commands.setdefault(self.phase, Counter())[command] += 1
+
+    def _record(self, command, seconds, tips=0):
+        self._count(command)
+        self.elapsed_seconds += seconds
+        self.phase_seconds[self.phase] = self.phase_seconds.get(self.phase, 0.0) + seconds
+        self.tips += tips
+
+    def _record_cell_dispense(self, location):
+        well = location.labware if isinstance(location, Location) else location
+        thermocycler = self.deck.get(THERMOCYCLER_SLOT)
+        if (self.phase == CELL_ADDITION_PHASE and isinstance(well, Well)
+                and isinstance(thermocycler, ThermocyclerContext) and well.parent is thermocycler.labware):
+            self._cell_dispense_times[-1].append(self.elapsed_seconds)
+
+    def _move_to(self, location):
+        if isinstance(location, Well):
+            location = location.top()
+        point = location.point
+        distance = math.hypot(point.x - self._position.x, point.y - self._position.y)
+        self._position = point
+        self.travel_mm += distance
+        self._record("move", distance / self.timings["gantry_speed"] + self.timings["move_overhead_seconds"])
+
+    def load_labware(self, load_name, location, label=None):
+        labware = Labware(load_name, location, label)
+        self.deck[str(location)] = labware
+        return labware
+
+    def load_instrument(self, instrument_name, mount, tip_racks=None):
+        instrument = InstrumentContext(self, instrument_name, mount, tip_racks)
+        self.instruments[mount] = instrument
+        return instrument
+
+    def load_module(self, module_name, location=None):
+        if module_type(module_name) == "thermocycler":
+            module = ThermocyclerContext(self)
+            for slot in ("7", "8", "10", "11"):
+                self.deck[slot] = module
+        else:
+            module = TemperatureModuleContext(self, location)
+            self.deck[str(location)] = module
+        return module
+
+    def pause(self, msg=None):
+        self._count("pause")
+        self.pauses.append({"phase": self.phase, "elapsed_seconds": self.elapsed_seconds, "message": msg})
+
+    def comment(self, msg):
+        self._count("comment")
+        self.comments.append(msg)
+        if msg.startswith(PHASE_MARKER):
+            self.phase = msg[len(PHASE_MARKER):]
+            if self.phase == CELL_ADDITION_PHASE:
+                self._cell_dispense_times.append([])
+        elif msg.startswith(STEP_START_MARKER):
+            step = msg[len(STEP_START_MARKER):].rsplit(STEP_TIMESTAMP_SEPARATOR, 1)[0]
+            self._step_starts[step] = self.elapsed_seconds
+        elif msg.startswith(STEP_END_MARKER):
+            step = msg[len(STEP_END_MARKER):].rsplit(STEP_TIMESTAMP_SEPARATOR, 1)[0]
+            if step in self._step_starts:
+                seconds = self.elapsed_seconds - self._step_starts.pop(step)
+                self.step_seconds[step] = self.step_seconds.get(step, 0.0) + seconds
+
+    def delay(self, seconds=0, minutes=0, msg=None):
+        self._record("delay", seconds + 60 * minutes)
+
+    def home(self):
+        self._move_to(Location(Point(*TRASH_POSITION)))
+
+    def set_rail_lights(self, on):
+        pass
+
+    def is_simulating(self):
+        return True
+
+    def report(self):
+        """Summarises the simulated run."""
+        return {
+            "total_seconds": self.elapsed_seconds,
+            "phase_seconds": dict(self.phase_seconds),
+            "travel_mm": self.travel_mm,
+            "tips": self.tips,
+            "tips_by_pipette": {instrument.name: instrument.tips_used for instrument in self.instruments.values()},
+            "pauses": list(self.pauses),
+            "commands": dict(self.commands),
+            "phase_commands": {phase: dict(commands) for phase, commands in self.phase_commands.items()},
+            "step_seconds": dict(self.step_seconds),
+            "cell_addition_spans": [times[-1] - times[0] for times in self._cell_dispense_times if times],
+        }
+
+class SimulatedClock:
+    """Stand-in for the time module of a protocol, following the simulated run time."""
+
+    def __init__(self, protocol):
+        self._protocol = protocol
+
+    def time(self):
+        return self._protocol.elapsed_seconds
+
+    def monotonic(self):
+        return self._protocol.elapsed_seconds
+
+    def sleep(self, seconds):
+        self._protocol.delay(seconds=seconds)
+
+@contextlib.contextmanager
+def opentrons_stub_modules():
+    """
+    Temporarily installs this module as the opentrons package, so protocols can import from it.
+    """
+    protocol_api = types.ModuleType("opentrons.protocol_api")
+    protocol_api.ProtocolContext = ProtocolContext
+    protocol_api.InstrumentContext = InstrumentContext
+    protocol_api.Labware = Labware
+    protocol_api.Well = Well
+    opentrons_types = types.ModuleType("opentrons.types")
+    opentrons_types.Point = Point
+    opentrons_types.Location = Location
+    opentrons = types.ModuleType("opentrons")
+    opentrons.protocol_api = protocol_api
+    opentrons.types = opentrons_types
+
+    stubs = {"opentrons": opentrons, "opentrons.protocol_api": protocol_api, "opentrons.types": opentrons_types}
+    saved = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    try:
+        yield
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+def simulate_protocol(protocol_string, timings=None):
+    """
+    Runs a generated protocol against the offline stand-in of the protocol API.
+
+    Args:
+        protocol_string (str): The complete protocol, as returned by create_protocol.
+        timings (dict): Timings overriding DEFAULT_TIMINGS.
+
+    Returns:
+        dict: Run time per phase, gantry travel, tip counts, pause points, command counts in total and
+        per phase, the seconds from the first to the last well receiving competent cells on each
+        reaction plate and, for instrumented protocols, the time of every step.
+
+    Raises:
+        SimulationError: If the protocol does something the robot would refuse to do.
+    """
+    namespace = {"__name__": "protocol"}
+    context = ProtocolContext(timings)
+    with opentrons_stub_modules():
+        exec(compile(protocol_string, "protocol.py", "exec"), namespace)
+        # Holds timed by the protocol itself then follow the simulated run time instead of the wall clock
+        namespace["time"] = SimulatedClock(context)
+        namespace["run"](context)
+    return context.report()
+
+def format_duration(seconds):
+    """
+    Formats a duration in seconds as hours and minutes.
+
+    Args:
+        seconds (float): Duration in seconds.
+
+    Returns:
+        str: The duration, e.g. '3 h 12 min'.
+    """
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60} h {minutes % 60:02d} min" if minutes >= 60 else f"{minutes} min"
+
+def format_report(report):
+    """
+    Formats a simulation report for the terminal.
+
+    Args:
+        report (dict): Report as returned by simulate_protocol.
+
+    Returns:
+        str: The report as text.
+    """
+    lines = [f"Estimated run time: {format_duration(report['total_seconds'])}"]
+    lines += [f"  {phase}: {format_duration(seconds)}" for phase, seconds in report["phase_seconds"].items()]
+    lines.append(f"Gantry travel: {report['travel_mm'] / 1000:.1f} m")
+    if report["cell_addition_spans"]:
+        lines.append(f"Cell addition span: {max(report['cell_addition_spans']):.0f} s from first to last well")
+    lines.append("Tips: " + ", ".join(f"{name} {count}" for name, count in report["tips_by_pipette"].items()))
+    lines.append(f"Pauses: {len(report['pauses'])}")
+    lines += [f"  after {format_duration(pause['elapsed_seconds'])} ({pause['phase']}): {pause['message']}"
+              for pause in report["pauses"]]
+    return "\n".join(lines)
+
+def main():
+    """
+    Command line entry point: simulates a generated protocol file and prints the report.
+    """
+    parser = argparse.ArgumentParser(description="Simulate a generated Auto-GG protocol without a robot.")
+    parser.add_argument("protocol", help="Generated protocol file")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    with open(args.protocol, encoding="utf-8") as protocol_file:
+        report = simulate_protocol(protocol_file.read())
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+if __name__ == "__main__":
+    main()
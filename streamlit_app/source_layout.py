@@ -0,0 +1,186 @@
+import csv
+import io
+import math
+
+from deck import PIPETTE_MAX_VOLUMES, labware_grid, labware_origin, well_coordinates, well_names
+from distribution import choose_tip_action
+from sharding import PLATE_CAPACITY, count_part_usage
+from templates import labware_slots, resolve_labware, resolve_pipettes
+from travel import template_coordinates
+
+# Automatic placement of the customised DNA parts on the source labware, most used parts where their
+# transfers travel least
+
+# Plate map names of the DNA plate and the customised tube rack, as in generate_plate_maps
+DNA_PLATE_NAME = "PlateMap1"
+DNA_TUBES_NAME = "PlateMap2"
+
+SOURCE_LOADING_COLUMNS = ["part", "location", "reactions", "volume_ul", "travel_mm"]
+
+def find_customised_parts(fixed_map, combinations_to_make):
+    """
+    Counts the reactions using each part that the fixed plate map does not hold.
+
+    Args:
+        fixed_map (list): Rows of the fixed plate map, as in the plate map dictionary.
+        combinations_to_make (list): List of combinations.
+
+    Returns:
+        Counter: Number of combinations using each missing part.
+    """
+    fixed_parts = {dna_name.strip() for row in fixed_map for dna_name in row
+                   if isinstance(dna_name, str) and dna_name.strip()}
+    part_usage = count_part_usage(combinations_to_make)
+    for part in fixed_parts:
+        part_usage.pop(part, None)
+    return part_usage
+
+def source_positions(fixed_map, protocol_settings=None):
+    """
+    Lists the free source positions of the deck: the wells of the customised tube rack, then the
+    wells the fixed plate map leaves empty on the DNA plate, for parts the rack cannot hold.
+
+    Args:
+        fixed_map (list): Rows of the fixed plate map.
+        protocol_settings (dict): Settings with the labware and slots of the template parameters.
+
+    Returns:
+        list: (plate map name, row, column, well name, coordinates) tuples.
+    """
+    protocol_settings = protocol_settings or {}
+    labware = resolve_labware(protocol_settings)
+    slots = labware_slots(protocol_settings)
+    positions = []
+    for plate_name, role in [(DNA_TUBES_NAME, "dna_tubes"), (DNA_PLATE_NAME, "dna_plate")]:
+        load_name = labware[role]
+        num_rows = labware_grid(load_name)[0]
+        for i, (coordinates, well_name) in enumerate(zip(well_coordinates(load_name, labware_origin(slots[role])),
+                                                         well_names(load_name))):
+            row, column = i % num_rows, i // num_rows
+            if plate_name == DNA_PLATE_NAME and row < len(fixed_map) and column < len(fixed_map[row]):
+                dna_name = fixed_map[row][column]
+                if isinstance(dna_name, str) and dna_name.strip():
+                    continue
+            positions.append((plate_name, row, column, well_name, coordinates))
+    return positions
+
+def aspiration_travel(reactions, protocol_settings=None, part_volume=1, plate_capacity=PLATE_CAPACITY):
+    """
+    Returns a function giving the travel of the transfers of a part from a source position.
+
+    Each aspiration goes from where the tip comes from to the source, then on to the reaction
+    plate. The first aspiration of a part on each plate comes with a fresh tip from the tip rack;
+    the others come from the wash well, or from the tip rack too when tips are swapped.
+
+    Args:
+        reactions (int): Number of reactions using the part.
+        protocol_settings (dict): Settings with the labware, slots, pipettes and tip action.
+        part_volume (float): Volume of each part added to a reaction, in µL.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        callable: Travel in mm of the part's transfers, given the coordinates of its source.
+    """
+    protocol_settings = protocol_settings or {}
+    pipette = resolve_pipettes(protocol_settings)["small"]
+    tip_action = protocol_settings.get("tip_action") or choose_tip_action()
+
+    def centre(coordinates):
+        return (sum(x for x, _ in coordinates) / len(coordinates), sum(y for _, y in coordinates) / len(coordinates))
+
+    deck_coordinates = template_coordinates([], protocol_settings)
+    reaction_centre = centre(deck_coordinates["reaction"])
+    tip_rack_centre = centre(deck_coordinates["tips"])
+    wash_well = deck_coordinates["wash"]
+
+    wells_per_aspirate = max(int(PIPETTE_MAX_VOLUMES.get(pipette, 10) // part_volume), 1)
+    aspirations = math.ceil(reactions / wells_per_aspirate)
+    fresh_tips = aspirations if tip_action == "new_tip" else min(math.ceil(reactions / plate_capacity), aspirations)
+
+    def travel(coordinates):
+        return (fresh_tips * math.dist(tip_rack_centre, coordinates)
+                + (aspirations - fresh_tips) * math.dist(wash_well, coordinates)
+                + aspirations * math.dist(coordinates, reaction_centre))
+    return travel
+
+def plan_source_layout(fixed_map, combinations_to_make, protocol_settings=None, part_volume=1, dead_volume=0):
+    """
+    Places the parts missing from the fixed plate map on the customised tube rack.
+
+    Parts are placed most used first, each on the free rack well where its transfers travel
+    least, as estimated by aspiration_travel. Parts the rack cannot hold spill over to the
+    empty wells of the DNA plate, again placed by travel.
+
+    Args:
+        fixed_map (list): Rows of the fixed plate map.
+        combinations_to_make (list): List of combinations.
+        protocol_settings (dict): Settings with the labware, slots and pipettes of the template
+            parameters, and the tip action the part transfers will use.
+        part_volume (float): Volume of each part added to a reaction, in µL.
+        dead_volume (float): Volume left in each source well, in µL.
+
+    Returns:
+        dict: The customised map and the fixed map with any spilled parts, as rows filling the
+        whole labware, and the placements in loading order.
+
+    Raises:
+        ValueError: If the rack and the empty wells of the DNA plate cannot hold every part.
+    """
+    protocol_settings = protocol_settings or {}
+    labware = resolve_labware(protocol_settings)
+    part_usage = find_customised_parts(fixed_map, combinations_to_make)
+    positions = source_positions(fixed_map, protocol_settings)
+    if len(part_usage) > len(positions):
+        raise ValueError(f"{len(part_usage)} customised parts do not fit in the {len(positions)} free wells "
+                         f"of the tube rack and the DNA plate.")
+
+    maps = {}
+    for plate_name, role, rows in [(DNA_TUBES_NAME, "dna_tubes", []), (DNA_PLATE_NAME, "dna_plate", fixed_map)]:
+        num_rows, num_columns = labware_grid(labware[role])[:2]
+        maps[plate_name] = [[(rows[i][j] if i < len(rows) and j < len(rows[i]) else "") or ""
+                             for j in range(num_columns)] for i in range(num_rows)]
+
+    rack_size = sum(1 for position in positions if position[0] == DNA_TUBES_NAME)
+    placements = []
+    for part, reactions in sorted(part_usage.items(), key=lambda item: (-item[1], item[0])):
+        # The rack is filled before any part spills over to the DNA plate
+        candidates = positions[:rack_size] or positions
+        travel = aspiration_travel(reactions, protocol_settings, part_volume)
+        position = min(candidates, key=lambda position: travel(position[4]))
+        positions.remove(position)
+        if position[0] == DNA_TUBES_NAME:
+            rack_size -= 1
+        plate_name, row, column, well_name, coordinates = position
+        maps[plate_name][row][column] = part
+        placements.append({
+            "part": part,
+            "location": f"{plate_name} {well_name}",
+            "reactions": reactions,
+            "volume_ul": reactions * part_volume + dead_volume,
+            "travel_mm": round(travel(coordinates)),
+        })
+    spilled = any(placement["location"].startswith(DNA_PLATE_NAME) for placement in placements)
+    return {
+        "customised_map": maps[DNA_TUBES_NAME],
+        "fixed_map": maps[DNA_PLATE_NAME] if spilled else fixed_map,
+        "spilled": spilled,
+        "placements": placements,
+    }
+
+def export_plate_map(plate_map):
+    """
+    Writes plate map rows as a plate map CSV, as uploaded.
+    """
+    output = io.StringIO()
+    csv.writer(output).writerows(plate_map)
+    return output.getvalue()
+
+def export_source_loading_sheet(source_layout):
+    """
+    Writes the placements of a source layout as CSV, with the keys of SOURCE_LOADING_COLUMNS.
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=SOURCE_LOADING_COLUMNS)
+    writer.writeheader()
+    writer.writerows(source_layout["placements"])
+    return output.getvalue()
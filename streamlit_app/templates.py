@@ -0,0 +1,368 @@
+import ast
+import json
+import math
+
+from caching import LRUCache, file_digest
+from deck import LABWARE_GRIDS, PIPETTE_MAX_VOLUMES, SLOT_ORIGINS, THERMOCYCLER_SLOT
+from distribution import REACTION_BUFFER_VOLUME, REACTION_VOLUME
+from plating import (AGAR_SLOTS, DEFAULT_MULTICHANNEL_PLATING_CONFIGURATION, DEFAULT_PLATING_CONFIGURATION,
+                     plating_settings)
+from profiles import DEFAULT_GG_PROGRAM, GG_PROGRAMS
+from sharding import PLATE_CAPACITY
+
+# Protocol template engine: templates are checked and analysed once, then rendered per job by substitution
+
+# Named parameters the templates read from protocol_settings, with the value used when one is not given.
+# Dictionaries are merged over these defaults, so only the keys to change need to be given. Templates have no
+# defaults of their own: rendering passes them every parameter they read, resolved by resolve_parameters.
+DEFAULT_LABWARE = {
+    "dna_plate": "biorad_96_wellplate_200ul_pcr",
+    "dna_tubes": "opentrons_24_tuberack_eppendorf_1.5ml_safelock_snapcap",
+    "reaction_plate": "biorad_96_wellplate_200ul_pcr",
+    "reagent_block": "opentrons_24_aluminumblock_nest_1.5ml_snapcap",
+    "tips_small": "opentrons_96_tiprack_20ul",
+    "tips_large": "opentrons_96_tiprack_300ul",
+}
+DEFAULT_SLOTS = {"dna_plate": "1", "dna_tubes": "2", "reagent_block": "3", "tips_small": "4", "tips_large": "6",
+                 "cell_reservoir": "9", "setup_plate": "9"}
+DEFAULT_PIPETTES = {"small": "p10_single", "small_mount": "right", "large": "p300_single",
+                    "large_multi": "p300_multi", "large_mount": "left"}
+DEFAULT_VOLUMES = {"buffer": REACTION_BUFFER_VOLUME, "reaction": REACTION_VOLUME, "cells": 50, "cell_mix": 25}
+DEFAULT_HEAT_SHOCK_PROGRAM = [
+    {"temperature": 4, "hold_time_seconds": 600},
+    {"temperature": 42, "hold_time_seconds": 90},
+    {"temperature": 4, "hold_time_seconds": 120},
+    {"temperature": 37, "hold_time_seconds": 3600},
+]
+
+TEMPLATE_PARAMETERS = {
+    "part_volume": 1,
+    "tip_action": "wash",
+    "transfer_plan": None,
+    "multichannel": False,
+    "master_mix": None,
+    "pipelined": False,
+    "plating": None,
+    "gg_programs": None,
+    "cell_tubes": ["D1"],
+    "labware": {},
+    "slots": {},
+    "pipettes": {},
+    "volumes": {},
+    "heat_shock_program": DEFAULT_HEAT_SHOCK_PROGRAM,
+    "instrument": False,
+    "cell_batch_size": None,
+}
+# Labware roles holding the DNA plate maps, in plate map order
+DNA_SOURCE_ROLES = ["dna_plate", "dna_tubes"]
+# Parameters a template may ignore, as it then computes the same result on the robot
+OPTIONAL_PARAMETERS = {"transfer_plan"}
+# Parameters set by the user in a template parameters file; the others are planned by the generator
+USER_PARAMETERS = ["labware", "slots", "pipettes", "volumes", "heat_shock_program"]
+
+# Slots taken by the thermocycler and the trash in every template
+RESERVED_SLOTS = {THERMOCYCLER_SLOT: "thermocycler", "8": "thermocycler", "10": "thermocycler",
+                  "11": "thermocycler", "12": "trash"}
+# Slots used only in one mode: the cell reservoir in multichannel mode, the setup plate in pipelined mode
+MODE_SLOTS = {"cell_reservoir": "multichannel", "setup_plate": "pipelined"}
+PIPETTE_MOUNTS = ["left", "right"]
+# Temperatures the thermocycler block can hold, in °C
+BLOCK_TEMPERATURE_RANGE = (4, 99)
+
+SETTINGS_NAME = "protocol_settings"
+TEMPLATE_CACHE_ENTRIES = 16
+
+class CompiledTemplate:
+    """
+    A protocol template checked and analysed once, rendered for any number of jobs.
+    """
+
+    def __init__(self, source, parameters, reads_all_parameters, digest):
+        self.source = source
+        self.parameters = parameters
+        self.reads_all_parameters = reads_all_parameters
+        self.digest = digest
+
+    def validate(self, protocol_settings):
+        """
+        Checks settings against the parameters the template reads and against the deck.
+
+        Args:
+            protocol_settings (dict): Settings planned by the generator.
+
+        Raises:
+            ValueError: If a setting is unknown, would be ignored by the template, or is invalid.
+        """
+        unknown = sorted(set(protocol_settings) - set(TEMPLATE_PARAMETERS))
+        if unknown:
+            raise ValueError(f'Unknown template parameters: {", ".join(unknown)}.')
+        if not self.reads_all_parameters:
+            ignored = sorted(name for name, value in protocol_settings.items()
+                             if name not in self.parameters and name not in OPTIONAL_PARAMETERS
+                             and value != TEMPLATE_PARAMETERS[name])
+            if ignored:
+                raise ValueError(f'The protocol template does not read {", ".join(ignored)}, so these settings '
+                                 f'would be ignored on the robot; use the current template.')
+        validate_parameter_values(protocol_settings)
+
+    def render(self, dna_plate_map_dict, combinations_to_make, protocol_settings):
+        """
+        Renders the protocol of one job.
+
+        Args:
+            dna_plate_map_dict (dict): Plate map dictionary.
+            combinations_to_make (list): List of combinations.
+            protocol_settings (dict): Settings planned by the generator.
+
+        Returns:
+            str: The complete protocol as a string.
+
+        Raises:
+            ValueError: If the settings do not suit the template, as in validate.
+        """
+        self.validate(protocol_settings)
+        num_plates = math.ceil(len(combinations_to_make) / PLATE_CAPACITY)
+        settings = {name: value for name, value in resolve_parameters(protocol_settings, num_plates).items()
+                    if self.reads_all_parameters or name in self.parameters or name in protocol_settings}
+        # repr rather than JSON for the settings, so booleans and None stay valid Python
+        return ('dna_plate_map_dict = ' + json.dumps(dna_plate_map_dict) + '\n\n'
+                + 'combinations_to_make = ' + json.dumps(combinations_to_make) + '\n\n'
+                + f'{SETTINGS_NAME} = ' + repr(settings) + '\n\n'
+                + self.source)
+
+def find_template_parameters(tree):
+    """
+    Finds the parameters a template reads, as protocol_settings.get('name', ...) or protocol_settings['name'].
+
+    Returns:
+        tuple: The parameter names, and whether protocol_settings is also used in a way that could
+        read any parameter, e.g. passed on as a whole.
+    """
+    parameters = set()
+    parameter_reads = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "get" \
+                and isinstance(node.func.value, ast.Name) and node.func.value.id == SETTINGS_NAME \
+                and node.args and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str):
+            parameters.add(node.args[0].value)
+            parameter_reads.add(id(node.func.value))
+        elif isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == SETTINGS_NAME \
+                and isinstance(node.slice, ast.Constant) and isinstance(node.slice.value, str):
+            parameters.add(node.slice.value)
+            parameter_reads.add(id(node.value))
+    reads_all_parameters = any(isinstance(node, ast.Name) and node.id == SETTINGS_NAME and id(node) not in parameter_reads
+                               for node in ast.walk(tree))
+    return parameters, reads_all_parameters
+
+def compile_template(template_bytes):
+    """
+    Checks a protocol template and finds the parameters it reads.
+
+    Args:
+        template_bytes (bytes): Content of the template file.
+
+    Returns:
+        CompiledTemplate: The analysed template.
+
+    Raises:
+        ValueError: If the template is not valid Python or has no run function.
+    """
+    try:
+        source = template_bytes.decode("utf-8")
+        tree = ast.parse(source, filename="protocol template")
+        compile(tree, "protocol template", "exec")
+    except (UnicodeDecodeError, SyntaxError) as e:
+        raise ValueError(f"The protocol template cannot be read: {e}")
+    if not any(isinstance(node, ast.FunctionDef) and node.name == "run" for node in tree.body):
+        raise ValueError("The protocol template has no run(protocol) function.")
+    parameters, reads_all_parameters = find_template_parameters(tree)
+    return CompiledTemplate(source, frozenset(parameters), reads_all_parameters, file_digest(template_bytes))
+
+_template_cache = LRUCache(TEMPLATE_CACHE_ENTRIES)
+
+def get_compiled_template(template_bytes):
+    """
+    Returns the compiled template of a template file, compiling each distinct template only once.
+    """
+    return _template_cache.get_or_compute(file_digest(template_bytes), lambda: compile_template(template_bytes))
+
+def read_template_parameters(parameters_file):
+    """
+    Reads the labware, slots, pipettes, volumes and heat shock program a user sets for the templates.
+
+    Args:
+        parameters_file (file): JSON file with some of the keys of USER_PARAMETERS.
+
+    Returns:
+        dict: The template parameters.
+
+    Raises:
+        ValueError: If the file is not a JSON object of valid user parameters.
+    """
+    try:
+        parameters = json.load(parameters_file)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"The template parameters are not valid JSON: {e}")
+    if not isinstance(parameters, dict):
+        raise ValueError("The template parameters must be a JSON object.")
+    unknown = sorted(set(parameters) - set(USER_PARAMETERS))
+    if unknown:
+        raise ValueError(f'Unknown template parameters: {", ".join(unknown)}; expected {", ".join(USER_PARAMETERS)}.')
+    validate_parameter_values(parameters)
+    return parameters
+
+def reaction_volumes(protocol_settings):
+    """
+    Returns the buffer, reaction, cell and mixing volumes of a protocol, defaults included.
+    """
+    return dict(DEFAULT_VOLUMES, **protocol_settings.get("volumes", {}))
+
+def resolve_labware(protocol_settings):
+    """
+    Returns the labware load name of every role of a protocol, defaults included.
+    """
+    return dict(DEFAULT_LABWARE, **protocol_settings.get("labware", {}))
+
+def resolve_pipettes(protocol_settings):
+    """
+    Returns the pipette models and mounts of a protocol, defaults included.
+    """
+    return dict(DEFAULT_PIPETTES, **protocol_settings.get("pipettes", {}))
+
+def dna_source_labware(protocol_settings):
+    """
+    Returns the labware holding each DNA plate map, in plate map order.
+    """
+    labware = resolve_labware(protocol_settings)
+    return [labware[role] for role in DNA_SOURCE_ROLES]
+
+def resolve_parameters(protocol_settings, num_plates):
+    """
+    Returns the value of every template parameter of a job, defaults included.
+
+    Args:
+        protocol_settings (dict): Settings planned by the generator.
+        num_plates (int): Number of reaction plates of the job.
+
+    Returns:
+        dict: Every parameter of TEMPLATE_PARAMETERS. Dictionaries are merged over their defaults,
+        the plating settings default to the configuration of the loaded p300 on the first agar slot,
+        and every plate runs the default GG program unless programs are given.
+    """
+    resolved = dict(TEMPLATE_PARAMETERS, **protocol_settings)
+    resolved["labware"] = resolve_labware(protocol_settings)
+    resolved["slots"] = dict(DEFAULT_SLOTS, **protocol_settings.get("slots", {}))
+    resolved["pipettes"] = resolve_pipettes(protocol_settings)
+    resolved["volumes"] = reaction_volumes(protocol_settings)
+    if resolved["plating"] is None:
+        configuration = (DEFAULT_MULTICHANNEL_PLATING_CONFIGURATION if resolved["multichannel"]
+                         else DEFAULT_PLATING_CONFIGURATION)
+        resolved["plating"] = plating_settings(configuration, AGAR_SLOTS[:1], resolved["multichannel"])
+    if resolved["gg_programs"] is None:
+        resolved["gg_programs"] = [GG_PROGRAMS[DEFAULT_GG_PROGRAM]] * num_plates
+    return resolved
+
+def labware_slots(protocol_settings):
+    """
+    Returns the deck slot of every labware the templates load besides the agar plates, by role.
+
+    Args:
+        protocol_settings (dict): Settings planned by the generator, with the template parameters.
+
+    Returns:
+        dict: Slot by role, leaving out the roles of modes that are off.
+    """
+    slots = dict(DEFAULT_SLOTS, **protocol_settings.get("slots", {}))
+    return {role: slot for role, slot in slots.items()
+            if role not in MODE_SLOTS or protocol_settings.get(MODE_SLOTS[role])}
+
+def is_number(value):
+    """
+    Returns whether a parameter value is an int or float, booleans excluded.
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def validate_program(steps, name):
+    """
+    Checks the steps of a thermocycler profile.
+
+    Raises:
+        ValueError: If the steps are not a list, or a step lacks a numeric temperature or hold time,
+            or is out of the block's range.
+    """
+    low, high = BLOCK_TEMPERATURE_RANGE
+    if not isinstance(steps, list) or not steps:
+        raise ValueError(f"{name} needs a list of steps.")
+    for step in steps:
+        if not isinstance(step, dict) or {"temperature", "hold_time_seconds"} - set(step):
+            raise ValueError(f"Every step of {name} needs a temperature and a hold_time_seconds.")
+        if not is_number(step["temperature"]) or not is_number(step["hold_time_seconds"]):
+            raise ValueError(f"The temperature and hold_time_seconds of every step of {name} must be numbers, "
+                             f"got {step['temperature']!r} and {step['hold_time_seconds']!r}.")
+        if not low <= step["temperature"] <= high or step["hold_time_seconds"] <= 0:
+            raise ValueError(f"{name} holds {step['temperature']} °C for {step['hold_time_seconds']} s; "
+                             f"temperatures must be within {low}-{high} °C and holds positive.")
+
+def validate_parameter_values(protocol_settings):
+    """
+    Checks the values of the deck, pipette, volume and profile parameters.
+
+    Args:
+        protocol_settings (dict): Settings planned by the generator.
+
+    Raises:
+        ValueError: If a parameter has an unknown key or an invalid value, or two labware share a slot.
+    """
+    for name, defaults in [("labware", DEFAULT_LABWARE), ("slots", DEFAULT_SLOTS), ("pipettes", DEFAULT_PIPETTES),
+                           ("volumes", DEFAULT_VOLUMES)]:
+        if not isinstance(protocol_settings.get(name, {}), dict):
+            raise ValueError(f"The {name} parameter must be an object of {', '.join(defaults)}.")
+        unknown = sorted(set(protocol_settings.get(name, {})) - set(defaults))
+        if unknown:
+            raise ValueError(f'Unknown {name} keys: {", ".join(unknown)}; expected {", ".join(defaults)}.')
+
+    for role, load_name in protocol_settings.get("labware", {}).items():
+        if not isinstance(load_name, str) or load_name not in LABWARE_GRIDS:
+            raise ValueError(f'Unknown labware "{load_name}" for {role}.')
+    # Reactions are laid out and split over plates by the generator, assuming full 96-well plates
+    reaction_rows, reaction_columns = LABWARE_GRIDS[resolve_labware(protocol_settings)["reaction_plate"]][:2]
+    if reaction_rows * reaction_columns != PLATE_CAPACITY:
+        raise ValueError(f"The reaction plate needs {PLATE_CAPACITY} wells, got {reaction_rows * reaction_columns}.")
+
+    pipettes = resolve_pipettes(protocol_settings)
+    for role in ["small", "large"]:
+        if not isinstance(pipettes[role], str) or pipettes[role] not in PIPETTE_MAX_VOLUMES or "multi" in pipettes[role]:
+            raise ValueError(f'Unknown single-channel pipette "{pipettes[role]}" for {role}.')
+    if (not isinstance(pipettes["large_multi"], str) or pipettes["large_multi"] not in PIPETTE_MAX_VOLUMES
+            or "multi" not in pipettes["large_multi"]):
+        raise ValueError(f'Unknown 8-channel pipette "{pipettes["large_multi"]}" for large_multi.')
+    if (not all(isinstance(pipettes[mount], str) for mount in ["small_mount", "large_mount"])
+            or {pipettes["small_mount"], pipettes["large_mount"]} != set(PIPETTE_MOUNTS)):
+        raise ValueError(f"The two pipettes need one mount each, got {pipettes['small_mount']} and "
+                         f"{pipettes['large_mount']}.")
+
+    volumes = reaction_volumes(protocol_settings)
+    if not all(is_number(volume) for volume in volumes.values()):
+        raise ValueError(f"Volumes must be numbers: {volumes}.")
+    if any(volume <= 0 for volume in volumes.values()) or volumes["buffer"] >= volumes["reaction"]:
+        raise ValueError(f"Volumes must be positive, with the buffer below the reaction volume: {volumes}.")
+
+    validate_program(protocol_settings.get("heat_shock_program", DEFAULT_HEAT_SHOCK_PROGRAM), "the heat shock program")
+    for plate_index, program in enumerate(protocol_settings.get("gg_programs") or []):
+        name = f"the GG program of plate {plate_index + 1}"
+        if not isinstance(program, dict):
+            raise ValueError(f"{name} must be an object with cycles, steps and final_steps.")
+        if not isinstance(program.get("cycles"), int) or isinstance(program["cycles"], bool) or program["cycles"] < 1:
+            raise ValueError(f"{name} needs a positive whole number of cycles, got {program.get('cycles')!r}.")
+        validate_program(program.get("steps"), name)
+        validate_program(program.get("final_steps"), name)
+
+    # Every labware in use needs its own slot
+    used_slots = dict(RESERVED_SLOTS)
+    plating_slots = (protocol_settings.get("plating") or {}).get("slots", ["5"])
+    for role, slot in list(labware_slots(protocol_settings).items()) + [("agar plate", slot) for slot in plating_slots]:
+        if not isinstance(slot, str) or slot not in SLOT_ORIGINS:
+            raise ValueError(f'Slot "{slot}" of {role} is not a deck slot.')
+        if slot in used_slots:
+            raise ValueError(f"Slot {slot} is used by both {used_slots[slot]} and {role}.")
+        used_slots[slot] = role
@@ -0,0 +1,137 @@
+import json
+
+from deck import PIPETTE_MAX_VOLUMES, labware_grid
+from sharding import PLATE_CAPACITY
+from templates import TEMPLATE_PARAMETERS, dna_source_labware, reaction_volumes, resolve_pipettes
+
+# Offline compilation of the liquid-handling plan replayed by the protocol templates
+
+def index_dna_wells(dna_plate_map_dict, protocol_settings=None):
+    """
+    Indexes every DNA part by name with the plate and well number it sits in.
+
+    Wells are numbered column-wise (A1, B1, ..., A2, ...), as in the Opentrons API, on the
+    labware the template loads for each plate map.
+
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary.
+        protocol_settings (dict): Settings passed to the template, giving the DNA source labware.
+
+    Returns:
+        dict: (plate name, well number) by part name.
+
+    Raises:
+        ValueError: If a part name appears more than once in the plate maps, or lies outside its labware.
+    """
+    dna_well_index = {}
+    duplicated_parts = {}
+    for (plate_name, plate_map), load_name in zip(dna_plate_map_dict.items(),
+                                                  dna_source_labware(protocol_settings or {})):
+        num_rows, num_columns = labware_grid(load_name)[:2]
+        for i, row in enumerate(plate_map):
+            for j, dna_name in enumerate(row):
+                if not isinstance(dna_name, str) or not dna_name.strip():
+                    continue
+                dna_name = dna_name.strip()
+                if i >= num_rows or j >= num_columns:
+                    raise ValueError(f'DNA part "{dna_name}" of {plate_name} is in row {i + 1}, column {j + 1}, '
+                                     f'outside the {num_rows} x {num_columns} wells of {load_name}.')
+                if dna_name in dna_well_index:
+                    duplicated_parts.setdefault(dna_name, [dna_well_index[dna_name][0]]).append(plate_name)
+                    continue
+                dna_well_index[dna_name] = (plate_name, num_rows * j + i)
+    if duplicated_parts:
+        raise ValueError("DNA parts found more than once in the plate maps: " + ", ".join(
+            f"{name} ({', '.join(plates)})" for name, plates in duplicated_parts.items()))
+    return dna_well_index
+
+def compile_transfer_plan(dna_plate_map_dict, combinations_to_make, protocol_settings=None,
+                          plate_capacity=PLATE_CAPACITY):
+    """
+    Compiles the buffer, water and part transfers of every reaction plate.
+
+    The result has the same layout the templates build on the robot when no plan is
+    given, so the robot only replays it. Each reaction plate gets the water volume of
+    every reaction and a list of part transfers as
+    [source plate, source well, destination wells, volume, tip action], where the tip
+    action is 'new_tip' or 'wash'. The part volume, tip action, reaction volumes, DNA
+    source labware and small pipette are read from the settings, as the template does.
+    Each plate also records the load name of every DNA source labware its well numbers
+    refer to, which the template checks against the labware it loaded before replaying.
+
+    Args:
+        dna_plate_map_dict (dict): Plate map dictionary.
+        combinations_to_make (list): List of combinations.
+        protocol_settings (dict): Settings passed to the template, with the template parameters.
+        plate_capacity (int): Number of reactions that fit on one reaction plate.
+
+    Returns:
+        list: One plan per reaction plate.
+
+    Raises:
+        ValueError: If the part volume is not positive, the parts of a combination do not fit
+            in a reaction, or a part is missing from, or duplicated in, the plate maps.
+    """
+    protocol_settings = protocol_settings or {}
+    part_volume = protocol_settings.get("part_volume", TEMPLATE_PARAMETERS["part_volume"])
+    tip_action = protocol_settings.get("tip_action", TEMPLATE_PARAMETERS["tip_action"])
+    if part_volume <= 0:
+        raise ValueError(f"Part volume must be positive, got {part_volume} µL.")
+    dna_well_index = index_dna_wells(dna_plate_map_dict, protocol_settings)
+    wells_per_aspirate = max(int(PIPETTE_MAX_VOLUMES[resolve_pipettes(protocol_settings)["small"]] // part_volume), 1)
+    volumes = reaction_volumes(protocol_settings)
+    water_per_reaction = volumes["reaction"] - volumes["buffer"]
+    source_labware = dict(zip(dna_plate_map_dict, dna_source_labware(protocol_settings)))
+
+    transfer_plan = []
+    for i in range(0, len(combinations_to_make), plate_capacity):
+        plate_combinations = combinations_to_make[i:i + plate_capacity]
+        combinations_by_part = {}
+        for well_num, combination in enumerate(plate_combinations):
+            for part in combination["parts"]:
+                combinations_by_part.setdefault(part, []).append(well_num)
+
+        part_transfers = []
+        for part, combination_wells in combinations_by_part.items():
+            if part not in dna_well_index:
+                raise ValueError(f'Could not find dna piece named "{part}"')
+            source_plate, source_well = dna_well_index[part]
+            for j in range(0, len(combination_wells), wells_per_aspirate):
+                part_transfers.append([
+                    source_plate, source_well, combination_wells[j:j + wells_per_aspirate], part_volume,
+                    "wash" if j > 0 and tip_action == "wash" else "new_tip",
+                ])
+        water_volumes = [water_per_reaction - len(combination["parts"]) * part_volume
+                         for combination in plate_combinations]
+        for combination, water_volume in zip(plate_combinations, water_volumes):
+            if water_volume < 0:
+                raise ValueError(f'Combination "{combination["name"]}" needs '
+                                 f'{len(combination["parts"]) * part_volume} µL of parts, more than the '
+                                 f'{water_per_reaction} µL available in a reaction.')
+        transfer_plan.append({
+            "source_labware": source_labware,
+            "water_volumes": water_volumes,
+            "part_transfers": part_transfers,
+        })
+    return transfer_plan
+
+def export_transfer_plan(transfer_plan):
+    """
+    Writes a transfer plan as JSON with one transfer per line, so job revisions can be diffed.
+
+    Args:
+        transfer_plan (list): Plan as returned by compile_transfer_plan.
+
+    Returns:
+        str: The plan as JSON.
+    """
+    plates = []
+    for plate_index, plate_plan in enumerate(transfer_plan):
+        transfers = ",\n".join(f"      {json.dumps(transfer)}" for transfer in plate_plan["part_transfers"])
+        plates.append(
+            f'  {{"plate": {plate_index + 1},\n'
+            f'   "source_labware": {json.dumps(plate_plan["source_labware"])},\n'
+            f'   "water_volumes": {json.dumps(plate_plan["water_volumes"])},\n'
+            f'   "part_transfers": [\n{transfers}\n   ]}}'
+        )
+    return "[\n" + ",\n".join(plates) + "\n]\n"
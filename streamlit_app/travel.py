@@ -0,0 +1,201 @@
+import math
+
+from deck import THERMOCYCLER_SLOT, TRASH_POSITION, labware_origin, well_coordinates
+from templates import DNA_SOURCE_ROLES, labware_slots, resolve_labware
+
+# Ordering of the part transfers of a transfer plan to shorten the gantry travel between wells
+
+# Well of the reagent block holding the water tips are washed in (B1)
+WASH_WELL_INDEX = 1
+# Tips used by the buffer and water step before the part transfers of each reaction plate
+BUFFER_STEP_TIPS = 1
+
+def template_coordinates(dna_plate_names, protocol_settings=None):
+    """
+    Returns the deck coordinates of the wells visited by the part transfers of the templates.
+
+    Args:
+        dna_plate_names (list): Plate map names, in plate map order.
+        protocol_settings (dict): Settings with the labware and slots of the template parameters.
+
+    Returns:
+        dict: Well coordinates of every DNA plate by name, of the reaction plate and of the
+        tip rack, and the position of the wash well and the trash.
+    """
+    protocol_settings = protocol_settings or {}
+    labware = resolve_labware(protocol_settings)
+    slots = labware_slots(protocol_settings)
+    return {
+        "sources": {plate_name: well_coordinates(labware[role], labware_origin(slots[role]))
+                    for plate_name, role in zip(dna_plate_names, DNA_SOURCE_ROLES)},
+        "reaction": well_coordinates(labware["reaction_plate"], labware_origin(THERMOCYCLER_SLOT, "thermocycler")),
+        "tips": well_coordinates(labware["tips_small"], labware_origin(slots["tips_small"])),
+        "wash": well_coordinates(labware["reagent_block"],
+                                 labware_origin(slots["reagent_block"], "temperature"))[WASH_WELL_INDEX],
+        "trash": TRASH_POSITION,
+    }
+
+def route_length(start, points):
+    """
+    Returns the length of the path from start through all points, in order.
+    """
+    length = 0.0
+    for point in points:
+        length += math.dist(start, point)
+        start = point
+    return length
+
+def order_route(start, points):
+    """
+    Orders points into a short open path from start, by nearest neighbour then 2-opt.
+
+    Args:
+        start (tuple): Position the path starts from.
+        points (list): (x, y) positions to visit.
+
+    Returns:
+        list: Indices of the points in visiting order.
+    """
+    remaining = list(range(len(points)))
+    order = []
+    position = start
+    while remaining:
+        nearest = min(remaining, key=lambda i: math.dist(position, points[i]))
+        remaining.remove(nearest)
+        order.append(nearest)
+        position = points[nearest]
+
+    # 2-opt: reverse segments of the path as long as that shortens it
+    path = [start] + [points[i] for i in order]
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(path) - 1):
+            for j in range(i + 1, len(path)):
+                removed = math.dist(path[i - 1], path[i]) + (math.dist(path[j], path[j + 1]) if j + 1 < len(path) else 0)
+                added = math.dist(path[i - 1], path[j]) + (math.dist(path[i], path[j + 1]) if j + 1 < len(path) else 0)
+                if added < removed - 1e-9:
+                    path[i:j + 1] = path[i:j + 1][::-1]
+                    order[i - 1:j] = order[i - 1:j][::-1]
+                    improved = True
+    return order
+
+def part_transfers_travel_mm(transfer_plan, coordinates):
+    """
+    Computes the gantry travel of the part transfers of a transfer plan.
+
+    Follows the template: a fresh tip comes from the next position of the tip rack and the
+    used one goes to the trash, a wash goes to the wash well, then the part is aspirated
+    and dispensed into each destination well in order.
+
+    Args:
+        transfer_plan (list): Plan as returned by compile_transfer_plan.
+        coordinates (dict): Coordinates as returned by template_coordinates.
+
+    Returns:
+        float: Travel in mm.
+    """
+    travel = 0.0
+    for plate_plan in transfer_plan:
+        position = coordinates["trash"]
+        next_tip = BUFFER_STEP_TIPS
+        for source_plate, source_well, combination_wells, volume, tip_action in plate_plan["part_transfers"]:
+            if tip_action == "new_tip":
+                tip_position = coordinates["tips"][next_tip % len(coordinates["tips"])]
+                travel += route_length(position, [coordinates["trash"], tip_position])
+                position = tip_position
+                next_tip += 1
+            else:
+                travel += math.dist(position, coordinates["wash"])
+                position = coordinates["wash"]
+            destinations = [coordinates["reaction"][well] for well in combination_wells]
+            travel += route_length(position, [coordinates["sources"][source_plate][source_well]] + destinations)
+            position = destinations[-1]
+        travel += math.dist(position, coordinates["trash"])
+    return travel
+
+def group_part_transfers(part_transfers):
+    """
+    Groups consecutive transfers from the same source well, i.e. the transfers of one part.
+    """
+    groups = []
+    for transfer in part_transfers:
+        if groups and transfer[:2] == groups[-1][-1][:2]:
+            groups[-1].append(transfer)
+        else:
+            groups.append([transfer])
+    return groups
+
+def optimise_transfer_order(transfer_plan, dna_plate_names, protocol_settings=None):
+    """
+    Reorders the part transfers of a transfer plan to shorten the gantry travel.
+
+    The destination wells of each part are ordered into a short path from the part's
+    source well, keeping the number of wells per aspiration, and the parts are then
+    ordered greedily by the travel from where the previous part ended to the next source.
+    Plates on which this order would not shorten the travel keep their naive order.
+
+    Args:
+        transfer_plan (list): Plan as returned by compile_transfer_plan.
+        dna_plate_names (list): Plate map names, in plate map order.
+        protocol_settings (dict): Settings with the labware and slots of the template parameters.
+
+    Returns:
+        list: The reordered plan; the input is left unchanged.
+    """
+    coordinates = template_coordinates(dna_plate_names, protocol_settings)
+    optimised_plan = []
+    for plate_plan in transfer_plan:
+        groups = []
+        for group in group_part_transfers(plate_plan["part_transfers"]):
+            source_plate, source_well = group[0][:2]
+            source = coordinates["sources"][source_plate][source_well]
+            wells = [well for transfer in group for well in transfer[2]]
+            ordered_wells = [wells[i] for i in order_route(source, [coordinates["reaction"][well] for well in wells])]
+            reordered_group = []
+            for transfer in group:
+                chunk, ordered_wells = ordered_wells[:len(transfer[2])], ordered_wells[len(transfer[2]):]
+                reordered_group.append([source_plate, source_well, chunk, transfer[3], transfer[4]])
+            groups.append(reordered_group)
+
+        # Order the parts by the travel from the end of the previous part, via trash and tip rack, to the next source
+        ordered_transfers = []
+        position = coordinates["trash"]
+        next_tip = BUFFER_STEP_TIPS
+        while groups:
+            tip_position = coordinates["tips"][next_tip % len(coordinates["tips"])]
+
+            def start_cost(group):
+                source = coordinates["sources"][group[0][0]][group[0][1]]
+                return route_length(position, [coordinates["trash"], tip_position, source])
+
+            group = min(groups, key=start_cost)
+            groups.remove(group)
+            ordered_transfers.extend(group)
+            next_tip += sum(1 for transfer in group if transfer[4] == "new_tip")
+            position = coordinates["reaction"][group[-1][2][-1]]
+        optimised_plate_plan = dict(plate_plan, part_transfers=ordered_transfers)
+        # The greedy order is not always shorter; keep the naive order of a plate it does not improve
+        if (part_transfers_travel_mm([optimised_plate_plan], coordinates)
+                >= part_transfers_travel_mm([plate_plan], coordinates)):
+            optimised_plate_plan = dict(plate_plan)
+        optimised_plan.append(optimised_plate_plan)
+    return optimised_plan
+
+def summarise_travel(transfer_plan, optimised_plan, dna_plate_names, protocol_settings=None):
+    """
+    Reports the gantry travel of the part transfers before and after optimisation.
+
+    Args:
+        transfer_plan (list): Plan in the naive order.
+        optimised_plan (list): Plan as returned by optimise_transfer_order.
+        dna_plate_names (list): Plate map names, in plate map order.
+        protocol_settings (dict): Settings with the labware and slots of the template parameters.
+
+    Returns:
+        dict: Naive and optimised travel and the travel saved, in mm.
+    """
+    coordinates = template_coordinates(dna_plate_names, protocol_settings)
+    naive_mm = part_transfers_travel_mm(transfer_plan, coordinates)
+    optimised_mm = part_transfers_travel_mm(optimised_plan, coordinates)
+    return {"naive_mm": naive_mm, "optimised_mm": optimised_mm, "saved_mm": naive_mm - optimised_mm}
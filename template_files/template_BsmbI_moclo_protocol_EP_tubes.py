@@ -12,172 +12,378 @@ metadata = {
 
 num_rxns = len(combinations_to_make)
 
+# Time set aside for one setup step of the next reaction plate within a thermocycler hold, in seconds
+SETUP_STEP_SECONDS = 30
+
 def run(protocol: protocol_api.ProtocolContext):
+    # Labware, deck slots, pipettes, volumes and the heat shock profile. The generator passes every setting
+    # read here, with its defaults filled in.
+    labware = protocol_settings['labware']
+    slots = protocol_settings['slots']
+    pipettes = protocol_settings['pipettes']
+    volumes = protocol_settings['volumes']
+    heat_shock_program = protocol_settings['heat_shock_program']
+
     # Load in 1 10ul tiprack and 2 300ul tipracks
-    tr_300 = protocol.load_labware('opentrons_96_tiprack_300ul', '6')
-    tr_20 = protocol.load_labware('opentrons_96_tiprack_20ul', '4')
+    tr_300 = protocol.load_labware(labware['tips_large'], slots['tips_large'])
+    tr_20 = protocol.load_labware(labware['tips_small'], slots['tips_small'])
 
-    # Load in pipettes
-    p10_single = protocol.load_instrument('p10_single', 'right', tip_racks=[tr_20])
-    p300_single = protocol.load_instrument('p300_single', 'left', tip_racks=[tr_300])
+    # Load in pipettes. With the multichannel setting an 8-channel p300 adds the competent cells and plates
+    # one reaction plate column at a time, so the reactions should be laid out column-wise by the generator.
+    multichannel = protocol_settings['multichannel']
+    p10_single = protocol.load_instrument(pipettes['small'], pipettes['small_mount'], tip_racks=[tr_20])
+    if multichannel:
+        p300_multi = protocol.load_instrument(pipettes['large_multi'], pipettes['large_mount'], tip_racks=[tr_300])
+        p300 = p300_multi
+    else:
+        p300_single = protocol.load_instrument(pipettes['large'], pipettes['large_mount'], tip_racks=[tr_300])
+        p300 = p300_single
 
     # Load in Bio-Rad 96 Well Plate on Thermocycler Module for GG Assembly, transformation, and outgrowth.
     tc_mod = protocol.load_module('Thermocycler Module')
-    reaction_plate = tc_mod.load_labware('biorad_96_wellplate_200ul_pcr')
+    reaction_plate = tc_mod.load_labware(labware['reaction_plate'])
     tc_mod.open_lid()
     tc_mod.set_block_temperature(4)
 
     # Load in Water & Enzymer+ Buffer, wash water, dilution water, and wash trough (USA Scientific 12 Well Reservoir 22ml)
-    temp_mod = protocol.load_module('Temperature Module', '3')
-    trough = temp_mod.load_labware('opentrons_24_aluminumblock_nest_1.5ml_snapcap', '3')
+    temp_mod = protocol.load_module('Temperature Module', slots['reagent_block'])
+    trough = temp_mod.load_labware(labware['reagent_block'])
     typeII_enzyme_buffer_mix = trough.wells()[0]  # Well A1
     water = trough.wells()[1]  # Well B1
     dilution_water = trough.wells()[2]  # Well C1
     competent_cell = trough.wells()[3]  # Well D1
+    # Competent cells for many reactions are split over several tubes, each serving an equal share of the reactions
+    competent_cells = [trough.wells_by_name()[well_name] for well_name in protocol_settings['cell_tubes']]
     liquid_waste = trough.wells()[4]  # Well A2
 
     # Load in Input DNA Plate
     dna_plate_dict = {}
     plate_name = list(dna_plate_map_dict.keys())
-    dna_plate_dict[plate_name[0]] = protocol.load_labware('biorad_96_wellplate_200ul_pcr', '1', 'Input DNA Plate')
-    dna_plate_dict[plate_name[1]] = protocol.load_labware('opentrons_24_tuberack_eppendorf_1.5ml_safelock_snapcap', '2', 'Input DNA Plate2')
+    dna_plate_dict[plate_name[0]] = protocol.load_labware(labware['dna_plate'], slots['dna_plate'], 'Input DNA Plate')
+    dna_plate_dict[plate_name[1]] = protocol.load_labware(labware['dna_tubes'], slots['dna_tubes'], 'Input DNA Plate2')
+
+    # Load in Agar plates. Each reaction is spotted around the centre of one agar well, following the plating settings.
+    # The 8-channel pipette spots a whole reaction column at once, so it needs agar labware with 8 rows, and takes
+    # the competent cells from the first well of a reservoir, filled from ice just before the cells are added.
+    if multichannel:
+        cell_reservoir = protocol.load_labware('nest_12_reservoir_15ml', slots['cell_reservoir'], 'Competent Cell Reservoir')
+    plating = protocol_settings['plating']
+    agar_plates = [protocol.load_labware(plating['labware'], slot, 'Agar Plate {0}'.format(i + 1))
+                   for i, slot in enumerate(plating['slots'])]
+    if multichannel:
+        agar_positions = [column[0] for agar_plate in agar_plates for column in agar_plate.columns()]
+    else:
+        agar_positions = [well for agar_plate in agar_plates for well in agar_plate.wells()]
+    spot_offsets = [types.Point(x=x, y=y) for x, y in plating['spots']]
+
 
-    # Load in Agar plate
-    agar_plate = protocol.load_labware('corning_12_wellplate_6.9ml_flat', '5', 'Agar Plate')
+    # Part volume and tip handling of the part transfers, as planned by the generator
+    part_volume = protocol_settings['part_volume']
+    wells_per_aspirate = max(int(p10_single.max_volume // part_volume), 1)
+    wash_between_aspirates = protocol_settings['tip_action'] == 'wash'
 
+    # With the instrument setting every step is bracketed by timestamped markers, so exported run logs show
+    # where the time goes. The part in each DNA well is looked up to name the part transfer steps.
+    instrument = protocol_settings['instrument']
+    def mark(event, step):
+        if instrument:
+            protocol.comment('Step {0}: {1} @ {2:.1f}'.format(event, step, time.time()))
+    part_names = {(plate_name, len(dna_plate_dict[plate_name].columns()[0]) * j + i): dna_name.strip()
+                  for plate_name, plate_map in dna_plate_map_dict.items()
+                  for i, row in enumerate(plate_map) for j, dna_name in enumerate(row)
+                  if instrument and isinstance(dna_name, str) and dna_name.strip()}
 
-    # This function checks the existance of DNA parts and returns for well location of the parts
-    def find_dna(name, dna_plate_map_dict, dna_plate_dict):
-        """Return a well containing the named DNA."""
+    # Wells (or columns with the 8-channel pipette) multi-dispensed competent cells per tip, or None to add them one by one
+    cell_batch_size = protocol_settings['cell_batch_size']
+
+    # Tube of premixed buffer and water by water volume per reaction, loaded by the operator from the loading sheet
+    master_mix = protocol_settings['master_mix']
+
+    # The transfer plan holds, for each reaction plate, the water volume of every reaction and the part
+    # transfers as [source plate, source well, destination wells, volume, tip action]. The generator can
+    # compile it offline, in which case it is only replayed here.
+    transfer_plan = protocol_settings['transfer_plan']
+    if transfer_plan is None:
+        # Index every DNA part by name once, so each lookup below is a single dictionary hit.
+        # Wells are numbered column-wise, so the number of rows of each labware gives the offset.
+        dna_well_index = {}
+        duplicated_parts = {}
         for plate_name, plate_map in dna_plate_map_dict.items():
+            num_rows = len(dna_plate_dict[plate_name].columns()[0])
             for i, row in enumerate(plate_map):
                 for j, dna_name in enumerate(row):
-                    if dna_name == name:
-                        if plate_name == 'fixed_input_dna_map':
-                            well_num = 8 * j + i
-                        elif plate_name == 'customised_input_dna_map':
-                            well_num = 4 * j + i
-                        return dna_plate_dict[plate_name].wells()[well_num]
-        raise ValueError("Could not find dna piece named \"{0}\"".format(name))
-
-    # This function checks if the DNA parts exist in the DNA plates and returns for well locaion of output DNA combinations
-    def find_combination(name, combinations_to_make):
-        """Return a well containing the named combination."""
-        for i, combination in enumerate(combinations_to_make):
-            if combination["name"] == name:
-                return reaction_plate.wells()[i]
-        raise ValueError("Could not find combination \"{0}\".".format(name))
-
-    combinations_by_part = {}
-    for i in combinations_to_make:
-        name = i["name"]
-        for j in i["parts"]:
-            if j in combinations_by_part.keys():
-                combinations_by_part[j].append(name)
-            else:
-                combinations_by_part[j] = [name]
-
-    # This section will take the GG buffer and water into the designation wells
-    p10_single.pick_up_tip()
-    for i in range(num_rxns):
-        N = len(combinations_to_make[i]['parts'])
-        p10_single.consolidate(
-            [2, 8 - N],
-            [trough.wells_by_name()[well_name] for well_name in ['A1', 'B1']],
-            reaction_plate.wells()[i].bottom(z=0.5), new_tip='never')
-        # p10_single.blow_out()
-    p10_single.drop_tip()
-
-    # This section of the code combines and mix the DNA parts according to the combination list
-    for part, combinations in combinations_by_part.items():
-        part_well = find_dna(part, dna_plate_map_dict, dna_plate_dict)
-        combination_wells = [find_combination(x, combinations_to_make) for x in combinations]
+                    if not isinstance(dna_name, str) or not dna_name.strip():
+                        continue
+                    dna_name = dna_name.strip()
+                    if dna_name in dna_well_index:
+                        duplicated_parts.setdefault(dna_name, [dna_well_index[dna_name][0]]).append(plate_name)
+                        continue
+                    dna_well_index[dna_name] = (plate_name, num_rows * j + i)
+        if duplicated_parts:
+            raise ValueError("DNA parts found more than once in the plate maps: {0}".format(
+                ", ".join("{0} ({1})".format(name, ", ".join(plates)) for name, plates in duplicated_parts.items())))
+
+        # This function checks the existance of DNA parts and returns for plate and well number of the parts
+        def find_dna(name, dna_plate_map_dict, dna_plate_dict):
+            """Return the plate name and well number containing the named DNA."""
+            if name not in dna_well_index:
+                raise ValueError("Could not find dna piece named \"{0}\"".format(name))
+            return dna_well_index[name]
+
+        # Reactions beyond the capacity of one reaction plate are run on successive plates
+        plate_capacity = len(reaction_plate.wells())
+        transfer_plan = []
+        for i in range(0, num_rxns, plate_capacity):
+            plate_combinations = combinations_to_make[i:i + plate_capacity]
+            combinations_by_part = {}
+            for well_num, combination in enumerate(plate_combinations):
+                for part in combination["parts"]:
+                    if part in combinations_by_part.keys():
+                        combinations_by_part[part].append(well_num)
+                    else:
+                        combinations_by_part[part] = [well_num]
+
+            # Every part is resolved before any liquid is moved, so a missing part stops the run up front
+            part_transfers = []
+            for part, combination_wells in combinations_by_part.items():
+                source_plate, source_well = find_dna(part, dna_plate_map_dict, dna_plate_dict)
+                for j in range(0, len(combination_wells), wells_per_aspirate):
+                    tip_action = 'wash' if j > 0 and wash_between_aspirates else 'new_tip'
+                    part_transfers.append([source_plate, source_well, combination_wells[j:j + wells_per_aspirate],
+                                           part_volume, tip_action])
+            transfer_plan.append({
+                'water_volumes': [volumes['reaction'] - volumes['buffer'] - len(combination['parts']) * part_volume
+                                  for combination in plate_combinations],
+                'part_transfers': part_transfers})
+    else:
+        # Well numbers of a plan compiled offline refer to the DNA labware it was compiled for
+        for plate_plan in transfer_plan:
+            for plate_name, load_name in plate_plan.get('source_labware', {}).items():
+                if dna_plate_dict[plate_name].load_name != load_name:
+                    raise ValueError("The transfer plan was compiled for {0} as {1}, but {2} is loaded; "
+                                     "regenerate the protocol.".format(load_name, plate_name,
+                                                                       dna_plate_dict[plate_name].load_name))
+
+    # With the pipelined setting the next reaction plate is set up in slot 9 while the current one cycles. The
+    # temperature module holds the reagent block, so the next plate stands at room temperature until it cycles.
+    pipelined = protocol_settings['pipelined'] and len(transfer_plan) > 1
+    if pipelined:
+        if multichannel:
+            raise ValueError('The pipelined setting needs slot 9, which holds the competent cell reservoir in multichannel mode.')
+        setup_plate = protocol.load_labware(labware['reaction_plate'], slots['setup_plate'], 'Next Reaction Plate')
+
+    # This generator sets up one reaction plate, handing back control after each step so the setup of the next
+    # plate can be interleaved with the thermocycler holds of the current one
+    def assemble(plate_plan, destination_plate, plate_number):
+        # This section will take the GG buffer and water into the designation wells
+        mark('start', 'plate {0} buffer setup'.format(plate_number))
         p10_single.pick_up_tip()
-        while combination_wells:
-            if len(combination_wells) > 10:
-                current_wells = combination_wells[0:10]
-                combination_wells = combination_wells[10:]
+        if master_mix:
+            # Premixed buffer and water, one tube per water volume, dispensed to the reactions needing it in a single
+            # aspiration each; multi-dispensing only pays for its disposal volume when a tip holds two mixes or more
+            for water_volume, tube_name in master_mix.items():
+                mix_wells = [destination_plate.wells()[i].bottom(z=0.5)
+                             for i, volume in enumerate(plate_plan['water_volumes']) if volume == water_volume]
+                if not mix_wells:
+                    continue
+                mix_volume = volumes['buffer'] + water_volume
+                mix_tube = trough.wells_by_name()[tube_name].bottom(z=0.5)
+                if 2 * mix_volume + p10_single.min_volume <= p10_single.max_volume:
+                    p10_single.distribute(mix_volume, mix_tube, mix_wells, disposal_volume=p10_single.min_volume,
+                                          blow_out=True, blowout_location='source well', new_tip='never')
+                else:
+                    p10_single.transfer(mix_volume, mix_tube, mix_wells, new_tip='never')
+                yield True
+        else:
+            for i, water_volume in enumerate(plate_plan['water_volumes']):
+                p10_single.consolidate(
+                    [volumes['buffer'], water_volume],
+                    [trough.wells_by_name()[well_name] for well_name in ['A1', 'B1']],
+                    destination_plate.wells()[i].bottom(z=0.5), new_tip='never')
+                # p10_single.blow_out()
+                yield True
+        p10_single.drop_tip()
+        mark('end', 'plate {0} buffer setup'.format(plate_number))
+
+        # This section of the code combines and mix the DNA parts according to the transfer plan
+        for source_plate, source_well, combination_wells, volume, tip_action in plate_plan['part_transfers']:
+            part_step = 'plate {0} part {1}'.format(plate_number, part_names.get((source_plate, source_well), source_well))
+            mark('start', part_step)
+            if tip_action == 'new_tip':
+                if p10_single.has_tip:
+                    p10_single.drop_tip()
+                p10_single.pick_up_tip()
             else:
-                current_wells = combination_wells
-                combination_wells = []
-            p10_single.aspirate(1 * len(current_wells), part_well.bottom(z=0.5))
-            for i in current_wells:
-                p10_single.dispense(1, i.bottom(z=0.5))
-            if combination_wells:
                 # One washing steps are added to allow recycling of the tips #洗完之后直接进入下一个循环
-                p10_single.mix(2, 10, water.bottom(z=0.5))
+                p10_single.mix(2, p10_single.max_volume, water.bottom(z=0.5))
                 p10_single.blow_out()
-        p10_single.drop_tip()
+            p10_single.aspirate(volume * len(combination_wells), dna_plate_dict[source_plate].wells()[source_well].bottom(z=0.5))
+            for i in combination_wells:
+                p10_single.dispense(volume, destination_plate.wells()[i].bottom(z=0.5))
+            mark('end', part_step)
+            yield True
+        if p10_single.has_tip:
+            p10_single.drop_tip()
 
-    # Seal the Reaction Plate with adhesive film and conduct the GG program
-    protocol.pause( 'Please seal the PCR plates and resume run to conduct GG program.')
-
-    tc_mod.close_lid()
-    tc_mod.set_lid_temperature(105)
-    profile1 = [
-            {'temperature': 37, 'hold_time_seconds': 300},
-            {'temperature': 16, 'hold_time_seconds': 120}]
-    tc_mod.execute_profile(steps=profile1, repetitions=25, block_max_volume=20)
-    profile2 = [
-            {'temperature': 60, 'hold_time_seconds': 300}]
-    tc_mod.execute_profile(steps=profile2, repetitions=1, block_max_volume=20)
-    tc_mod.set_block_temperature(4)
-    tc_mod.open_lid()
-    #temp_mod.set_temperature(4) #Optional
-    protocol.pause('Place remove the seal film of the PCR plates and resume run to conduct heat shock program.')
-
-    # Add competent cells
-    for i in range(0, num_rxns):
-            p300_single.pick_up_tip()
-            p300_single.transfer(50, competent_cell.bottom(z=0.5), reaction_plate.wells()[i].bottom(z=0.5), new_tip='never')
-            p300_single.mix(1, 25, reaction_plate.wells()[i].bottom(z=0.5))
-            p300_single.blow_out()
-            p300_single.drop_tip()
-    temp_mod.deactivate()
-    protocol.pause('Place seal the PCR paltes again and resume run to conduct HS program.')
-
-     # Incubate at 4℃, then heat shock.
-    tc_mod.close_lid()
-    profile1 = [
-            {'temperature': 4, 'hold_time_seconds': 600},
-            {'temperature': 42, 'hold_time_seconds': 90},
-            {'temperature': 4, 'hold_time_seconds': 120},
-            {'temperature': 37, 'hold_time_seconds': 3600}]
-    tc_mod.execute_profile(steps=profile1, repetitions=1, block_max_volume=40)
-    tc_mod.set_block_temperature(37)
-    tc_mod.open_lid()
-    protocol.pause('Please remove the seal and resume for plating')
-
-    # Plating
-    a = len(agar_plate.wells())
-    for i in range(0, num_rxns):
-        if i <a:
-            p300_single.pick_up_tip()
-            p300_single.mix(1, 25, reaction_plate.wells()[i].bottom(z=0.5))
-            p300_single.distribute(4.5, reaction_plate.wells()[i].bottom(z=0.5),
-                               [agar_plate.wells()[i].bottom(z=6).move(position) for position in
-                                [types.Point(x=0, y=0),
-                                 types.Point(x=0, y=4), types.Point(x=4, y=0), types.Point(x=0, y=-4), types.Point(x=-4, y=0),
-                                 types.Point(x=0, y=8), types.Point(x=5.5, y=5.5), types.Point(x=8, y=0),
-                                 types.Point(x=5.5, y=-5.5), types.Point(x=0, y=-8), types.Point(x=-5.5, y=-5.5),
-                                 types.Point(x=-8, y=0), types.Point(x=-5.5, y=5.5)]],
-                               disposal_volume=1.5, new_tip='never')
-            p300_single.blow_out()
-            p300_single.drop_tip()
-        if i >= a:
-            if i % a == 0:
-               protocol.pause('Please change a new agar plates')    
-            p300_single.pick_up_tip()
-            p300_single.mix(1, 25, reaction_plate.wells()[i].bottom(z=0.5))
-            p300_single.distribute(4.5, reaction_plate.wells()[i].bottom(z=0.5),
-                                   [agar_plate.wells()[i%a].bottom(z=6).move(position) for position in
-                                    [types.Point(x=0, y=0),
-                                     types.Point(x=0, y=4), types.Point(x=4, y=0), types.Point(x=0, y=-4),
-                                     types.Point(x=-4, y=0),
-                                     types.Point(x=0, y=8), types.Point(x=5.5, y=5.5), types.Point(x=8, y=0),
-                                     types.Point(x=5.5, y=-5.5), types.Point(x=0, y=-8), types.Point(x=-5.5, y=-5.5),
-                                     types.Point(x=-8, y=0), types.Point(x=-5.5, y=5.5)]],
-                                   disposal_volume=1.5, new_tip='never')
-            p300_single.blow_out()
-            p300_single.drop_tip()
+    # Runs a thermocycler profile. When setup steps are pending, every hold is timed on the robot clock and
+    # the steps run while the block holds its temperature, as long as a step fits in the remaining hold time.
+    # While the protocol is analysed or simulated, delays do not advance the clock, so each hold instead runs
+    # the number of steps that fit in it at SETUP_STEP_SECONDS per step, and the analysed run matches the real one.
+    def execute_profile(steps, repetitions, pending_steps=None):
+        if pending_steps is None:
+            tc_mod.execute_profile(steps=steps, repetitions=repetitions, block_max_volume=20)
+            return
+        for _ in range(repetitions):
+            for step in steps:
+                tc_mod.set_block_temperature(step['temperature'], block_max_volume=20)
+                hold_end = time.monotonic() + step['hold_time_seconds']
+                if protocol.is_simulating():
+                    for _ in range(max(math.ceil(step['hold_time_seconds'] / SETUP_STEP_SECONDS) - 1, 0)):
+                        if not next(pending_steps, False):
+                            break
+                else:
+                    while time.monotonic() + SETUP_STEP_SECONDS < hold_end and next(pending_steps, False):
+                        pass
+                if hold_end > time.monotonic():
+                    protocol.delay(seconds=hold_end - time.monotonic())
+
+    # GG program of each reaction plate; plates grouped by assembly complexity may run a shorter one
+    gg_programs = protocol_settings['gg_programs']
+
+    for plate_index, plate_plan in enumerate(transfer_plan):
+        num_plate_rxns = len(plate_plan['water_volumes'])
+        if plate_index > 0:
+            if not pipelined:
+                protocol.pause('Please load a fresh reaction plate and agar plates, replace the tip racks and refill buffer, water and competent cells, then resume run for reaction plate {0} of {1}.'.format(plate_index + 1, len(transfer_plan)))
+                p10_single.reset_tipracks()
+                p300.reset_tipracks()
+            tc_mod.set_block_temperature(4)
+
+        # In pipelined runs, plates after the first were already set up while the previous plate cycled
+        if not pipelined or plate_index == 0:
+            protocol.comment('Phase: assembly')
+            for _ in assemble(plate_plan, reaction_plate, plate_index + 1):
+                pass
+
+        # Seal the Reaction Plate with adhesive film and conduct the GG program
+        next_plate_steps = None
+        if pipelined:
+            # The plate set up in slot 9 replaces the previous one, and the next plate is set up in its place
+            if plate_index > 0:
+                instructions = ['move the sealed plate in slot 9 onto the thermocycler, load fresh agar plates, replace the 300ul tip rack and refill competent cells']
+            else:
+                instructions = ['seal the PCR plates']
+            if plate_index + 1 < len(transfer_plan):
+                instructions.append('place an empty PCR plate in slot 9 (it is not cooled, so its reactions stay at room '
+                                    'temperature until their GG program), replace the 20ul tip rack and refill buffer and water')
+            protocol.pause('Please {0}, then resume run to conduct GG program for reaction plate {1} of {2}.'.format(', '.join(instructions), plate_index + 1, len(transfer_plan)))
+            if plate_index > 0:
+                p300.reset_tipracks()
+            if plate_index + 1 < len(transfer_plan):
+                p10_single.reset_tipracks()
+                next_plate_steps = assemble(transfer_plan[plate_index + 1], setup_plate, plate_index + 2)
+        else:
+            protocol.pause( 'Please seal the PCR plates and resume run to conduct GG program.')
+
+        protocol.comment('Phase: GG cycling')
+        tc_mod.close_lid()
+        tc_mod.set_lid_temperature(105)
+        gg_program = gg_programs[plate_index]
+        mark('start', 'plate {0} GG program'.format(plate_index + 1))
+        execute_profile(gg_program['steps'], gg_program['cycles'], next_plate_steps)
+        mark('end', 'plate {0} GG program'.format(plate_index + 1))
+        mark('start', 'plate {0} GG final steps'.format(plate_index + 1))
+        execute_profile(gg_program['final_steps'], 1, next_plate_steps)
+        mark('end', 'plate {0} GG final steps'.format(plate_index + 1))
+        if next_plate_steps is not None:
+            # Setup steps that did not fit in the holds
+            for _ in next_plate_steps:
+                pass
+        tc_mod.set_block_temperature(4)
+        tc_mod.open_lid()
+        #temp_mod.set_temperature(4) #Optional
+        # Batched cell addition takes the cells from a chilled tube, as they wait in the tip between wells
+        if cell_batch_size and not multichannel:
+            temp_mod.set_temperature(4)
+        if multichannel:
+            protocol.pause('Place remove the seal film of the PCR plates, fill the first well of the competent cell reservoir and resume run to conduct heat shock program.')
+        elif next_plate_steps is not None:
+            protocol.pause('Place remove the seal film of the PCR plates, seal the plate in slot 9 and resume run to conduct heat shock program.')
+        else:
+            protocol.pause('Place remove the seal film of the PCR plates and resume run to conduct heat shock program.')
+
+        # Add competent cells. Each tip (or tip column) is returned to the rack and reused to plate its own reaction
+        # (or reaction column), so one 300ul tip rack serves a whole reaction plate.
+        protocol.comment('Phase: heat shock')
+        mark('start', 'plate {0} cell addition'.format(plate_index + 1))
+        if multichannel:
+            # Empty wells of a partly filled last column receive cells too, but are not plated.
+            num_plate_columns = math.ceil(num_plate_rxns / 8)
+            tip_positions = [column[0] for column in tr_300.columns()]
+            cell_sources = [cell_reservoir.wells()[0]] * num_plate_columns
+            cell_destinations = [column[0] for column in reaction_plate.columns()[:num_plate_columns]]
+        else:
+            tip_positions = tr_300.wells()
+            cell_sources = [competent_cells[i * len(competent_cells) // num_plate_rxns] for i in range(num_plate_rxns)]
+            cell_destinations = reaction_plate.wells()[:num_plate_rxns]
+        if cell_batch_size:
+            # Cells are multi-dispensed from above the wells in batches, so the tip never touches a reaction and
+            # the wells of a plate receive their cells within a short span. A batch never spans two cell tubes;
+            # its tip is returned to the rack and later plates the first reaction of the batch. The cells are
+            # mixed into the reactions when they are plated.
+            batch_size = min(cell_batch_size, int((p300.max_volume - p300.min_volume) // volumes['cells']))
+            batches = []
+            for i, source in enumerate(cell_sources):
+                if batches and batches[-1][0] is source and len(batches[-1][1]) < batch_size:
+                    batches[-1][1].append(i)
+                else:
+                    batches.append((source, [i]))
+            for source, batch_wells in batches:
+                p300.pick_up_tip(tip_positions[batch_wells[0]])
+                p300.distribute(volumes['cells'], source.bottom(z=0.5),
+                                [cell_destinations[i].top(z=-2) for i in batch_wells],
+                                disposal_volume=p300.min_volume, blow_out=True, blowout_location='source well',
+                                new_tip='never')
+                p300.return_tip()
+        else:
+            for i, source in enumerate(cell_sources):
+                p300.pick_up_tip(tip_positions[i])
+                p300.transfer(volumes['cells'], source.bottom(z=0.5), cell_destinations[i].bottom(z=0.5), new_tip='never')
+                p300.mix(1, volumes['cell_mix'], cell_destinations[i].bottom(z=0.5))
+                p300.blow_out()
+                p300.return_tip()
+        mark('end', 'plate {0} cell addition'.format(plate_index + 1))
+        temp_mod.deactivate()
+        protocol.pause('Place seal the PCR paltes again and resume run to conduct HS program.')
+
+         # Incubate at 4℃, then heat shock.
+        tc_mod.close_lid()
+        mark('start', 'plate {0} heat shock program'.format(plate_index + 1))
+        tc_mod.execute_profile(steps=heat_shock_program, repetitions=1, block_max_volume=40)
+        mark('end', 'plate {0} heat shock program'.format(plate_index + 1))
+        tc_mod.set_block_temperature(37)
+        tc_mod.open_lid()
+        protocol.pause('Please remove the seal and resume for plating')
+
+        # Plating. Reactions (or reaction columns) go to successive agar positions over all loaded agar plates,
+        # with a pause to replace the agar plates once every position is used
+        protocol.comment('Phase: plating')
+        if multichannel:
+            plating_sources = [column[0] for column in reaction_plate.columns()[:num_plate_columns]]
+        else:
+            plating_sources = reaction_plate.wells()[:num_plate_rxns]
+        for i, source in enumerate(plating_sources):
+            if i > 0 and i % len(agar_positions) == 0:
+                protocol.pause('Please change a new agar plates')
+            plating_step = 'plate {0} plating {1}'.format(plate_index + 1, source.well_name)
+            mark('start', plating_step)
+            p300.pick_up_tip(tip_positions[i])
+            p300.mix(1, volumes['cell_mix'], source.bottom(z=0.5))
+            p300.distribute(plating['spot_volume'], source.bottom(z=0.5),
+                            [agar_positions[i % len(agar_positions)].bottom(z=plating['height']).move(offset)
+                             for offset in spot_offsets],
+                            disposal_volume=plating['disposal_volume'], new_tip='never')
+            p300.blow_out()
+            p300.drop_tip()
+            mark('end', plating_step)
     tc_mod.deactivate()
@@ -0,0 +1,17 @@
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The app modules are flat files in streamlit_app/, imported by name as the app and the batch tool do;
+# the benchmark runner is imported the same way from benchmarks/
+sys.path.insert(0, os.path.join(REPO_DIR, "streamlit_app"))
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+def make_combinations(num_combinations, num_parts, parts_per_combination=3):
+    """
+    Builds combinations sharing parts: parts_per_combination - 1 of num_parts parts, then one of four backbones.
+    """
+    return [{"name": f"c{i}", "parts": [f"p{(i * (6 * j + 1) + 3 * j) % num_parts}"
+                                        for j in range(parts_per_combination - 1)] + [f"b{i % 4}"]}
+            for i in range(num_combinations)]
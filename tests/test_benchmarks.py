@@ -0,0 +1,23 @@
+from run_benchmarks import compare_results
+
+def make_results(seconds, peak_kib, tips):
+    return {"cases": {"high_reuse_96": {
+        "stages": {"generate_protocol": {"seconds": seconds, "peak_kib": peak_kib}},
+        "commands": {"assembly": {"pick_up_tip": tips}},
+    }}}
+
+BASELINE = make_results(0.2, 1000, 96)
+
+def test_run_time_noise_is_not_a_regression():
+    assert compare_results(make_results(0.6, 1000, 96), BASELINE) == []
+
+def test_run_time_is_compared_with_a_tolerance():
+    assert compare_results(make_results(0.6, 1000, 96), BASELINE, time_tolerance=0.5) == \
+        ["high_reuse_96 generate_protocol: 0.600 s, baseline 0.200 s"]
+    assert compare_results(make_results(0.25, 1000, 96), BASELINE, time_tolerance=0.5) == []
+
+def test_memory_and_commands_are_compared():
+    assert compare_results(make_results(0.2, 1300, 97), BASELINE) == [
+        "high_reuse_96 generate_protocol: peak 1300 KiB, baseline 1000 KiB",
+        "high_reuse_96 assembly: 97 pick_up_tip commands, baseline 96",
+    ]
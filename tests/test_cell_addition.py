@@ -0,0 +1,29 @@
+import pytest
+
+from app import build_outputs
+from conftest import make_combinations
+from simulator import simulate_protocol
+from test_transfer_plan import read_template
+
+DNA_PLATE_MAP_DICT = {"PlateMap1": [[f"p{i + j}" for i in range(8)] for j in range(0, 40, 8)] +
+                                   [[f"b{i}" for i in range(4)]], "PlateMap2": []}
+
+def simulate_cell_addition(**options):
+    outputs = build_outputs(DNA_PLATE_MAP_DICT, make_combinations(96, 40, 2), **options)
+    assert not outputs["preflight"]["errors"]
+    report = simulate_protocol(read_template().render(DNA_PLATE_MAP_DICT, outputs["combinations"],
+                                                      outputs["protocol_settings"]))
+    return report["cell_addition_spans"][0], report["phase_commands"]["heat shock"]["pick_up_tip"]
+
+@pytest.mark.parametrize("multichannel, cell_batch_size, tips", [(False, 5, 4 * 5), (True, 4, 3)])
+def test_batched_cells_reach_the_plate_in_a_shorter_span(multichannel, cell_batch_size, tips):
+    one_by_one_span, one_by_one_tips = simulate_cell_addition(multichannel=multichannel)
+    batched_span, batched_tips = simulate_cell_addition(multichannel=multichannel, cell_batch_size=cell_batch_size)
+    assert one_by_one_tips == (12 if multichannel else 96)
+    # Four cell tubes of 24 reactions take 5 batches each; 12 columns take 3 batches of 4
+    assert batched_tips == tips
+    assert batched_span < one_by_one_span / 3
+
+def test_batch_size_is_bounded_by_the_p300():
+    # 5 x 50 µL of cells plus the disposal volume fill the p300 single; larger batches are split
+    assert simulate_cell_addition(cell_batch_size=10) == simulate_cell_addition(cell_batch_size=5)
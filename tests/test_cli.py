@@ -0,0 +1,27 @@
+import io
+
+import pytest
+
+from app import build_outputs
+from cli import generate_outputs
+from test_transfer_plan import COMBINATIONS, DNA_PLATE_MAP_DICT, TEMPLATE_PATH
+
+def read_template_file():
+    with open(TEMPLATE_PATH, "rb") as template_file:
+        return io.BytesIO(template_file.read())
+
+def test_cli_writes_the_outputs_of_the_shared_pipeline(tmp_path):
+    outputs = build_outputs(DNA_PLATE_MAP_DICT, COMBINATIONS, master_mix=True)
+    summary = generate_outputs(DNA_PLATE_MAP_DICT, COMBINATIONS, read_template_file(), {}, str(tmp_path),
+                               master_mix=True)
+    assert summary["combinations"] == len(outputs["combinations"]) == 2
+    assert summary["p10_tips"] == outputs["distribution_plan"]["tips"]
+    assert outputs["protocol_settings"]["master_mix"] == outputs["master_mix_plan"]["tubes"]
+    assert {path.name for path in tmp_path.iterdir()} >= {"protocol.py", "plate_map.csv", "master_mix.csv"}
+
+def test_failed_preflight_stops_the_cli(tmp_path):
+    combinations = COMBINATIONS + [{"name": "c3", "parts": ["missing"]}]
+    assert build_outputs(DNA_PLATE_MAP_DICT, combinations)["preflight"]["errors"]
+    with pytest.raises(ValueError, match="missing"):
+        generate_outputs(DNA_PLATE_MAP_DICT, combinations, read_template_file(), {}, str(tmp_path))
+    assert not list(tmp_path.iterdir())
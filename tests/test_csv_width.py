@@ -0,0 +1,36 @@
+import io
+
+import pytest
+
+from app import MAX_ASSEMBLY_COLUMNS, read_combinations_csv, read_program_assignments_csv
+
+def make_csv(rows):
+    return io.BytesIO(("\n".join(",".join(row) for row in rows) + "\n").encode("utf-8-sig"))
+
+def test_rows_of_varying_width_are_read():
+    rows = [["c1", "p1", "p2"], [], ["c2", "p3"], ["c3"] + [f"p{i}" for i in range(MAX_ASSEMBLY_COLUMNS - 1)]]
+    combinations = list(read_combinations_csv(make_csv(rows), chunksize=2))
+    assert [combination["name"] for combination in combinations] == ["c1", "c2", "c3"]
+    assert combinations[0]["parts"] == ["p1", "p2"]
+    assert len(combinations[2]["parts"]) == MAX_ASSEMBLY_COLUMNS - 1
+
+@pytest.mark.parametrize("extra_fields", [1, 9])
+@pytest.mark.parametrize("chunksize", [1, 2, 10000])
+def test_too_wide_row_is_rejected(extra_fields, chunksize):
+    wide_row = ["c2"] + [f"p{i}" for i in range(MAX_ASSEMBLY_COLUMNS - 1 + extra_fields)]
+    with pytest.raises(ValueError, match=f"Row 2 has {MAX_ASSEMBLY_COLUMNS + extra_fields} fields"):
+        list(read_combinations_csv(make_csv([["c1", "p1"], wide_row, ["c3", "p2"]]), chunksize=chunksize))
+
+def test_path_is_read(tmp_path):
+    path = tmp_path / "combination-to-make.csv"
+    path.write_bytes(make_csv([["c1", "p1"]]).getvalue())
+    assert list(read_combinations_csv(str(path))) == [{"name": "c1", "parts": ["p1"]}]
+
+def test_program_assignments_are_read():
+    assert read_program_assignments_csv(make_csv([["c1", "short"], ["c2"], ["c3", "long"]])) == \
+        {"c1": "short", "c3": "long"}
+    assert read_program_assignments_csv(make_csv([["c1"]])) == {}
+
+def test_too_wide_program_assignment_is_rejected():
+    with pytest.raises(ValueError, match="Row 2 has 3 fields"):
+        read_program_assignments_csv(make_csv([["c1", "short"], ["c2", "long", "short"]]))
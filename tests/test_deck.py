@@ -0,0 +1,27 @@
+import pytest
+
+from deck import PIPETTE_MAX_VOLUMES, PIPETTE_MIN_VOLUMES, labware_grid, well_capacity
+from distribution import plan_part_distribution
+from master_mix import plan_master_mix
+from templates import validate_parameter_values
+
+COMBINATIONS = [{"name": "c1", "parts": ["p1", "p2"]}, {"name": "c2", "parts": ["p1", "p2", "p3"]}]
+
+def test_pipette_tables_cover_the_same_models():
+    assert set(PIPETTE_MAX_VOLUMES) == set(PIPETTE_MIN_VOLUMES)
+    assert all(PIPETTE_MIN_VOLUMES[model] < PIPETTE_MAX_VOLUMES[model] for model in PIPETTE_MAX_VOLUMES)
+
+@pytest.mark.parametrize("pipette", [model for model in PIPETTE_MAX_VOLUMES if "multi" not in model])
+def test_every_accepted_small_pipette_can_be_planned(pipette):
+    validate_parameter_values({"pipettes": {"small": pipette}})
+    assert plan_part_distribution(COMBINATIONS, pipette=pipette)["pipette"] == pipette
+    assert plan_master_mix(COMBINATIONS, pipette=pipette)["tubes"]
+
+def test_unknown_pipette_is_rejected():
+    with pytest.raises(ValueError, match="Unknown pipette"):
+        plan_master_mix(COMBINATIONS, pipette="p1000_single")
+
+def test_labware_grid_and_capacity():
+    assert labware_grid("corning_48_wellplate_1.6ml_flat")[:2] == (6, 8)
+    assert well_capacity("corning_48_wellplate_1.6ml_flat") == 1600
+    assert well_capacity("biorad_96_wellplate_200ul_pcr") == 200
@@ -0,0 +1,53 @@
+import csv
+import io
+from collections import Counter
+
+import pytest
+
+from fleet import default_fleet, estimate_robot_seconds, export_part_loading_sheet, plan_fleet
+from profiles import GG_PROGRAMS, choose_program, plan_gg_programs, plate_programs
+from sharding import PLATE_CAPACITY
+
+PARTS = [f"p{i}" for i in range(30)]
+COMBINATIONS = [{"name": f"c{i}", "parts": [PARTS[i % 30], PARTS[(i * 7 + 1) % 30], PARTS[(i * 11 + 2) % 30]]
+                 if i % 3 else [PARTS[i % 30], PARTS[(i + 5) % 30], PARTS[(i + 10) % 30], PARTS[(i + 20) % 30]]}
+                for i in range(300)]
+# c1 sits in row E of the tube rack, which only the 48-tube rack has
+DNA_PLATE_MAP_DICT = {"PlateMap1": [["p1"]], "PlateMap2": [[""], [""], [""], [""], ["c1"]]}
+TUBES_48 = {"labware": {"dna_tubes": "corning_48_wellplate_1.6ml_flat"}}
+
+@pytest.mark.parametrize("num_robots", [1, 2, 3, 5])
+def test_every_combination_goes_to_exactly_one_robot(num_robots):
+    fleet_plan = plan_fleet(COMBINATIONS, default_fleet(num_robots))
+    assigned = [combination["name"] for robot in fleet_plan["robots"] for combination in robot["combinations"]]
+    assert sorted(assigned) == sorted(combination["name"] for combination in COMBINATIONS)
+    for robot in fleet_plan["robots"]:
+        assert robot["plates"] == -(-len(robot["combinations"]) // PLATE_CAPACITY)
+
+def test_loading_sheet_uses_the_labware_of_the_robot():
+    robot = {"name": "ot2-b", "template_parameters": TUBES_48,
+             "combinations": [{"name": "r1", "parts": ["p1", "c1"]}, {"name": "r2", "parts": ["c1"]}]}
+    rows = list(csv.DictReader(io.StringIO(export_part_loading_sheet(
+        DNA_PLATE_MAP_DICT, robot, {"p1": 1, "c1": 2}, part_volume=2, dead_volume=1))))
+    assert [(row["part"], row["location"], row["volume_ul"]) for row in rows] == \
+        [("p1", "PlateMap1 A1", "3"), ("c1", "PlateMap2 E1", "5")]
+    with pytest.raises(ValueError):
+        export_part_loading_sheet(DNA_PLATE_MAP_DICT, dict(robot, template_parameters={}), {"p1": 1, "c1": 2})
+
+def test_estimate_charges_the_gg_program_of_each_plate():
+    standard = estimate_robot_seconds(2 * PLATE_CAPACITY, 10)
+    short = estimate_robot_seconds(2 * PLATE_CAPACITY, 10, gg_programs=[GG_PROGRAMS["short"]])
+    saved = 15 * sum(step["hold_time_seconds"] for step in GG_PROGRAMS["standard"]["steps"])
+    assert standard - short == saved
+
+def test_plate_programs_match_the_grouped_plan():
+    program_plan = plan_gg_programs(COMBINATIONS)
+    counts = Counter(choose_program(combination) for combination in COMBINATIONS)
+    assert plate_programs(counts) == program_plan["programs"]
+    assert set(program_plan["programs"]) == {"short", "standard"}
+
+def test_adaptive_fleet_is_estimated_with_shorter_programs():
+    robots = default_fleet(2)
+    standard = plan_fleet(COMBINATIONS, robots)
+    adapted = plan_fleet(COMBINATIONS, robots, adapt_programs=True)
+    assert adapted["makespan_seconds"] < standard["makespan_seconds"]
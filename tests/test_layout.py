@@ -0,0 +1,30 @@
+from conftest import make_combinations
+from layout import plan_reaction_layout, summarise_layout
+from simulator import simulate_protocol
+from test_transfer_plan import read_template
+
+def test_layout_reorders_reactions_within_their_plate():
+    combinations = make_combinations(100, 40, 2) + make_combinations(50, 40, 4)
+    laid_out = plan_reaction_layout(combinations, plate_capacity=96)
+    assert [id(combination) for combination in laid_out[:96]] != [id(combination) for combination in combinations[:96]]
+    assert sorted(map(id, laid_out[:96])) == sorted(map(id, combinations[:96]))
+    assert sorted(map(id, laid_out[96:])) == sorted(map(id, combinations[96:]))
+    part_counts = [len(combination["parts"]) for combination in laid_out[96:]]
+    assert part_counts == sorted(part_counts)
+
+def test_summary_counts_columns_with_one_part_count():
+    combinations = make_combinations(12, 40, 2) + make_combinations(8, 40, 4)
+    assert summarise_layout(combinations) == {"columns": 3, "full_columns": 2, "uniform_columns": 1}
+    assert summarise_layout(plan_reaction_layout(combinations)) == \
+        {"columns": 3, "full_columns": 2, "uniform_columns": 1}
+    assert summarise_layout(plan_reaction_layout(make_combinations(16, 40, 2) + make_combinations(8, 40, 4)))[
+        "uniform_columns"] == 3
+
+def test_multichannel_protocol_adds_cells_a_column_at_a_time():
+    combinations = plan_reaction_layout(make_combinations(20, 8, 2))
+    dna_plate_map_dict = {"PlateMap1": [[f"p{i}" for i in range(8)], [f"b{i}" for i in range(4)]], "PlateMap2": []}
+    for multichannel, dispenses in [(False, 20), (True, 3)]:
+        report = simulate_protocol(read_template().render(dna_plate_map_dict, combinations,
+                                                          {"multichannel": multichannel}))
+        assert report["phase_commands"]["heat shock"]["dispense"] == dispenses
+    assert report["tips_by_pipette"]["p300_multi"] == 3 * 8
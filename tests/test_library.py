@@ -0,0 +1,35 @@
+import io
+import itertools
+
+import pytest
+
+from app import MAX_LIBRARY_COLUMNS, read_library_csv
+from library import expand_library, parse_library_rows, sample_design_indices
+
+def test_library_is_read():
+    library = read_library_csv(io.BytesIO(b"promoter,p1,p2\n\nCDS,c1\nexclude,p2,c1\n"))
+    assert library["positions"] == [("promoter", ["p1", "p2"]), ("CDS", ["c1"])]
+    assert library["exclusions"] == [frozenset({"p2", "c1"})]
+
+def test_too_wide_library_row_is_rejected():
+    candidates = ",".join(f"p{i}" for i in range(120))
+    with pytest.raises(ValueError, match=f"Row 2 has 121 fields, more than the {MAX_LIBRARY_COLUMNS}"):
+        read_library_csv(io.BytesIO(f"promoter,p1\nCDS,{candidates}\n".encode()))
+
+@pytest.mark.parametrize("num_designs", [1, 2, 3, 17, 1000, 4097])
+def test_sampled_indices_permute_the_product(num_designs):
+    assert sorted(sample_design_indices(num_designs, seed=3)) == list(range(num_designs))
+
+def test_sampled_indices_depend_on_the_seed():
+    first = list(itertools.islice(sample_design_indices(10 ** 30, seed=1), 5))
+    assert first == list(itertools.islice(sample_design_indices(10 ** 30, seed=1), 5))
+    assert first != list(itertools.islice(sample_design_indices(10 ** 30, seed=2), 5))
+    assert all(0 <= index < 10 ** 30 for index in first)
+
+def test_sample_skips_excluded_designs():
+    library = parse_library_rows([["a"] + [f"a{i}" for i in range(10)], ["b"] + [f"b{i}" for i in range(10)],
+                                  ["exclude", "a0", "b0"]])
+    designs = list(expand_library(library, sample_size=99, seed=5))
+    assert len(designs) == 99
+    assert len({design["name"] for design in designs}) == 99
+    assert ["a0", "b0"] not in [design["parts"] for design in designs]
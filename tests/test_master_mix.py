@@ -0,0 +1,50 @@
+import csv
+import io
+
+import pytest
+
+from master_mix import MASTER_MIX_TUBES, TUBE_DEAD_VOLUME, export_loading_sheet, plan_master_mix
+from simulator import simulate_protocol
+from test_transfer_plan import read_template
+
+COMBINATIONS = ([{"name": f"a{i}", "parts": ["p1", "p2", "p3", "p4"]} for i in range(20)]
+                + [{"name": f"b{i}", "parts": ["p1", "p2"]} for i in range(10)])
+DNA_PLATE_MAP_DICT = {"PlateMap1": [["p1", "p2", "p3", "p4"]], "PlateMap2": []}
+
+def test_one_tube_per_part_count():
+    master_mix_plan = plan_master_mix(COMBINATIONS)
+    # Tubes are keyed by the water volume of a reaction, most water first
+    assert master_mix_plan["tubes"] == {6: MASTER_MIX_TUBES[0], 4: MASTER_MIX_TUBES[1]}
+    rows = {row["parts_per_reaction"]: row for row in master_mix_plan["loading_sheet"]}
+    assert (rows[4]["reactions"], rows[4]["mix_per_reaction_ul"]) == (20, 6)
+    assert (rows[2]["reactions"], rows[2]["mix_per_reaction_ul"]) == (10, 8)
+    assert rows[4]["buffer_ul"] + rows[4]["water_ul"] == pytest.approx(rows[4]["total_ul"], abs=0.1)
+
+def test_disposal_volume_only_when_multi_dispensing():
+    p10_rows = plan_master_mix(COMBINATIONS, pipette="p10_single")["loading_sheet"]
+    assert [(row["mix_per_reaction_ul"], row["wells_per_aspiration"]) for row in p10_rows] == [(8, 1), (6, 1)]
+    assert p10_rows[1]["total_ul"] == 20 * 6 + TUBE_DEAD_VOLUME
+    p20_rows = plan_master_mix(COMBINATIONS, pipette="p20_single_gen2")["loading_sheet"]
+    assert [(row["mix_per_reaction_ul"], row["wells_per_aspiration"]) for row in p20_rows] == [(8, 2), (6, 3)]
+    assert p20_rows[1]["total_ul"] == 20 * 6 + 1 + TUBE_DEAD_VOLUME
+
+def test_loading_sheet_is_written_per_plate_and_tube():
+    master_mix_plan = plan_master_mix(COMBINATIONS * 4, plate_capacity=96)
+    rows = list(csv.DictReader(io.StringIO(export_loading_sheet(master_mix_plan))))
+    assert [(row["plate"], row["tube"]) for row in rows] == [("1", "B2"), ("1", "C2"), ("2", "B2"), ("2", "C2")]
+    assert sum(int(row["reactions"]) for row in rows) == 4 * len(COMBINATIONS)
+
+def test_overfull_tube_is_rejected():
+    with pytest.raises(ValueError, match="more than the 1500"):
+        plan_master_mix([{"name": f"c{i}", "parts": ["p1"]} for i in range(200)], plate_capacity=200)
+
+@pytest.mark.parametrize("pipette", ["p10_single", "p20_single_gen2"])
+def test_master_mix_shortens_the_assembly(pipette):
+    compiled_template = read_template()
+    settings = {"part_volume": 1, "tip_action": "wash", "pipettes": {"small": pipette}}
+    master_mix_plan = plan_master_mix(COMBINATIONS, pipette=pipette)
+    separate = simulate_protocol(compiled_template.render(DNA_PLATE_MAP_DICT, COMBINATIONS, settings))
+    premixed = simulate_protocol(compiled_template.render(DNA_PLATE_MAP_DICT, COMBINATIONS,
+                                                          dict(settings, master_mix=master_mix_plan["tubes"])))
+    assert premixed["phase_seconds"]["assembly"] < separate["phase_seconds"]["assembly"]
+    assert premixed["phase_commands"]["assembly"]["aspirate"] < separate["phase_commands"]["assembly"]["aspirate"]
@@ -0,0 +1,36 @@
+import pytest
+
+from distribution import plan_part_distribution
+from master_mix import plan_master_mix
+from transfer_plan import compile_transfer_plan
+
+COMBINATIONS = [{"name": "c1", "parts": ["p1", "p2"]}]
+DNA_PLATE_MAP_DICT = {"PlateMap1": [["p1", "p2"]], "PlateMap2": []}
+
+@pytest.mark.parametrize("part_volume", [0, -1])
+def test_non_positive_part_volume_is_rejected(part_volume):
+    with pytest.raises(ValueError, match="must be positive"):
+        plan_part_distribution(COMBINATIONS, part_volume=part_volume)
+    with pytest.raises(ValueError, match="must be positive"):
+        compile_transfer_plan(DNA_PLATE_MAP_DICT, COMBINATIONS, {"part_volume": part_volume})
+    with pytest.raises(ValueError, match="must be positive"):
+        plan_master_mix(COMBINATIONS, part_volume=part_volume)
+
+def test_part_volume_above_pipette_maximum_is_rejected():
+    with pytest.raises(ValueError, match="at most 10"):
+        plan_part_distribution(COMBINATIONS, part_volume=12)
+
+def test_positive_part_volume_is_accepted():
+    assert plan_part_distribution(COMBINATIONS, part_volume=0.5)["part_volume"] == 0.5
+
+def test_parts_fit_the_configured_reaction_volume():
+    combinations = [{"name": "c1", "parts": ["p1", "p2", "p3", "p4"]}]
+    with pytest.raises(ValueError, match="more than the 8 µL"):
+        plan_part_distribution(combinations, part_volume=3)
+    assert plan_part_distribution(combinations, part_volume=3, reaction_volume=20)["part_volume"] == 3
+
+def test_negative_water_volume_is_rejected():
+    with pytest.raises(ValueError, match="more than the 3 µL"):
+        plan_part_distribution(COMBINATIONS, part_volume=2, reaction_volume=5)
+    with pytest.raises(ValueError, match="more than the 3 µL"):
+        compile_transfer_plan(DNA_PLATE_MAP_DICT, COMBINATIONS, {"part_volume": 2, "volumes": {"reaction": 5}})
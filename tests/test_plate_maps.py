@@ -0,0 +1,46 @@
+import csv
+import io
+import json
+
+import pytest
+
+from conftest import make_combinations
+from plate_maps import build_plate_maps, export_plate_maps_csv, export_plate_maps_json, export_plate_maps_long
+from simulator import Labware
+
+def test_reactions_fill_the_plate_column_by_column():
+    plate_maps = build_plate_maps(make_combinations(10, 5))
+    assert plate_maps.shape == (1, 8, 12)
+    assert [plate_maps[0, row, 0] for row in range(8)] == [f"c{i}" for i in range(8)]
+    assert (plate_maps[0, 0, 1], plate_maps[0, 1, 1], plate_maps[0, 2, 1]) == ("c8", "c9", "")
+
+@pytest.mark.parametrize("plate_capacity, second_plate_first", [(96, "c96"), (48, "c48")])
+def test_each_plate_starts_in_a1(plate_capacity, second_plate_first):
+    plate_maps = build_plate_maps(make_combinations(100, 5), plate_capacity)
+    assert plate_maps[1, 0, 0] == second_plate_first
+    assert (plate_maps[0] != "").sum() == plate_capacity
+    assert not plate_maps[0, :, plate_capacity // 8:].any()
+
+@pytest.mark.parametrize("plate_capacity", [0, 20, 104])
+def test_plate_capacity_must_be_whole_columns(plate_capacity):
+    with pytest.raises(ValueError, match="whole number of columns"):
+        build_plate_maps(make_combinations(10, 5), plate_capacity)
+
+def test_every_format_places_a_reaction_in_the_robot_well():
+    combinations = make_combinations(100, 5)
+    robot_wells = [well.well_name for well in Labware("biorad_96_wellplate_200ul_pcr", "7").wells()]
+    long_rows = list(csv.DictReader(io.StringIO(export_plate_maps_long(combinations))))
+    assert [row["well"] for row in long_rows] == robot_wells + robot_wells[:4]
+    assert long_rows[13]["parts"] == ";".join(combinations[13]["parts"])
+
+    plate_maps = build_plate_maps(combinations)
+    plates = json.loads(export_plate_maps_json(plate_maps))
+    for row in long_rows:
+        plate = plates[int(row["plate"]) - 1]
+        assert plate["layout"][plate["rows"].index(row["row"])][int(row["column"]) - 1] == row["combination"]
+
+    grid_rows = list(csv.reader(io.StringIO(export_plate_maps_csv(plate_maps))))
+    assert grid_rows[0] == ["Reaction plate 1"]
+    assert grid_rows[1] == [""] + [str(column) for column in range(1, 13)]
+    assert grid_rows[3][:3] == ["B", "c1", "c9"]
+    assert grid_rows[11] == ["Reaction plate 2"]
@@ -0,0 +1,42 @@
+import pytest
+
+from conftest import make_combinations
+from plating import (DEFAULT_MULTICHANNEL_PLATING_CONFIGURATION, PLATING_CONFIGURATIONS, available_agar_slots,
+                     plating_configurations, plating_settings, summarise_plating)
+from simulator import simulate_protocol
+from test_transfer_plan import read_template
+
+DNA_PLATE_MAP_DICT = {"PlateMap1": [[f"p{i + j}" for i in range(8)] for j in range(0, 40, 8)] +
+                                   [[f"b{i}" for i in range(4)]], "PlateMap2": []}
+
+def test_slot_9_is_free_only_without_reservoir_or_setup_plate():
+    assert available_agar_slots() == ["5", "9"]
+    assert available_agar_slots(multichannel=True) == available_agar_slots(pipelined=True) == ["5"]
+    assert available_agar_slots(occupied_slots=["5"]) == ["9"]
+
+def test_multichannel_plating_needs_8_rows():
+    assert plating_configurations(multichannel=True) == [DEFAULT_MULTICHANNEL_PLATING_CONFIGURATION]
+    assert set(plating_configurations()) == set(PLATING_CONFIGURATIONS)
+    with pytest.raises(ValueError, match="8-channel"):
+        plating_settings("12-well plates, 13 spots", ["5"], multichannel=True)
+    with pytest.raises(ValueError, match="free deck slot"):
+        plating_settings(DEFAULT_MULTICHANNEL_PLATING_CONFIGURATION, [])
+
+@pytest.mark.parametrize("configuration_name, slots, agar_plates, pauses", [
+    ("12-well plates, 13 spots", ["5", "9"], 3, 1),
+    ("24-well plates, 5 spots", ["5"], 2, 1),
+    ("48-well plates, 3 spots", ["5"], 1, 0),
+])
+def test_summary_matches_the_simulated_plating(configuration_name, slots, agar_plates, pauses):
+    settings = plating_settings(configuration_name, slots)
+    summary = summarise_plating(30, settings)
+    assert (summary["agar_plates"], summary["plate_change_pauses"]) == (agar_plates, pauses)
+    report = simulate_protocol(read_template().render(DNA_PLATE_MAP_DICT, make_combinations(30, 40, 2),
+                                                      {"plating": settings}))
+    assert sum(pause["phase"] == "plating" for pause in report["pauses"]) == pauses
+    assert report["phase_commands"]["plating"]["dispense"] == summary["spots"]
+
+def test_multichannel_summary_counts_one_agar_plate_per_reaction_plate():
+    settings = plating_settings(DEFAULT_MULTICHANNEL_PLATING_CONFIGURATION, ["5"], multichannel=True)
+    assert summarise_plating(200, settings, multichannel=True) == \
+        {"agar_plates": 3, "plate_change_pauses": 0, "spots": 200}
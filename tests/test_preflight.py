@@ -0,0 +1,35 @@
+import pytest
+
+from app import build_outputs, find_part_errors, run_preflight_checks
+from conftest import make_combinations
+from simulator import simulate_protocol
+from test_transfer_plan import read_template
+
+DNA_PLATE_MAP_DICT = {"PlateMap1": [[f"p{i + j}" for i in range(8)] for j in range(0, 40, 8)] +
+                                   [[f"b{i}" for i in range(4)]], "PlateMap2": []}
+
+def test_part_errors_name_duplicates_and_their_first_user():
+    dna_plate_map_dict = dict(DNA_PLATE_MAP_DICT, PlateMap2=[["p3", " "]])
+    combinations = [{"name": "a", "parts": ["p3", "q"]}, {"name": "b", "parts": ["q", "r"]}]
+    assert find_part_errors(dna_plate_map_dict, combinations) == [
+        "DNA parts found more than once in the plate maps: p3",
+        "DNA parts missing from the plate maps: q (used by a), r (used by b)",
+    ]
+    assert run_preflight_checks(dna_plate_map_dict, combinations, {"part_volume": 1})["ledger"] == []
+
+@pytest.mark.parametrize("options", [{}, {"part_volume": 2}, {"multichannel": True}, {"cell_batch_size": 4}])
+def test_ledger_tips_match_the_simulated_run(options):
+    outputs = build_outputs(DNA_PLATE_MAP_DICT, make_combinations(30, 40), **options)
+    assert not outputs["preflight"]["errors"]
+    ledger = {row["resource"]: row["needed"] for row in outputs["preflight"]["ledger"] if "tips" in row["resource"]}
+    report = simulate_protocol(read_template().render(DNA_PLATE_MAP_DICT, outputs["combinations"],
+                                                      outputs["protocol_settings"]))
+    large_pipette = "p300_multi" if options.get("multichannel") else "p300_single"
+    assert ledger == {"10ul tips": report["tips_by_pipette"]["p10_single"],
+                      "300ul tips": report["tips_by_pipette"][large_pipette]}
+
+def test_parts_used_beyond_their_well_capacity_are_errors():
+    outputs = build_outputs(DNA_PLATE_MAP_DICT, make_combinations(200, 40, 2), part_volume=4)
+    # Each backbone serves 50 reactions: 50 x 4 µL plus the dead volume, in a 200 µL well
+    assert outputs["preflight"]["errors"] == [f"DNA b{i} (µL) in PlateMap1 F{i + 1} needs 205, more than the 200 "
+                                              f"available." for i in range(4)]
@@ -0,0 +1,26 @@
+from conftest import make_combinations
+from profiles import DEFAULT_GG_PROGRAM, plan_gg_programs, program_seconds
+from sharding import shard_combinations
+
+def test_grouping_saves_hold_time():
+    combinations = make_combinations(100, 40, 2) + make_combinations(100, 40, 5)[10:]
+    program_plan = plan_gg_programs(combinations)
+    assert program_plan["grouped"]
+    assert program_plan["programs"] == ["standard", "short"]
+    assert program_plan["saved_seconds"] > 0
+    assert program_plan["added_seconds"] == 0
+
+def test_long_programs_are_reported_as_added_time():
+    combinations = make_combinations(150, 40, 4)
+    program_plan = plan_gg_programs(combinations, {combination["name"]: "long" for combination in combinations})
+    assert program_plan["programs"] == ["long", "long"]
+    assert program_plan["saved_seconds"] == 0
+    assert program_plan["added_seconds"] == 2 * (program_seconds("long") - program_seconds(DEFAULT_GG_PROGRAM))
+
+def test_plates_are_not_grouped_without_a_saving():
+    combinations = make_combinations(150, 40, 4)
+    program_plan = plan_gg_programs(combinations)
+    assert not program_plan["grouped"]
+    assert program_plan["saved_seconds"] == 0
+    assert program_plan["shards"] == shard_combinations(combinations)
+    assert program_plan["programs"] == ["standard", "standard"]
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from run_log import analyse_run_logs, export_summary_csv, parse_run_log, step_kind, summarise_runs
+from simulator import ProtocolContext, SimulatedClock, opentrons_stub_modules
+from test_transfer_plan import COMBINATIONS, DNA_PLATE_MAP_DICT, read_template
+
+LOG_TEXT = """Step start: plate 1 part p1 @ 100.0
+Step end: plate 1 part p1 @ 107.5
+Step start: plate 1 part p1 @ 120
+Step end: plate 1 part p1 @ 122.5
+Step start: plate 1 plating A1 @ 130
+Step end: plate 1 plating A1 @ 140
+Step start: plate 1 GG program @ 150"""
+
+# The comments of a simulated run, as the run log of a robot holds them
+def run_instrumented(protocol_string):
+    namespace = {"__name__": "protocol"}
+    context = ProtocolContext()
+    with opentrons_stub_modules():
+        exec(protocol_string, namespace)
+        namespace["time"] = SimulatedClock(context)
+        namespace["run"](context)
+    return "\n".join(context.comments)
+
+def test_repeated_steps_add_up_and_aborted_steps_are_left_out():
+    assert parse_run_log(LOG_TEXT) == {"plate 1 part p1": 10.0, "plate 1 plating A1": 10.0}
+    json_log = json.dumps([{"command": "comment", "message": line} for line in LOG_TEXT.splitlines()])
+    assert parse_run_log(json_log) == parse_run_log(LOG_TEXT)
+
+@pytest.mark.parametrize("step, kind", [("plate 2 part pYTK001", "part transfers"), ("plate 1 plating B3", "plating"),
+                                        ("plate 12 GG program", "GG program"), ("buffer setup", "buffer setup")])
+def test_steps_are_grouped_by_kind(step, kind):
+    assert step_kind(step) == kind
+
+def test_summary_puts_the_largest_excess_first():
+    runs = [{"a": 10, "b": 5}, {"a": 30, "b": 7}, {"a": 20}]
+    rows = summarise_runs(runs, {"a": 25, "b": 1})
+    assert [(row["step"], row["runs"], row["median_seconds"], row["excess_seconds"]) for row in rows] == \
+        [("b", 2, 6.0, 5.0), ("a", 3, 20.0, -5.0)]
+    assert export_summary_csv(rows).splitlines()[0] == \
+        "step,runs,median_seconds,p90_seconds,max_seconds,predicted_seconds,excess_seconds"
+
+def test_simulated_run_log_matches_the_prediction():
+    protocol_string = read_template().render(DNA_PLATE_MAP_DICT, COMBINATIONS, {"instrument": True})
+    rows = analyse_run_logs(protocol_string, [run_instrumented(protocol_string)])
+    assert {"part transfers", "plating", "GG program"} <= {row["step"] for row in rows}
+    # Timestamps are logged to a tenth of a second
+    assert all(abs(row["excess_seconds"]) <= 0.2 for row in rows)
+
+def test_analysis_needs_an_instrumented_protocol_and_markers():
+    with pytest.raises(ValueError, match="no step markers"):
+        analyse_run_logs(read_template().render(DNA_PLATE_MAP_DICT, COMBINATIONS, {}), [LOG_TEXT])
+    protocol_string = read_template().render(DNA_PLATE_MAP_DICT, COMBINATIONS, {"instrument": True})
+    with pytest.raises(ValueError, match="No step markers found"):
+        analyse_run_logs(protocol_string, ["Picking up tip from A1"])
@@ -0,0 +1,43 @@
+import pytest
+
+from app import build_outputs, plate_protocol_settings
+from conftest import make_combinations
+from scheduler import SETUP_STEP_MARGIN_SECONDS, compare_schedules, schedule_batches
+from simulator import simulate_protocol
+from test_transfer_plan import read_template
+
+PHASE_SECONDS = {"setup": 100, "assembly": 600, "GG cycling": 3000, "heat shock": 300, "plating": 400}
+
+def test_assembly_within_the_holds_is_hidden():
+    comparison = compare_schedules([PHASE_SECONDS] * 3, hold_seconds=1000)
+    assert comparison["back_to_back_seconds"] == 100 + 3 * 4300
+    assert comparison["pipelined_seconds"] == 100 + 4300 + 2 * 3700
+    assert comparison["saved_seconds"] == 2 * 600
+    assembly = [phase for phase in comparison["timeline"] if phase["phase"] == "assembly"]
+    assert [phase["end_seconds"] - phase["start_seconds"] for phase in assembly] == [700, 0, 0]
+
+def test_only_the_assembly_overrun_adds_time():
+    long_assembly = dict(PHASE_SECONDS, assembly=1500)
+    schedule = schedule_batches([PHASE_SECONDS, long_assembly], hold_seconds=[1000, 2000])
+    overrun = 1500 - (1000 - SETUP_STEP_MARGIN_SECONDS)
+    assert schedule["makespan_seconds"] == 100 + 4300 + overrun + 3700
+    # The hold of the plate being set up does not matter, only that of the plate cycling meanwhile
+    assert schedule_batches([PHASE_SECONDS, long_assembly], hold_seconds=[1000, 0])["makespan_seconds"] == \
+        schedule["makespan_seconds"]
+
+def test_pipelined_protocol_is_shorter_than_its_plates_back_to_back():
+    combinations = make_combinations(150, 40, 4)
+    dna_plate_map_dict = {"PlateMap1": [[f"p{i + j}" for i in range(8)] for j in range(0, 40, 8)] +
+                                       [[f"b{i}" for i in range(4)]], "PlateMap2": []}
+    outputs = build_outputs(dna_plate_map_dict, combinations, pipelined=True)
+    settings = outputs["protocol_settings"]
+    assert not outputs["preflight"]["errors"]
+    pipelined = simulate_protocol(read_template().render(dna_plate_map_dict, outputs["combinations"], settings))
+    plates = [simulate_protocol(read_template().render(
+                  dna_plate_map_dict, shard, dict(plate_protocol_settings(settings, plate_index), pipelined=False)))
+              for plate_index, shard in enumerate(outputs["shards"])]
+    back_to_back = sum(plate["total_seconds"] for plate in plates)
+    assert pipelined["total_seconds"] < back_to_back
+    # The schedule built from the plates run on their own predicts the pipelined run
+    comparison = compare_schedules([plate["phase_seconds"] for plate in plates])
+    assert comparison["pipelined_seconds"] == pytest.approx(pipelined["total_seconds"], rel=0.02)
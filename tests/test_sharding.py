@@ -0,0 +1,35 @@
+import math
+
+import pytest
+
+from conftest import make_combinations
+from profiles import plan_gg_programs
+from sharding import shard_combinations, summarise_shards
+
+@pytest.mark.parametrize("num_combinations, num_parts, plate_capacity", [
+    (1, 5, 96), (96, 16, 96), (97, 16, 96), (1000, 90, 96), (250, 30, 7),
+])
+def test_shards_partition_the_combinations(num_combinations, num_parts, plate_capacity):
+    combinations = make_combinations(num_combinations, num_parts)
+    shards = shard_combinations(combinations, plate_capacity)
+    assert sorted(id(combination) for shard in shards for combination in shard) == \
+        sorted(id(combination) for combination in combinations)
+    assert all(0 < len(shard) <= plate_capacity for shard in shards)
+    assert len(shards) == math.ceil(num_combinations / plate_capacity)
+
+def test_shards_visit_parts_no_more_than_in_input_order():
+    combinations = make_combinations(1000, 90)
+    in_order = [combinations[i:i + 96] for i in range(0, len(combinations), 96)]
+    summary = summarise_shards(shard_combinations(combinations))
+    assert summary["min_part_visits"] <= summary["part_visits"] <= summarise_shards(in_order)["part_visits"]
+
+def test_program_plan_partitions_the_combinations():
+    combinations = make_combinations(300, 30) + [{"name": f"s{i}", "parts": [f"p{i}", "b0"]} for i in range(50)]
+    program_plan = plan_gg_programs(combinations)
+    assert sorted(id(combination) for shard in program_plan["shards"] for combination in shard) == \
+        sorted(id(combination) for combination in combinations)
+    assert len(program_plan["shards"]) == len(program_plan["programs"]) == math.ceil(len(combinations) / 96)
+
+def test_plate_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        shard_combinations(make_combinations(10, 5), 0)
@@ -0,0 +1,62 @@
+import pytest
+
+from simulator import DEFAULT_TIMINGS, OutOfTipsError, SimulationError, format_duration, simulate_protocol
+
+PROTOCOL = '''
+import time
+
+from opentrons import protocol_api
+
+def run(protocol: protocol_api.ProtocolContext):
+    tips = protocol.load_labware("opentrons_96_tiprack_20ul", "3")
+    multi_tips = protocol.load_labware("opentrons_96_tiprack_300ul", "6")
+    plate = protocol.load_labware("biorad_96_wellplate_200ul_pcr", "2")
+    p10 = protocol.load_instrument("p10_single", "right", tip_racks=[tips])
+    p300 = protocol.load_instrument("p300_multi", "left", tip_racks=[multi_tips])
+    thermocycler = protocol.load_module("Thermocycler Module")
+
+    protocol.comment("Phase: transfers")
+    for _ in range(3):
+        p10.transfer(2, plate["A1"], plate["B1"])
+    p10.pick_up_tip()
+    p10.return_tip()
+    p10.pick_up_tip(tips["D1"])
+    p10.drop_tip()
+    p300.pick_up_tip()
+    p300.drop_tip()
+
+    protocol.comment("Phase: cycling")
+    protocol.delay(minutes=1)
+    time.sleep(30)
+    thermocycler.execute_profile(steps=[{"temperature": 43, "hold_time_seconds": 10},
+                                        {"temperature": 23, "hold_time_minutes": 1}], repetitions=2)
+'''
+
+def test_tips_are_counted_per_pick_up_and_channel():
+    report = simulate_protocol(PROTOCOL)
+    # A returned tip picked up again is not a new one; the 8-channel pipette uses a column of tips
+    assert report["tips_by_pipette"] == {"p10_single": 4, "p300_multi": 8}
+    assert report["tips"] == 12
+    assert report["phase_commands"]["transfers"]["pick_up_tip"] == 6
+    assert report["phase_commands"]["transfers"]["aspirate"] == 3
+
+def test_run_time_is_charged_to_each_phase():
+    report = simulate_protocol(PROTOCOL)
+    ramps = 2 * ((43 - 23) / DEFAULT_TIMINGS["block_heating_rate"] + (43 - 23) / DEFAULT_TIMINGS["block_cooling_rate"])
+    assert report["phase_seconds"]["cycling"] == pytest.approx(60 + 30 + ramps + 2 * (10 + 60))
+    assert report["total_seconds"] == pytest.approx(sum(report["phase_seconds"].values()))
+    slower = simulate_protocol(PROTOCOL, {"pick_up_tip_seconds": DEFAULT_TIMINGS["pick_up_tip_seconds"] + 1})
+    assert slower["phase_seconds"]["transfers"] - report["phase_seconds"]["transfers"] == pytest.approx(6)
+
+def test_empty_tip_rack_stops_the_run():
+    protocol_string = PROTOCOL.replace("for _ in range(3)", "for _ in range(97)")
+    with pytest.raises(OutOfTipsError, match="run out of tips after 96"):
+        simulate_protocol(protocol_string)
+
+def test_volume_above_the_pipette_maximum_is_refused():
+    with pytest.raises(SimulationError, match="cannot aspirate 12"):
+        simulate_protocol(PROTOCOL.replace("p10.transfer(2,", "p10.pick_up_tip(); p10.aspirate(12,"))
+
+@pytest.mark.parametrize("seconds, text", [(0, "0 min"), (59 * 60, "59 min"), (3600 + 5 * 60, "1 h 05 min")])
+def test_durations_are_formatted_in_hours_and_minutes(seconds, text):
+    assert format_duration(seconds) == text
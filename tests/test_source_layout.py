@@ -0,0 +1,51 @@
+import pytest
+
+from source_layout import (DNA_PLATE_NAME, DNA_TUBES_NAME, aspiration_travel, find_customised_parts,
+                           plan_source_layout)
+
+FIXED_MAP = [["b1", "b2"], ["", "b3"]]
+
+def make_combinations(num_parts, reactions_per_part):
+    return [{"name": f"c{i}_{j}", "parts": ["b1", f"x{i}"]} for i in range(num_parts) for j in range(reactions_per_part)]
+
+def test_only_parts_missing_from_the_fixed_map_are_placed():
+    combinations = make_combinations(3, 2)
+    assert find_customised_parts(FIXED_MAP, combinations) == {"x0": 2, "x1": 2, "x2": 2}
+    source_layout = plan_source_layout(FIXED_MAP, combinations)
+    placed = [part for row in source_layout["customised_map"] for part in row if part]
+    assert sorted(placed) == ["x0", "x1", "x2"]
+    assert not source_layout["spilled"]
+    assert source_layout["fixed_map"] == FIXED_MAP
+
+def test_parts_spill_over_to_the_dna_plate_when_the_rack_is_full():
+    combinations = make_combinations(30, 1)
+    source_layout = plan_source_layout(FIXED_MAP, combinations, part_volume=1, dead_volume=5)
+    assert source_layout["spilled"]
+    locations = [placement["location"] for placement in source_layout["placements"]]
+    assert sum(location.startswith(DNA_TUBES_NAME) for location in locations) == 24
+    assert sum(location.startswith(DNA_PLATE_NAME) for location in locations) == 6
+    # Fixed parts keep their wells
+    fixed_map = source_layout["fixed_map"]
+    assert (fixed_map[0][0], fixed_map[0][1], fixed_map[1][1]) == ("b1", "b2", "b3")
+    assert all(placement["volume_ul"] == 6 for placement in source_layout["placements"])
+
+def test_too_many_parts_are_rejected():
+    with pytest.raises(ValueError, match="do not fit"):
+        plan_source_layout(FIXED_MAP, make_combinations(24 + 96 - 3 + 1, 1))
+
+def test_most_used_parts_are_placed_first():
+    combinations = make_combinations(1, 40) + make_combinations(5, 1)[1:]
+    placements = plan_source_layout(FIXED_MAP, combinations)["placements"]
+    assert placements[0]["part"] == "x0"
+    assert placements[0]["reactions"] == 40
+
+def test_travel_follows_the_tip_action_of_the_job():
+    source = (200.0, 200.0)
+    wash = aspiration_travel(40, {"tip_action": "wash"}, part_volume=1)(source)
+    new_tip = aspiration_travel(40, {"tip_action": "new_tip"}, part_volume=1)(source)
+    assert wash != new_tip
+    placements = {tip_action: plan_source_layout(FIXED_MAP, make_combinations(2, 40),
+                                                 {"tip_action": tip_action})["placements"]
+                  for tip_action in ["wash", "new_tip"]}
+    assert [placement["travel_mm"] for placement in placements["wash"]] != \
+        [placement["travel_mm"] for placement in placements["new_tip"]]
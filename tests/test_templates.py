@@ -0,0 +1,59 @@
+import copy
+
+import pytest
+
+from app import cell_batch_disposal_volume
+from profiles import GG_PROGRAMS
+from simulator import simulate_protocol
+from templates import DEFAULT_HEAT_SHOCK_PROGRAM, TEMPLATE_PARAMETERS, resolve_parameters, validate_parameter_values
+from test_transfer_plan import COMBINATIONS, DNA_PLATE_MAP_DICT, read_template
+
+def test_rendered_settings_hold_every_default():
+    protocol_string = read_template().render(DNA_PLATE_MAP_DICT, COMBINATIONS, {})
+    namespace = {}
+    exec(protocol_string.split("\n\n")[2], namespace)
+    settings = namespace["protocol_settings"]
+    assert settings["pipettes"]["large"] == "p300_single"
+    assert settings["gg_programs"] == [GG_PROGRAMS["standard"]]
+    assert settings["heat_shock_program"] == DEFAULT_HEAT_SHOCK_PROGRAM
+    assert simulate_protocol(protocol_string)["total_seconds"] > 0
+
+def test_resolved_parameters_keep_given_values():
+    resolved = resolve_parameters({"slots": {"tips_small": "9"}, "multichannel": True}, num_plates=2)
+    assert set(resolved) == set(TEMPLATE_PARAMETERS)
+    assert resolved["slots"]["tips_small"] == "9" and resolved["slots"]["dna_plate"] == "1"
+    assert resolved["plating"]["labware"] == "corning_96_wellplate_360ul_flat"
+    assert len(resolved["gg_programs"]) == 2
+
+@pytest.mark.parametrize("multichannel, model", [(False, "p300_single_gen2"), (True, "p300_multi_gen2")])
+def test_large_pipette_is_configurable(multichannel, model):
+    settings = {"multichannel": multichannel, "pipettes": {"large": "p300_single_gen2", "large_multi": "p300_multi_gen2"}}
+    report = simulate_protocol(read_template().render(DNA_PLATE_MAP_DICT, COMBINATIONS, settings))
+    assert model in report["tips_by_pipette"]
+    assert cell_batch_disposal_volume(dict(settings, cell_batch_size=4)) == 20
+
+@pytest.mark.parametrize("pipettes", [{"large": "p300_multi"}, {"large_multi": "p300_single"}, {"large": ["p300"]}])
+def test_invalid_large_pipette_is_rejected(pipettes):
+    with pytest.raises(ValueError, match="pipette"):
+        validate_parameter_values({"pipettes": pipettes})
+
+@pytest.mark.parametrize("step", [{"temperature": "42", "hold_time_seconds": 90},
+                                  {"temperature": 42, "hold_time_seconds": True},
+                                  {"temperature": 42, "hold_time_seconds": None}])
+def test_heat_shock_steps_need_numbers(step):
+    with pytest.raises(ValueError, match="must be numbers"):
+        validate_parameter_values({"heat_shock_program": [step]})
+
+def test_heat_shock_program_needs_a_list_of_steps():
+    with pytest.raises(ValueError, match="list of steps"):
+        validate_parameter_values({"heat_shock_program": {"temperature": 42, "hold_time_seconds": 90}})
+
+@pytest.mark.parametrize("change", [{"cycles": "25"}, {"cycles": 0}, {"cycles": 2.5}, {"steps": []},
+                                    {"final_steps": [{"temperature": 60, "hold_time_seconds": "300"}]}])
+def test_gg_programs_are_type_checked(change):
+    program = dict(copy.deepcopy(GG_PROGRAMS["standard"]), **change)
+    with pytest.raises(ValueError):
+        validate_parameter_values({"gg_programs": [program]})
+
+def test_default_gg_programs_are_valid():
+    validate_parameter_values({"gg_programs": list(GG_PROGRAMS.values())})
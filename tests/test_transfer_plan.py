@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from app import build_resource_ledger
+from plating import DEFAULT_PLATING_CONFIGURATION, plating_settings
+from simulator import ProtocolContext, opentrons_stub_modules, simulate_protocol
+from templates import get_compiled_template, validate_parameter_values
+from transfer_plan import compile_transfer_plan, index_dna_wells
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template_files",
+                             "template_BsmbI_moclo_protocol_EP_tubes.py")
+TUBES_48 = {"labware": {"dna_tubes": "corning_48_wellplate_1.6ml_flat"}}
+DNA_PLATE_MAP_DICT = {"PlateMap1": [["p1", "p2"], ["p3", ""]], "PlateMap2": [["", "c1"]]}
+COMBINATIONS = [{"name": "c1", "parts": ["p1", "c1"]}, {"name": "c2", "parts": ["p2", "p3", "c1"]}]
+
+def read_template():
+    with open(TEMPLATE_PATH, "rb") as template_file:
+        return get_compiled_template(template_file.read())
+
+def test_wells_are_numbered_on_the_loaded_labware():
+    assert index_dna_wells(DNA_PLATE_MAP_DICT)["c1"] == ("PlateMap2", 4)
+    assert index_dna_wells(DNA_PLATE_MAP_DICT, TUBES_48)["c1"] == ("PlateMap2", 6)
+    assert index_dna_wells(DNA_PLATE_MAP_DICT, TUBES_48)["p3"] == ("PlateMap1", 1)
+
+def test_part_outside_the_labware_is_rejected():
+    with pytest.raises(ValueError, match="outside the 4 x 6 wells"):
+        index_dna_wells({"PlateMap1": [], "PlateMap2": [[""] * 6 + ["c1"]]})
+
+def test_compiled_plan_follows_the_template_parameters():
+    settings = dict(TUBES_48, part_volume=2, pipettes={"small": "p20_single_gen2"}, volumes={"reaction": 12})
+    plate_plan = compile_transfer_plan(DNA_PLATE_MAP_DICT, COMBINATIONS, settings)[0]
+    assert ["PlateMap2", 6, [0, 1], 2, "new_tip"] in plate_plan["part_transfers"]
+    assert plate_plan["water_volumes"] == [12 - 2 - 4, 12 - 2 - 6]
+
+@pytest.mark.parametrize("protocol_settings", [{}, TUBES_48])
+def test_compiled_plan_matches_the_template(protocol_settings):
+    compiled_template = read_template()
+    settings = dict(protocol_settings, part_volume=1, tip_action="wash")
+    runtime_report = simulate_protocol(compiled_template.render(DNA_PLATE_MAP_DICT, COMBINATIONS, settings))
+    transfer_plan = compile_transfer_plan(DNA_PLATE_MAP_DICT, COMBINATIONS, settings)
+    compiled_report = simulate_protocol(compiled_template.render(
+        DNA_PLATE_MAP_DICT, COMBINATIONS, dict(settings, transfer_plan=transfer_plan)))
+    assert compiled_report["travel_mm"] == pytest.approx(runtime_report["travel_mm"])
+    assert compiled_report["commands"] == runtime_report["commands"]
+
+def test_ledger_uses_the_source_labware_and_slots():
+    settings = dict(TUBES_48, part_volume=1, tip_action="wash", slots={"tips_small": "9"},
+                    plating=plating_settings(DEFAULT_PLATING_CONFIGURATION, ["5"]))
+    ledger = build_resource_ledger(DNA_PLATE_MAP_DICT, COMBINATIONS, settings)
+    c1_row = next(row for row in ledger if row["resource"] == "DNA c1 (µL)")
+    assert (c1_row["location"], c1_row["capacity"]) == ("PlateMap2 A2", 1600)
+    assert next(row for row in ledger if row["resource"] == "10ul tips")["location"] == "slot 9"
+
+def test_reaction_plate_must_hold_96_wells():
+    with pytest.raises(ValueError, match="needs 96 wells"):
+        validate_parameter_values({"labware": {"reaction_plate": "corning_48_wellplate_1.6ml_flat"}})
+
+def test_template_rejects_a_plan_compiled_for_other_labware():
+    compiled_template = read_template()
+    settings = {"part_volume": 1, "tip_action": "wash"}
+    transfer_plan = compile_transfer_plan(DNA_PLATE_MAP_DICT, COMBINATIONS, settings)
+    assert transfer_plan[0]["source_labware"]["PlateMap2"] == "opentrons_24_tuberack_eppendorf_1.5ml_safelock_snapcap"
+    protocol_string = compiled_template.render(DNA_PLATE_MAP_DICT, COMBINATIONS,
+                                               dict(settings, transfer_plan=transfer_plan, **TUBES_48))
+    with pytest.raises(ValueError, match="compiled for opentrons_24_tuberack"):
+        simulate_protocol(protocol_string)
+
+def test_runtime_index_rejects_parts_found_twice():
+    dna_plate_map_dict = dict(DNA_PLATE_MAP_DICT, PlateMap2=[["p2", "c1"]])
+    protocol_string = read_template().render(dna_plate_map_dict, COMBINATIONS, {})
+    with pytest.raises(ValueError, match=r"more than once in the plate maps: p2 \(PlateMap1, PlateMap2\)"):
+        simulate_protocol(protocol_string)
+
+def test_runtime_index_resolves_every_part_up_front():
+    combinations = COMBINATIONS + [{"name": "c3", "parts": ["p1", "p9"]}]
+    namespace = {"__name__": "protocol"}
+    context = ProtocolContext()
+    with opentrons_stub_modules():
+        exec(read_template().render(DNA_PLATE_MAP_DICT, combinations, {}), namespace)
+        with pytest.raises(ValueError, match='Could not find dna piece named "p9"'):
+            namespace["run"](context)
+    assert "aspirate" not in context.commands
+    padded = {"PlateMap1": [[" p1 ", "p2"], ["p3", ""]], "PlateMap2": [["", "c1\t"]]}
+    assert simulate_protocol(read_template().render(padded, COMBINATIONS, {}))["commands"] == \
+        simulate_protocol(read_template().render(DNA_PLATE_MAP_DICT, COMBINATIONS, {}))["commands"]
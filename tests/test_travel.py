@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from deck import SLOT_ORIGINS
+from transfer_plan import compile_transfer_plan
+from travel import optimise_transfer_order, summarise_travel, template_coordinates
+
+SETTINGS = {"labware": {"dna_tubes": "corning_48_wellplate_1.6ml_flat"}, "slots": {"tips_small": "9", "dna_tubes": "5"}}
+DNA_PLATE_MAP_DICT = {"PlateMap1": [["p1", "p2"]], "PlateMap2": [["", "c1"]]}
+COMBINATIONS = [{"name": f"r{i}", "parts": ["p1", "c1"] if i % 2 else ["p2", "c1"]} for i in range(40)]
+
+def test_coordinates_follow_the_template_parameters():
+    default = template_coordinates(list(DNA_PLATE_MAP_DICT))
+    moved = template_coordinates(list(DNA_PLATE_MAP_DICT), SETTINGS)
+    assert moved["tips"][0][1] - default["tips"][0][1] == SLOT_ORIGINS["9"][1] - SLOT_ORIGINS["4"][1]
+    assert len(moved["sources"]["PlateMap2"]) == 48
+    assert moved["sources"]["PlateMap1"] == default["sources"]["PlateMap1"]
+
+def test_optimised_order_is_shorter_on_the_configured_deck():
+    transfer_plan = compile_transfer_plan(DNA_PLATE_MAP_DICT, COMBINATIONS, SETTINGS)
+    optimised_plan = optimise_transfer_order(transfer_plan, list(DNA_PLATE_MAP_DICT), SETTINGS)
+    summary = summarise_travel(transfer_plan, optimised_plan, list(DNA_PLATE_MAP_DICT), SETTINGS)
+    assert 0 <= summary["saved_mm"]
+    assert sorted(well for transfer in optimised_plan[0]["part_transfers"] for well in transfer[2]) == \
+        sorted(well for transfer in transfer_plan[0]["part_transfers"] for well in transfer[2])
+
+@pytest.mark.parametrize("seed", range(100))
+def test_optimised_order_is_never_longer(seed):
+    rng = random.Random(seed)
+    parts = [f"p{i}" for i in range(rng.randint(2, 20))]
+    dna_plate_map_dict = {"PlateMap1": [parts[i:i + 12] for i in range(0, len(parts), 12)], "PlateMap2": []}
+    combinations = [{"name": f"r{i}", "parts": rng.sample(parts, rng.randint(1, min(len(parts), 5)))}
+                    for i in range(rng.randint(1, 96))]
+    settings = {"part_volume": rng.choice([0.5, 1, 1.5]), "tip_action": rng.choice(["wash", "new_tip"])}
+    transfer_plan = compile_transfer_plan(dna_plate_map_dict, combinations, settings)
+    optimised_plan = optimise_transfer_order(transfer_plan, list(dna_plate_map_dict))
+    assert summarise_travel(transfer_plan, optimised_plan, list(dna_plate_map_dict))["saved_mm"] >= 0